@@ -0,0 +1,419 @@
+"""
+Benchmark do próprio harness de avaliação (sem rede: provider fake).
+
+Para cada tamanho de dataset sintético (default: 15, 1000 e 100000 linhas),
+em um subprocesso próprio (para o pico de memória ser só daquele tamanho):
+- loaders: leitura do JSONL (linhas/s) e do prompt (frio e memoizado)
+- juízes: metrics.evaluate_metrics, per-metric e combined
+- evaluate: evaluate_prompt ponta a ponta no modo local (exemplos/s e
+  overhead por etapa, a partir dos spans do profiling.py)
+- pico de RSS do processo
+
+E uma vez por execução, o tempo de startup (`import evaluate` e
+`evaluate.py --help` em um processo novo).
+
+O LLM é o provider fake (fake_llm.py) com latência controlada
+(--latency-ms), então o que se mede é o custo da orquestração. Nos tamanhos
+grandes, os estágios que chamam o LLM avaliam só os primeiros
+--max-eval-examples / --max-judge-examples exemplos; os loaders leem o
+dataset inteiro.
+
+Uso:
+    python benchmarks/bench_harness.py
+    python benchmarks/bench_harness.py --sizes 15 1000 --latency-ms 20 -c 16
+    python benchmarks/bench_harness.py --compare benchmarks/results/<anterior>.json
+
+Os resultados vão para benchmarks/results/<data>-<commit>.json (ou --output);
+--compare mostra a variação de cada indicador em relação a um resultado
+anterior e termina com código 1 se algum piorou além de --tolerance.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "src"
+PROMPT_PATH = ROOT / "prompts" / "bug_to_user_story_v2.yml"
+PROMPT_NAME = "bug_to_user_story_v2"
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+DEFAULT_SIZES = [15, 1000, 100000]
+
+_BUGS = [
+    "Botão de {feature} não funciona no produto ID {i}.",
+    "Ao salvar {feature}, o sistema exibe erro 500 para o usuário {i}.",
+    "No Android, a tela de {feature} fica em branco depois do login (caso {i}).",
+    "Relatório de {feature} mostra valores duplicados desde a versão {i}.",
+]
+_FEATURES = ["checkout", "perfil", "pagamento", "busca", "notificações", "exportação"]
+_DOMAINS = ["ecommerce", "saas", "mobile", "fintech"]
+_COMPLEXITY = ["simple", "medium", "complex"]
+
+# (chave no resultado, rótulo, maior é melhor?) usados no --compare
+COMPARED = [
+    ("evaluate.examples_per_sec", "evaluate: exemplos/s", True),
+    ("evaluate.overhead_ms_per_example", "evaluate: overhead/exemplo (ms)", False),
+    ("judges.per-metric.calls_per_sec", "juízes per-metric: chamadas/s", True),
+    ("judges.combined.calls_per_sec", "juízes combined: chamadas/s", True),
+    ("loaders.dataset_rows_per_sec", "loader: linhas/s", True),
+    ("loaders.prompt_warm_us", "loader: prompt memoizado (µs)", False),
+    ("peak_rss_mb", "pico de RSS (MB)", False),
+]
+
+
+def write_synthetic_dataset(path: Path, rows: int):
+    """Dataset no formato de datasets/bug_to_user_story.jsonl, com bug reports variados."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(rows):
+            feature = _FEATURES[i % len(_FEATURES)]
+            f.write(json.dumps({
+                "inputs": {"bug_report": _BUGS[i % len(_BUGS)].format(feature=feature, i=i)},
+                "outputs": {"reference": f"Como usuário, eu quero usar {feature} sem erros (caso {i}).\n\nCritérios de Aceitação:\n- Dado ...\n- Quando ...\n- Então ..."},
+                "metadata": {"domain": _DOMAINS[i % len(_DOMAINS)], "complexity": _COMPLEXITY[i % len(_COMPLEXITY)]},
+            }, ensure_ascii=False) + "\n")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _stage_stats(stats: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    return {
+        name: {
+            "count": s["count"],
+            "total_ms": round(s["total"] * 1000, 3),
+            "p50_ms": round(s["p50"] * 1000, 3),
+            "p99_ms": round(s["p99"] * 1000, 3),
+        }
+        for name, s in sorted(stats.items())
+    }
+
+
+def bench_loaders(dataset_path: Path) -> Dict[str, Any]:
+    from dataset import read_dataset
+    from prompt_loader import clear_prompt_cache, load_prompt_template
+
+    start = time.perf_counter()
+    rows = sum(1 for _ in read_dataset(str(dataset_path)))
+    elapsed = time.perf_counter() - start
+
+    clear_prompt_cache()
+    start = time.perf_counter()
+    load_prompt_template(str(PROMPT_PATH), PROMPT_NAME)
+    cold = time.perf_counter() - start
+
+    repeats = 1000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        load_prompt_template(str(PROMPT_PATH), PROMPT_NAME)
+    warm = (time.perf_counter() - start) / repeats
+
+    return {
+        "dataset_rows": rows,
+        "dataset_read_sec": round(elapsed, 4),
+        "dataset_rows_per_sec": round(rows / elapsed, 1) if elapsed else None,
+        "prompt_cold_ms": round(cold * 1000, 3),
+        "prompt_warm_us": round(warm * 1_000_000, 2),
+    }
+
+
+def bench_judges(dataset_path: Path, max_examples: int) -> Dict[str, Any]:
+    import metrics
+    from dataset import read_dataset
+    from evaluate import EVAL_METRICS
+
+    rows = []
+    for row in read_dataset(str(dataset_path)):
+        rows.append(row)
+        if len(rows) >= max_examples:
+            break
+
+    results = {}
+    for mode in ("per-metric", "combined"):
+        calls = len(rows) * (len(EVAL_METRICS) if mode == "per-metric" else 1)
+        start = time.perf_counter()
+        for row in rows:
+            metrics.evaluate_metrics(
+                row["inputs"]["bug_report"], "Como usuário, eu quero ...", row["outputs"]["reference"],
+                EVAL_METRICS, mode=mode
+            )
+        elapsed = time.perf_counter() - start
+        results[mode] = {
+            "examples": len(rows),
+            "calls": calls,
+            "sec": round(elapsed, 4),
+            "calls_per_sec": round(calls / elapsed, 1) if elapsed else None,
+        }
+    return results
+
+
+def bench_evaluate(dataset_path: Path, runs_dir: Path, max_examples: int, concurrency: int) -> Dict[str, Any]:
+    import evaluate
+    from journal import RunJournal
+    from profiling import get_profiler
+
+    profiler = get_profiler()
+    profiler.reset()
+    journal = RunJournal("bench", str(runs_dir))
+
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        scores = evaluate.evaluate_prompt(
+            PROMPT_NAME, str(dataset_path), None,
+            concurrency=concurrency, journal=journal, limit=max_examples
+        )
+    elapsed = time.perf_counter() - start
+
+    stats = profiler.stats()
+    examples = stats.get("example", {}).get("count", 0)
+    example_total = stats.get("example", {}).get("total", 0.0)
+    llm_total = stats.get("llm.call", {}).get("total", 0.0)
+
+    return {
+        "examples": examples,
+        "concurrency": concurrency,
+        "sec": round(elapsed, 4),
+        "examples_per_sec": round(examples / elapsed, 2) if elapsed else None,
+        # Tempo de cada exemplo fora das chamadas ao LLM (geração + juízes)
+        "overhead_ms_per_example": round((example_total - llm_total) / examples * 1000, 3) if examples else None,
+        "scores_ok": all(value > 0 for value in scores.values()),
+        "stages": _stage_stats(stats),
+    }
+
+
+def run_size(size: int, options: argparse.Namespace) -> Dict[str, Any]:
+    """Executa os estágios para um tamanho de dataset (no processo atual)."""
+    workdir = Path(tempfile.mkdtemp(prefix=f"bench-{size}-"))
+    try:
+        os.environ.update({
+            "LLM_PROVIDER": "fake",
+            "FAKE_LLM_LATENCY_MS": str(options.latency_ms),
+            "FAKE_LLM_LATENCY_SIGMA": str(options.latency_sigma),
+            "FAKE_LLM_OUTPUT_TOKENS": str(options.output_tokens),
+            "JUDGE_CACHE_PATH": str(workdir / "judge.sqlite"),
+            "GENERATION_CACHE_PATH": str(workdir / "generation.sqlite"),
+            "EVAL_RUNS_DIR": str(workdir / "runs"),
+        })
+        if str(SRC) not in sys.path:
+            sys.path.insert(0, str(SRC))
+        os.chdir(ROOT)
+
+        dataset_path = workdir / "dataset.jsonl"
+        write_synthetic_dataset(dataset_path, size)
+
+        result = {"size": size}
+        result["loaders"] = bench_loaders(dataset_path)
+
+        # Juízes sem cache (senão a segunda passada mediria só o SQLite)
+        from cache import get_judge_cache
+        get_judge_cache().enabled = False
+        result["judges"] = bench_judges(dataset_path, min(size, options.max_judge_examples))
+        get_judge_cache().enabled = True
+
+        result["evaluate"] = bench_evaluate(dataset_path, workdir / "runs", min(size, options.max_eval_examples), options.concurrency)
+        result["peak_rss_mb"] = _peak_rss_mb()
+        return result
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _median_wall(command: List[str], repeats: int) -> float:
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        durations.append(time.perf_counter() - start)
+    return round(statistics.median(durations) * 1000, 1)
+
+
+def bench_startup(repeats: int) -> Dict[str, float]:
+    """Tempo (ms, mediana) de um processo novo até o harness estar pronto."""
+    python = sys.executable
+    return {
+        "python_ms": _median_wall([python, "-c", "pass"], repeats),
+        "import_evaluate_ms": _median_wall([python, "-c", f"import sys; sys.path.insert(0, {str(SRC)!r}); import evaluate"], repeats),
+        "evaluate_help_ms": _median_wall([python, str(SRC / "evaluate.py"), "--help"], repeats),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _worker_command(size: int, options: argparse.Namespace) -> List[str]:
+    return [
+        sys.executable, str(Path(__file__).resolve()), "--worker", str(size),
+        "--latency-ms", str(options.latency_ms), "--latency-sigma", str(options.latency_sigma),
+        "--output-tokens", str(options.output_tokens), "--concurrency", str(options.concurrency),
+        "--max-eval-examples", str(options.max_eval_examples),
+        "--max-judge-examples", str(options.max_judge_examples),
+    ]
+
+
+def run_all(options: argparse.Namespace) -> Dict[str, Any]:
+    result = {
+        "meta": {
+            "commit": _git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": options.latency_ms,
+            "latency_sigma": options.latency_sigma,
+            "concurrency": options.concurrency,
+            "max_eval_examples": options.max_eval_examples,
+            "max_judge_examples": options.max_judge_examples,
+        },
+        "startup": None,
+        "sizes": {},
+    }
+
+    if not options.skip_startup:
+        print("⏱️  Startup...")
+        result["startup"] = bench_startup(options.startup_repeats)
+
+    for size in options.sizes:
+        print(f"⏱️  Dataset com {size} linhas...")
+        completed = subprocess.run(_worker_command(size, options), cwd=ROOT, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(completed.stderr[-2000:])
+            raise RuntimeError(f"Benchmark do tamanho {size} falhou (código {completed.returncode})")
+        result["sizes"][str(size)] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    return result
+
+
+def print_summary(result: Dict[str, Any]):
+    startup = result.get("startup")
+    if startup:
+        print(
+            f"\nStartup: python {startup['python_ms']}ms | import evaluate {startup['import_evaluate_ms']}ms | "
+            f"evaluate.py --help {startup['evaluate_help_ms']}ms"
+        )
+
+    print(f"\n{'Linhas':>8} {'leitura/s':>11} {'aval.':>6} {'ex/s':>8} {'overhead':>10} {'juiz/s':>8} {'RSS MB':>8}")
+    for size, entry in result["sizes"].items():
+        evaluation = entry["evaluate"]
+        print(
+            f"{size:>8} {entry['loaders']['dataset_rows_per_sec']:>11.0f} {evaluation['examples']:>6} "
+            f"{evaluation['examples_per_sec']:>8.1f} {evaluation['overhead_ms_per_example']:>8.2f}ms "
+            f"{entry['judges']['per-metric']['calls_per_sec']:>8.1f} {entry['peak_rss_mb'] or 0:>8.1f}"
+        )
+
+
+def _lookup(entry: Dict[str, Any], dotted: str) -> Optional[float]:
+    value: Any = entry
+    for part in dotted.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float) -> Tuple[List[str], int]:
+    """
+    Variação de cada indicador entre dois resultados.
+
+    Returns:
+        (linhas do relatório, quantidade de regressões além da tolerância)
+    """
+    lines = [f"Comparando {baseline['meta'].get('commit')} → {current['meta'].get('commit')} (tolerância {tolerance:.0%})"]
+    regressions = 0
+
+    rows = [("startup.import_evaluate_ms", "startup: import evaluate (ms)", False, baseline.get("startup") or {}, current.get("startup") or {}, "")]
+    for size in current["sizes"]:
+        if size in baseline["sizes"]:
+            for key, label, higher_is_better in COMPARED:
+                rows.append((key, label, higher_is_better, baseline["sizes"][size], current["sizes"][size], f"[{size}] "))
+
+    for key, label, higher_is_better, old_entry, new_entry, prefix in rows:
+        old = _lookup(old_entry, key.split(".", 1)[1] if key.startswith("startup.") else key)
+        new = _lookup(new_entry, key.split(".", 1)[1] if key.startswith("startup.") else key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        marker = ""
+        if worse > tolerance:
+            marker = "  ⚠️  regressão"
+            regressions += 1
+        elif worse < -tolerance:
+            marker = "  ✓ melhora"
+        lines.append(f"  {prefix}{label:<34} {old:>12.2f} → {new:>12.2f} ({change:+.1%}){marker}")
+
+    return lines, regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark do harness de avaliação com o provider fake")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Linhas dos datasets sintéticos (default: 15 1000 100000)")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Mediana da latência do LLM fake por chamada (default: 5)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Sigma da latência lognormal (default: 0.5)")
+    parser.add_argument("--output-tokens", type=int, default=150, help="Tokens das respostas geradas (default: 150)")
+    parser.add_argument("--concurrency", "-c", type=int, default=8, help="Concorrência do evaluate_prompt (default: 8)")
+    parser.add_argument("--max-eval-examples", type=int, default=1000, help="Exemplos avaliados ponta a ponta por tamanho (default: 1000)")
+    parser.add_argument("--max-judge-examples", type=int, default=200, help="Exemplos do estágio dos juízes por tamanho (default: 200)")
+    parser.add_argument("--startup-repeats", type=int, default=5, help="Repetições da medida de startup (default: 5)")
+    parser.add_argument("--skip-startup", action="store_true", help="Não mede o startup")
+    parser.add_argument("--output", default=None, help="Arquivo JSON do resultado (default: benchmarks/results/<data>-<commit>.json)")
+    parser.add_argument("--compare", metavar="BASE.json", default=None, help="Compara com um resultado anterior")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Piora relativa tolerada no --compare (default: 0.10)")
+    parser.add_argument("--worker", type=int, default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    options = parse_args(argv)
+
+    if options.worker is not None:
+        # Subprocesso de um tamanho: o JSON vai na última linha do stdout
+        print(json.dumps(run_size(options.worker, options)))
+        return 0
+
+    result = run_all(options)
+    print_summary(result)
+
+    output = Path(options.output) if options.output else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{result['meta']['commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\nResultado: {output}")
+
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressions = compare(baseline, result, options.tolerance)
+        print()
+        for line in lines:
+            print(line)
+        if regressions:
+            print(f"\n❌ {regressions} indicador(es) pioraram além de {options.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
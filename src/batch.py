@@ -0,0 +1,264 @@
+"""
+Execução de chamadas a LLM via Batch API (avaliações offline em lote).
+
+Em vez de uma requisição HTTP por chamada, todas as requisições de uma fase
+(gerações ou juízes) são enviadas como um único job; o script aguarda o job
+terminar e lê os resultados. Troca latência por custo/throughput.
+
+Backends:
+- openai: Batch API da OpenAI (/v1/chat/completions, janela de 24h)
+- file:   substituto local baseado em arquivos, no mesmo formato JSONL da
+          OpenAI (<dir>/<batch_id>/input.jsonl -> output.jsonl). Útil para
+          testes: as respostas podem ser produzidas por um `responder` local
+          ou por outro processo (python src/batch.py process <dir> <batch_id>).
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from profiling import span
+
+# Estados finais de um job
+BATCH_DONE = "completed"
+BATCH_FAILED = ("failed", "expired", "cancelled")
+
+ROLE_BY_MESSAGE_TYPE = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def to_openai_messages(messages: List[Any]) -> List[Dict[str, str]]:
+    """Converte mensagens do LangChain para o formato role/content da API."""
+    converted = []
+    for message in messages:
+        role = ROLE_BY_MESSAGE_TYPE.get(getattr(message, "type", ""), "user")
+        converted.append({"role": role, "content": message.content})
+    return converted
+
+
+def make_request(
+    custom_id: str,
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float = 0.0,
+    **extra: Any
+) -> Dict[str, Any]:
+    """
+    Monta uma linha do arquivo de entrada do batch (formato OpenAI).
+
+    `extra` vai direto para o corpo da requisição (ex: prompt_cache_key).
+    """
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            **extra,
+        },
+    }
+
+
+def _parse_output_line(line: Dict[str, Any]) -> Optional[str]:
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code", 200) >= 400:
+        return None
+    choices = (response.get("body") or {}).get("choices") or []
+    if not choices:
+        return None
+    return choices[0].get("message", {}).get("content")
+
+
+class OpenAIBatchBackend:
+    """Batch API da OpenAI."""
+
+    def __init__(self):
+        from openai import OpenAI
+
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        payload = "\n".join(json.dumps(request, ensure_ascii=False) for request in requests)
+        input_file = self.client.files.create(
+            file=("batch_input.jsonl", payload.encode("utf-8")),
+            purpose="batch",
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        batch = self.client.batches.retrieve(batch_id)
+        results: Dict[str, Optional[str]] = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for raw in self.client.files.content(file_id).text.splitlines():
+                if raw.strip():
+                    line = json.loads(raw)
+                    results[line["custom_id"]] = _parse_output_line(line)
+        return results
+
+
+class FileBatchBackend:
+    """
+    Substituto local da Batch API, baseado em arquivos.
+
+    Args:
+        directory: Diretório onde cada batch ganha uma pasta própria
+        responder: Função (messages, model, temperature) -> texto. Se informada,
+            o batch é processado logo após o submit; senão, aguarda outro
+            processo gravar output.jsonl.
+    """
+
+    def __init__(self, directory: str, responder: Optional[Callable[[List[Dict[str, str]], str, float], str]] = None):
+        self.directory = Path(directory)
+        self.responder = responder
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        batch_dir = self.directory / batch_id
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        with open(batch_dir / "input.jsonl", "w", encoding="utf-8") as f:
+            for request in requests:
+                f.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+        if self.responder is not None:
+            process_file_batch(str(self.directory), batch_id, self.responder)
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        batch_dir = self.directory / batch_id
+        if (batch_dir / "output.jsonl").exists():
+            return BATCH_DONE
+        if (batch_dir / "failed").exists():
+            return "failed"
+        return "in_progress"
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        results: Dict[str, Optional[str]] = {}
+        with open(self.directory / batch_id / "output.jsonl", "r", encoding="utf-8") as f:
+            for raw in f:
+                if raw.strip():
+                    line = json.loads(raw)
+                    results[line["custom_id"]] = _parse_output_line(line)
+        return results
+
+
+def process_file_batch(directory: str, batch_id: str, responder: Callable[[List[Dict[str, str]], str, float], str]):
+    """
+    Processa um batch do FileBatchBackend, gravando output.jsonl no formato OpenAI.
+
+    Falhas individuais viram linhas com "error", como na API real.
+    """
+    batch_dir = Path(directory) / batch_id
+    lines = []
+    with open(batch_dir / "input.jsonl", "r", encoding="utf-8") as f:
+        for raw in f:
+            if not raw.strip():
+                continue
+            request = json.loads(raw)
+            body = request["body"]
+            try:
+                content = responder(body["messages"], body["model"], body.get("temperature", 0.0))
+                lines.append({
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"role": "assistant", "content": content}}]},
+                    },
+                    "error": None,
+                })
+            except Exception as e:
+                lines.append({"custom_id": request["custom_id"], "response": None, "error": {"message": str(e)}})
+
+    tmp_path = batch_dir / "output.jsonl.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    tmp_path.replace(batch_dir / "output.jsonl")
+
+
+def llm_responder(messages: List[Dict[str, str]], model: str, temperature: float) -> str:
+    """Responder do FileBatchBackend que usa o provider configurado no .env."""
+    from utils import get_llm
+
+    llm = get_llm(model=model, temperature=temperature)
+    chat = [(message["role"], message["content"]) for message in messages]
+    return llm.invoke(chat).content
+
+
+def get_batch_backend(name: str, directory: Optional[str] = None):
+    """
+    Cria o backend de batch pelo nome (--batch).
+
+    Raises:
+        ValueError: Se o backend não for suportado
+    """
+    if name == "openai":
+        return OpenAIBatchBackend()
+    if name == "file":
+        return FileBatchBackend(directory or os.getenv("EVAL_BATCH_DIR", ".cache/batches"), responder=llm_responder)
+    raise ValueError(f"Backend de batch '{name}' não suportado. Use 'openai' ou 'file'.")
+
+
+def run_batch(backend: Any, requests: List[Dict[str, Any]], label: str, poll_interval: float = 30.0) -> Dict[str, Optional[str]]:
+    """
+    Envia as requisições como um job, aguarda a conclusão e retorna os textos.
+
+    Args:
+        backend: OpenAIBatchBackend ou FileBatchBackend
+        requests: Linhas criadas com make_request
+        label: Nome da fase para os logs (ex: "geração")
+        poll_interval: Intervalo entre consultas de status, em segundos
+
+    Returns:
+        Dict custom_id -> texto da resposta (None se a requisição falhou)
+
+    Raises:
+        RuntimeError: Se o job terminar como failed/expired/cancelled
+    """
+    if not requests:
+        return {}
+
+    with span("batch.submit", label=label):
+        batch_id = backend.submit(requests)
+    print(f"   📦 Batch de {label} enviado: {batch_id} ({len(requests)} requisições)")
+
+    started = time.monotonic()
+    with span("batch.wait", label=label):
+        while True:
+            status = backend.status(batch_id)
+            if status == BATCH_DONE:
+                break
+            if status in BATCH_FAILED:
+                raise RuntimeError(f"Batch {batch_id} terminou com status '{status}'")
+            print(f"      … {status} ({time.monotonic() - started:.0f}s)")
+            time.sleep(poll_interval)
+
+    with span("batch.results", label=label):
+        results = backend.results(batch_id)
+    failed = sum(1 for request in requests if results.get(request["custom_id"]) is None)
+    print(f"   ✓ Batch de {label} concluído em {time.monotonic() - started:.0f}s" + (f" ({failed} falhas)" if failed else ""))
+    return results
+
+
+if __name__ == "__main__":
+    # Processa manualmente um batch do backend "file": python src/batch.py process <dir> <batch_id>
+    if len(sys.argv) == 4 and sys.argv[1] == "process":
+        sys.path.insert(0, str(Path(__file__).resolve().parent))
+        process_file_batch(sys.argv[2], sys.argv[3], llm_responder)
+        sys.exit(0)
+    print("Uso: python src/batch.py process <dir> <batch_id>")
+    sys.exit(1)
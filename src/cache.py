@@ -0,0 +1,194 @@
+"""
+Cache local persistente (SQLite) para respostas de LLM.
+
+As chaves são hashes do conteúdo exato enviado ao modelo (prompt renderizado +
+provider/modelo/temperatura), então qualquer alteração no prompt gera uma nova
+entrada. O arquivo tem tamanho máximo: quando ultrapassado, as entradas menos
+usadas recentemente são removidas (LRU).
+
+Há dois caches, configurados via .env:
+- JUDGE_CACHE_PATH / JUDGE_CACHE_MAX_MB / JUDGE_CACHE=off: veredictos dos juízes
+  (default: .cache/judge_cache.sqlite, 256 MB)
+- GENERATION_CACHE_PATH / GENERATION_CACHE_MAX_MB / GENERATION_CACHE=off: respostas
+  geradas pelo prompt avaliado (default: .cache/generation_cache.sqlite, 256 MB)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Gera uma chave determinística (sha256) a partir das partes informadas.
+
+    Args:
+        parts: Valores serializáveis em JSON (prompt, modelo, temperatura...)
+
+    Returns:
+        Hash hexadecimal
+    """
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteCache:
+    """
+    Cache chave -> valor JSON em um arquivo SQLite, com despejo LRU por tamanho.
+
+    Seguro para uso entre threads (uma conexão protegida por lock) e entre
+    processos (modo WAL do SQLite).
+    """
+
+    def __init__(self, path: str, max_bytes: int, enabled: bool = True):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        # refresh: ignora leituras (tudo é miss) mas grava os novos valores
+        self.refresh = False
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retorna o valor em cache ou None (contabiliza hit/miss)."""
+        if not self.enabled:
+            return None
+
+        if self.refresh:
+            self.misses += 1
+            return None
+
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        """Grava o valor e aplica o limite de tamanho."""
+        if not self.enabled:
+            return
+
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                (key, data, size, time.time()),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - self.max_bytes
+        removed = 0
+        keys = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC"):
+            keys.append((key,))
+            removed += size
+            if removed >= excess:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de hits/misses desta execução."""
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_CACHES: Dict[str, SQLiteCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def _get_named_cache(env_prefix: str, default_path: str) -> SQLiteCache:
+    cache = _CACHES.get(env_prefix)
+    if cache is None:
+        with _CACHES_LOCK:
+            cache = _CACHES.get(env_prefix)
+            if cache is None:
+                cache = SQLiteCache(
+                    path=os.getenv(f"{env_prefix}_PATH", default_path),
+                    max_bytes=int(float(os.getenv(f"{env_prefix}_MAX_MB", "256")) * 1024 * 1024),
+                    enabled=os.getenv(env_prefix, "on").lower() not in ("off", "0", "false"),
+                )
+                _CACHES[env_prefix] = cache
+    return cache
+
+
+def reset_cache_state():
+    """
+    Zera os contadores e volta as flags de cada execução (--no-*-cache,
+    --refresh-*) ao que o .env define, mantendo as conexões abertas.
+
+    Usado por processos que executam vários comandos (promptops serve).
+    """
+    with _CACHES_LOCK:
+        for env_prefix, cache in _CACHES.items():
+            cache.enabled = os.getenv(env_prefix, "on").lower() not in ("off", "0", "false")
+            cache.refresh = False
+            cache.hits = 0
+            cache.misses = 0
+
+
+def get_judge_cache() -> SQLiteCache:
+    """Retorna o cache compartilhado dos veredictos dos juízes."""
+    return _get_named_cache("JUDGE_CACHE", ".cache/judge_cache.sqlite")
+
+
+def get_generation_cache() -> SQLiteCache:
+    """Retorna o cache compartilhado das respostas geradas pelo prompt avaliado."""
+    return _get_named_cache("GENERATION_CACHE", ".cache/generation_cache.sqlite")
+
+
+def format_cache_stats(name: str, cache: SQLiteCache) -> str:
+    """Linha de resumo com hits/misses para o relatório final."""
+    if not cache.enabled:
+        return f"{name}: desativado"
+
+    suffix = " (refresh)" if cache.refresh else ""
+
+    total = cache.hits + cache.misses
+    rate = (cache.hits / total * 100) if total else 0.0
+    return f"{name}: {cache.hits} hits / {cache.misses} misses ({rate:.0f}% hits){suffix}"
@@ -0,0 +1,140 @@
+"""
+Leitura de datasets JSONL em streaming.
+
+Os exemplos são lidos e entregues um a um (gerador), então a avaliação começa
+enquanto o resto do arquivo ainda está sendo lido e a memória não cresce com o
+tamanho do dataset. Arquivos .jsonl.gz e .jsonl.zst são descompactados em
+streaming (zstd requer o pacote opcional `zstandard`).
+
+Filtros por metadata (domain, type, complexity...) podem ser passados como
+predicados ou no formato da CLI: --filter complexity=medium --filter domain=saas,crm
+"""
+
+import io
+import gzip
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def open_text(path: str) -> TextIO:
+    """
+    Abre o arquivo como texto UTF-8, descompactando pela extensão (.gz, .zst).
+
+    Raises:
+        ImportError: Se o arquivo for .zst e o pacote zstandard não estiver instalado
+    """
+    suffix = Path(path).suffix.lower()
+
+    if suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+
+    if suffix in (".zst", ".zstd"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Leitura de .zst requer o pacote zstandard: pip install zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+
+    return open(path, "r", encoding="utf-8")
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lê um JSONL linha a linha, ignorando linhas vazias.
+
+    Raises:
+        ValueError: Linha com JSON inválido (a mensagem informa o número da linha)
+    """
+    with open_text(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}, linha {line_number}: JSON inválido ({e})")
+
+
+def count_examples(path: str) -> int:
+    """Número de exemplos de um JSONL, contando as linhas não vazias (sem parsear o JSON)."""
+    with open_text(path) as f:
+        return sum(1 for line in f if line.strip())
+
+
+def count_in_background(path: str, on_count: Callable[[int], None], limit: Optional[int] = None) -> threading.Thread:
+    """
+    Conta os exemplos do JSONL numa thread daemon e chama on_count(total).
+
+    O streaming não espera pela contagem: até ela terminar o progresso mostra
+    só a posição. Se o arquivo não puder ser lido, on_count não é chamado (o
+    erro aparece na leitura do próprio dataset).
+    """
+    def count():
+        try:
+            total = count_examples(path)
+        except (OSError, ImportError, UnicodeDecodeError):
+            return
+        on_count(min(total, limit) if limit is not None else total)
+
+    thread = threading.Thread(target=count, name="count-examples", daemon=True)
+    thread.start()
+    return thread
+
+
+def example_metadata(example: Any) -> Dict[str, Any]:
+    """Metadata de um exemplo do JSONL (dict) ou do LangSmith (Example)."""
+    if isinstance(example, dict):
+        metadata = example.get("metadata")
+    else:
+        metadata = getattr(example, "metadata", None)
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def parse_filters(values: Optional[List[str]]) -> Optional[Predicate]:
+    """
+    Converte filtros da CLI ("chave=valor1,valor2") em um predicado sobre o metadata.
+
+    Chaves diferentes precisam bater todas (E); valores separados por vírgula,
+    ou a mesma chave repetida, bastam um (OU). A comparação ignora maiúsculas.
+
+    Raises:
+        ValueError: Filtro fora do formato chave=valor
+    """
+    if not values:
+        return None
+
+    accepted: Dict[str, set] = {}
+    for value in values:
+        key, sep, raw = value.partition("=")
+        if not sep or not key.strip() or not raw.strip():
+            raise ValueError(f"Filtro inválido '{value}'. Use chave=valor, ex: complexity=medium")
+        accepted.setdefault(key.strip(), set()).update(v.strip().lower() for v in raw.split(",") if v.strip())
+
+    def predicate(metadata: Dict[str, Any]) -> bool:
+        return all(str(metadata.get(key, "")).lower() in options for key, options in accepted.items())
+
+    return predicate
+
+
+def filter_examples(examples: Iterable[Any], where: Optional[Predicate] = None) -> Iterator[Any]:
+    """Mantém só os exemplos cujo metadata satisfaz o predicado (sem materializar a lista)."""
+    for example in examples:
+        if where is None or where(example_metadata(example)):
+            yield example
+
+
+def read_dataset(path: str, where: Optional[Predicate] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Itera os exemplos de um dataset JSONL (opcionalmente compactado e filtrado).
+
+    Args:
+        path: Caminho do .jsonl, .jsonl.gz ou .jsonl.zst
+        where: Predicado sobre o metadata do exemplo (ex: parse_filters([...]))
+    """
+    return filter_examples(iter_jsonl(path), where)
@@ -0,0 +1,190 @@
+"""
+Sincronização incremental do dataset JSONL com o LangSmith.
+
+Cada linha do JSONL é identificada pelo hash dos inputs (o mesmo example_key
+do journal) e tem um hash do conteúdo completo (inputs, outputs e metadata),
+gravado no metadata do exemplo remoto como `content_hash`. A sincronização
+compara os dois lados e só envia a diferença:
+
+- linhas novas: criadas com `create_examples` em lotes;
+- linhas alteradas (outputs/metadata mudaram): `update_examples` em lotes;
+- exemplos remotos que não estão mais no arquivo: removidos.
+
+Sem alterações no arquivo, a sincronização custa apenas a listagem dos
+exemplos remotos. O tamanho dos lotes vem de EVAL_SYNC_CHUNK (default: 100).
+
+Para um arquivo vazio (ou todo filtrado) não apagar o dataset remoto, o plano
+nunca é aplicado sem linhas locais, e remover mais da metade dos exemplos
+remotos exige allow_mass_delete (--allow-mass-delete no evaluate.py).
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cache import make_cache_key
+from journal import example_key
+
+HASH_FIELD = "content_hash"
+
+# Fração dos exemplos remotos que uma sincronização pode remover sem allow_mass_delete
+MAX_DELETE_FRACTION = 0.5
+
+
+def content_hash(example: Dict[str, Any]) -> str:
+    """Hash do conteúdo de uma linha do JSONL (inputs, outputs e metadata)."""
+    metadata = {k: v for k, v in (example.get("metadata") or {}).items() if k != HASH_FIELD}
+    return make_cache_key("dataset-row", example.get("inputs"), example.get("outputs"), metadata)[:16]
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def get_sync_chunk_size(value: Optional[int] = None) -> int:
+    """Tamanho dos lotes de create/update: argumento, EVAL_SYNC_CHUNK ou 100."""
+    size = value if value is not None else int(os.getenv("EVAL_SYNC_CHUNK", "100"))
+    return max(1, size)
+
+
+def plan_sync(local: Iterable[Dict[str, Any]], remote: Iterable[Any]) -> Dict[str, Any]:
+    """
+    Compara as linhas locais com os exemplos remotos.
+
+    Args:
+        local: Linhas do JSONL ({"inputs", "outputs", "metadata"})
+        remote: Exemplos do LangSmith (com .id, .inputs e .metadata)
+
+    Returns:
+        Dict com "create" (linhas), "update" ((id, linha)), "delete" (ids) e
+        "unchanged" (quantidade de exemplos já iguais)
+    """
+    rows: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    duplicates = 0
+    for example in local:
+        key = example_key(example["inputs"])
+        if key in rows:
+            duplicates += 1
+            continue
+        rows[key] = (content_hash(example), example)
+
+    if duplicates:
+        print(f"   ⚠️  {duplicates} linha(s) com inputs repetidos ignorada(s)")
+
+    plan: Dict[str, Any] = {"create": [], "update": [], "delete": [], "unchanged": 0}
+    seen = set()
+    for example in remote:
+        key = example_key(example.inputs)
+        if key not in rows or key in seen:
+            # Removido do arquivo ou duplicado no LangSmith
+            plan["delete"].append(example.id)
+            continue
+        seen.add(key)
+
+        digest, row = rows[key]
+        if (example.metadata or {}).get(HASH_FIELD) == digest:
+            plan["unchanged"] += 1
+        else:
+            plan["update"].append((example.id, row))
+
+    plan["create"] = [row for key, (_, row) in rows.items() if key not in seen]
+    return plan
+
+
+def check_sync_plan(plan: Dict[str, Any], allow_mass_delete: bool = False) -> None:
+    """
+    Recusa planos que apagariam o dataset remoto por engano.
+
+    Raises:
+        ValueError: sem nenhuma linha local, ou removendo mais de
+            MAX_DELETE_FRACTION dos exemplos remotos sem allow_mass_delete
+    """
+    local = len(plan["create"]) + len(plan["update"]) + plan["unchanged"]
+    remote = len(plan["update"]) + len(plan["delete"]) + plan["unchanged"]
+    deleted = len(plan["delete"])
+
+    if local == 0:
+        raise ValueError("nenhuma linha local (arquivo vazio ou todo filtrado); sincronização abortada")
+    if deleted > remote * MAX_DELETE_FRACTION and not allow_mass_delete:
+        raise ValueError(
+            f"a sincronização removeria {deleted} de {remote} exemplos remotos; "
+            "confira o arquivo ou use --allow-mass-delete"
+        )
+
+
+def _with_hash(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {**(row.get("metadata") or {}), HASH_FIELD: content_hash(row)}
+
+
+def apply_sync(client: Any, dataset_id: Any, plan: Dict[str, Any], chunk_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Envia o plano ao LangSmith: criações e atualizações em lotes, remoções uma a uma.
+
+    Returns:
+        Contagem de exemplos criados, atualizados, removidos e inalterados
+    """
+    size = get_sync_chunk_size(chunk_size)
+
+    for chunk in _chunks(plan["create"], size):
+        client.create_examples(
+            inputs=[row["inputs"] for row in chunk],
+            outputs=[row.get("outputs") for row in chunk],
+            metadata=[_with_hash(row) for row in chunk],
+            dataset_id=dataset_id,
+        )
+
+    for chunk in _chunks(plan["update"], size):
+        client.update_examples(
+            example_ids=[example_id for example_id, _ in chunk],
+            inputs=[row["inputs"] for _, row in chunk],
+            outputs=[row.get("outputs") for _, row in chunk],
+            metadata=[_with_hash(row) for _, row in chunk],
+        )
+
+    # A API não tem remoção em lote nesta versão do SDK
+    for example_id in plan["delete"]:
+        client.delete_example(example_id)
+
+    return {
+        "created": len(plan["create"]),
+        "updated": len(plan["update"]),
+        "deleted": len(plan["delete"]),
+        "unchanged": plan["unchanged"],
+    }
+
+
+def sync_dataset(
+    client: Any,
+    dataset_name: str,
+    examples: Iterable[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+    allow_mass_delete: bool = False
+) -> Dict[str, int]:
+    """
+    Cria o dataset se necessário e deixa os exemplos remotos iguais às linhas locais.
+
+    Args:
+        client: langsmith.Client (ou um cliente fake com a mesma interface)
+        dataset_name: Nome do dataset no LangSmith
+        examples: Linhas do JSONL (ex: read_dataset(path))
+        chunk_size: Tamanho dos lotes de create/update (default: EVAL_SYNC_CHUNK)
+        allow_mass_delete: Permite remover mais da metade dos exemplos remotos
+
+    Returns:
+        Contagem de exemplos criados, atualizados, removidos e inalterados
+
+    Raises:
+        ValueError: plano recusado por check_sync_plan (nada é enviado)
+    """
+    dataset = None
+    remote = []
+    if client.has_dataset(dataset_name=dataset_name):
+        dataset = client.read_dataset(dataset_name=dataset_name)
+        remote = client.list_examples(dataset_id=dataset.id)
+
+    plan = plan_sync(examples, remote)
+    check_sync_plan(plan, allow_mass_delete)
+
+    if dataset is None:
+        dataset = client.create_dataset(dataset_name=dataset_name)
+    return apply_sync(client, dataset.id, plan, chunk_size)
@@ -15,97 +15,98 @@ Suporta múltiplos providers de LLM:
 - Google Gemini (gemini-1.5-flash, gemini-1.5-pro)
 
 Configure o provider no arquivo .env através da variável LLM_PROVIDER.
+Com --prompts e --models, avalia a matriz prompt × modelo gerador e exibe
+uma tabela comparativa (ex: --models openai:gpt-4o-mini google:gemini-1.5-flash).
+
+Com --local, os passos 2, 3 e 6 não acessam o LangSmith: o prompt vem de
+prompts/<nome>.yml, os exemplos do JSONL, e a publicação vira um passo
+opcional em segundo plano no fim (--publish, ver publish.py).
 """
 
+from __future__ import annotations
+
 import os
 import sys
 import json
-from typing import List, Dict, Any
+import argparse
+import asyncio
+import random
+import itertools
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
+from types import SimpleNamespace
 from dotenv import load_dotenv
-from langsmith import Client
-from langchain import hub
-from langchain_core.prompts import ChatPromptTemplate
-from utils import check_env_vars, format_score, print_section_header, get_llm as get_configured_llm
-from metrics import evaluate_f1_score, evaluate_clarity, evaluate_precision
+from usage import get_usage_recorder, usage_scope
+from profiling import get_profiler, span, timed_iter
+from cache import get_judge_cache, get_generation_cache, format_cache_stats
+from generation import generate, agenerate, configure_generation_cache, llm_identity, prepare_generation, prompt_cache_hints, store_generation
+from journal import RunJournal, new_run_id, example_key, in_shard, parse_shard, shard_run_id, merge_journals
+from batch import get_batch_backend, make_request, run_batch, to_openai_messages
+from dataset import Predicate, count_in_background, filter_examples, parse_filters, read_dataset
+from dataset_sync import sync_dataset
+from publish import publish_run, start_background_publish
+from prompt_loader import load_prompt_template
+from sequential import SequentialTest, get_confidence, get_min_examples
+from utils import check_env_vars, format_score, print_section_header, bounded_map, abounded_map, parse_model_spec, get_llm as get_configured_llm
+from metrics import (
+    evaluate_metrics, aevaluate_metric, aevaluate_combined, get_judge_mode, JUDGE_MODES,
+    build_judge_calls, cached_judge_result, parse_judge_output, judged_from_results, judge_request_options
+)
+
+# LangSmith e LangChain só são importados no caminho que os usa (startup rápido no --local e no --help)
+if TYPE_CHECKING:
+    from langsmith import Client
+    from langchain_core.prompts import ChatPromptTemplate
 
 load_dotenv()
 
+DEFAULT_DATASET_PATH = "datasets/bug_to_user_story.jsonl"
+DEFAULT_PROMPTS = ["bug_to_user_story_v2"]
 
-def get_llm():
-    return get_configured_llm(temperature=0)
-
-
-def load_dataset_from_jsonl(jsonl_path: str) -> List[Dict[str, Any]]:
-    examples = []
-
-    try:
-        with open(jsonl_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                line = line.strip()
-                if line:  # Ignorar linhas vazias
-                    example = json.loads(line)
-                    examples.append(example)
-
-        return examples
-
-    except FileNotFoundError:
-        print(f"❌ Arquivo não encontrado: {jsonl_path}")
-        print("\nCertifique-se de que o arquivo datasets/bug_to_user_story.jsonl existe.")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"❌ Erro ao parsear JSONL: {e}")
-        return []
-    except Exception as e:
-        print(f"❌ Erro ao carregar dataset: {e}")
-        return []
+# Média geral mínima para aprovar um prompt
+PASS_THRESHOLD = 0.9
 
+# Métricas calculadas por exemplo (as demais são derivadas em _aggregate_scores)
+EVAL_METRICS = ["f1_score", "clarity", "precision"]
 
-def create_evaluation_dataset(client: Client, dataset_name: str, jsonl_path: str) -> str:
-    print(f"Criando dataset de avaliação: {dataset_name}...")
 
-    examples = load_dataset_from_jsonl(jsonl_path)
+def get_llm(model: Optional[str] = None):
+    """LLM gerador; `model` no formato `provider:modelo` (default: LLM_PROVIDER/LLM_MODEL)."""
+    provider, model_name = parse_model_spec(model)
+    return get_configured_llm(model=model_name, temperature=0, provider=provider)
 
-    if not examples:
-        print("❌ Nenhum exemplo carregado do arquivo .jsonl")
-        return dataset_name
 
-    print(f"   ✓ Carregados {len(examples)} exemplos do arquivo {jsonl_path}")
+def create_evaluation_dataset(client: Client, dataset_name: str, jsonl_path: str, allow_mass_delete: bool = False) -> str:
+    print(f"Sincronizando dataset de avaliação: {dataset_name}...")
 
     try:
-        datasets = client.list_datasets(dataset_name=dataset_name)
-        existing_dataset = None
+        # Só o que mudou no JSONL é enviado (ver dataset_sync.py). Um arquivo
+        # vazio ou uma remoção em massa sem --allow-mass-delete não altera o remoto.
+        counts = sync_dataset(client, dataset_name, read_dataset(jsonl_path), allow_mass_delete=allow_mass_delete)
 
-        for ds in datasets:
-            if ds.name == dataset_name:
-                existing_dataset = ds
-                break
+        total = counts["created"] + counts["updated"] + counts["unchanged"]
 
-        if existing_dataset:
-            print(f"   ✓ Dataset '{dataset_name}' já existe, usando existente")
-            return dataset_name
+        if counts["created"] or counts["updated"] or counts["deleted"]:
+            print(
+                f"   ✓ Dataset sincronizado com {jsonl_path}: {counts['created']} novos, "
+                f"{counts['updated']} alterados, {counts['deleted']} removidos, {counts['unchanged']} inalterados"
+            )
         else:
-            dataset = client.create_dataset(dataset_name=dataset_name)
-
-            for example in examples:
-                client.create_example(
-                    dataset_id=dataset.id,
-                    inputs=example["inputs"],
-                    outputs=example["outputs"]
-                )
-
-            print(f"   ✓ Dataset criado com {len(examples)} exemplos")
-            return dataset_name
+            print(f"   ✓ Dataset '{dataset_name}' já está atualizado ({total} exemplos)")
+        return dataset_name
 
     except Exception as e:
-        print(f"   ⚠️  Erro ao criar dataset: {e}")
+        print(f"   ⚠️  Erro ao sincronizar dataset: {e}")
         return dataset_name
 
 
 def pull_prompt_from_langsmith(prompt_name: str) -> ChatPromptTemplate:
+    from langchain import hub
+
     try:
         print(f"   Puxando prompt do LangSmith Hub: {prompt_name}")
-        prompt = hub.pull(prompt_name)
+        with span("hub.pull"):
+            prompt = hub.pull(prompt_name)
         print(f"   ✓ Prompt carregado com sucesso")
         return prompt
 
@@ -140,26 +141,108 @@ def pull_prompt_from_langsmith(prompt_name: str) -> ChatPromptTemplate:
         raise
 
 
+def _load_yaml_prompt(prompt_path: Path, prompt_name: Optional[str] = None) -> ChatPromptTemplate:
+    print(f"   Carregando prompt local: {prompt_path}")
+
+    with span("prompt.load"):
+        prompt_template = load_prompt_template(str(prompt_path), prompt_name)
+    if prompt_template is None:
+        raise FileNotFoundError(f"Prompt local não encontrado ou inválido: {prompt_path}")
+    return prompt_template
+
+
+def load_local_prompt(prompt_name: str, prompts_dir: str = "prompts") -> ChatPromptTemplate:
+    """
+    Carrega o prompt de prompts/<prompt_name>.yml (modo --local, sem o Hub).
+
+    O template é montado como no push_prompts (prompt_loader, memoizado por
+    conteúdo), então a avaliação local usa exatamente o prompt que seria publicado.
+
+    Raises:
+        FileNotFoundError: Se o YAML não existir ou não puder ser lido
+    """
+    return _load_yaml_prompt(Path(prompts_dir) / f"{prompt_name}.yml", prompt_name)
+
+
+def _is_yaml_source(source: str) -> bool:
+    return source.endswith((".yml", ".yaml"))
+
+
+def _prompt_label(source: str) -> str:
+    """Nome do prompt de uma fonte (nome no Hub/em prompts/ ou caminho de um YAML)."""
+    return Path(source).stem if _is_yaml_source(source) else source
+
+
+def _load_prompt(source: str, client: Optional[Client]) -> ChatPromptTemplate:
+    """
+    Prompt do LangSmith Hub ou, no modo local (client=None), do YAML em prompts/.
+
+    Um caminho de YAML (ex: prompts/bug_to_user_story_v1.yml) é sempre lido do
+    arquivo (o primeiro prompt do YAML), com ou sem --local.
+    """
+    if _is_yaml_source(source):
+        return _load_yaml_prompt(Path(source))
+    if client is None:
+        return load_local_prompt(source)
+    return pull_prompt_from_langsmith(source)
+
+
+def _example_fields(example: Any) -> tuple:
+    """Extrai (inputs, reference, question) de um exemplo do dataset."""
+    inputs = example.inputs if hasattr(example, 'inputs') else {}
+    outputs = example.outputs if hasattr(example, 'outputs') else {}
+
+    reference = outputs.get("reference", "") if isinstance(outputs, dict) else ""
+
+    if isinstance(inputs, dict):
+        question = inputs.get("question", inputs.get("bug_report", inputs.get("pr_title", "N/A")))
+    else:
+        question = "N/A"
+
+    return inputs, reference, question
+
+
+def _example_error(e: Exception) -> Dict[str, Any]:
+    print(f"      ⚠️  Erro ao avaliar exemplo: {e}")
+    import traceback
+    print(f"      Traceback: {traceback.format_exc()}")
+    return {
+        "answer": "",
+        "reference": "",
+        "question": ""
+    }
+
+
 def evaluate_prompt_on_example(
     prompt_template: ChatPromptTemplate,
     example: Any,
     llm: Any
 ) -> Dict[str, Any]:
     try:
-        inputs = example.inputs if hasattr(example, 'inputs') else {}
-        outputs = example.outputs if hasattr(example, 'outputs') else {}
+        inputs, reference, question = _example_fields(example)
+
+        answer = generate(prompt_template, inputs, llm)
+
+        return {
+            "answer": answer,
+            "reference": reference,
+            "question": question
+        }
 
-        chain = prompt_template | llm
+    except Exception as e:
+        return _example_error(e)
 
-        response = chain.invoke(inputs)
-        answer = response.content
 
-        reference = outputs.get("reference", "") if isinstance(outputs, dict) else ""
+async def aevaluate_prompt_on_example(
+    prompt_template: ChatPromptTemplate,
+    example: Any,
+    llm: Any
+) -> Dict[str, Any]:
+    """Versão assíncrona de evaluate_prompt_on_example (llm.ainvoke)."""
+    try:
+        inputs, reference, question = _example_fields(example)
 
-        if isinstance(inputs, dict):
-            question = inputs.get("question", inputs.get("bug_report", inputs.get("pr_title", "N/A")))
-        else:
-            question = "N/A"
+        answer = await agenerate(prompt_template, inputs, llm)
 
         return {
             "answer": answer,
@@ -168,75 +251,761 @@ def evaluate_prompt_on_example(
         }
 
     except Exception as e:
-        print(f"      ⚠️  Erro ao avaliar exemplo: {e}")
-        import traceback
-        print(f"      Traceback: {traceback.format_exc()}")
-        return {
-            "answer": "",
-            "reference": "",
-            "question": ""
+        return _example_error(e)
+
+
+def get_concurrency(value: Optional[int] = None) -> int:
+    """
+    Resolve o número de exemplos avaliados em paralelo.
+
+    Prioridade: argumento explícito (--concurrency) > EVAL_CONCURRENCY > 1.
+    """
+    if value is None:
+        try:
+            value = int(os.getenv("EVAL_CONCURRENCY", "1"))
+        except ValueError:
+            value = 1
+    return max(1, value)
+
+
+def _example_record(result: Dict[str, Any], judged: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Resultado completo de um exemplo (o que vai para o journal)."""
+    return {
+        "question": result["question"],
+        "answer": result["answer"],
+        "reference": result["reference"],
+        "metrics": judged,
+        # Veredicto com erro (juiz falhou mesmo após o reparo) fica None e não entra nas médias
+        "scores": {
+            metric: None if judged[metric].get("error") else judged[metric]["score"]
+            for metric in EVAL_METRICS
         }
+    }
+
+
+def _score_example(
+    prompt_template: ChatPromptTemplate,
+    example: Any,
+    llm: Any,
+    judge_mode: str = "per-metric"
+) -> Optional[Dict[str, Any]]:
+    """
+    Gera a resposta de um exemplo e executa os juízes de EVAL_METRICS.
+
+    Returns:
+        Registro do exemplo (resposta, métricas com reasoning e scores)
+        ou None se a geração falhou
+    """
+    result = evaluate_prompt_on_example(prompt_template, example, llm)
+
+    if not result["answer"]:
+        return None
+
+    judged = evaluate_metrics(
+        result["question"], result["answer"], result["reference"],
+        EVAL_METRICS, mode=judge_mode
+    )
+
+    return _example_record(result, judged)
+
+
+async def _ascore_example(
+    prompt_template: ChatPromptTemplate,
+    example: Any,
+    llm: Any,
+    semaphore: asyncio.Semaphore,
+    judge_mode: str = "per-metric"
+) -> Optional[Dict[str, Any]]:
+    """
+    Versão assíncrona de _score_example.
+
+    Os juízes rodam em paralelo (asyncio.gather); o semáforo limita
+    quantas requisições ao LLM ficam em voo ao mesmo tempo no processo todo.
+    """
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    result = await limited(aevaluate_prompt_on_example(prompt_template, example, llm))
+
+    if not result["answer"]:
+        return None
+
+    judge_args = (result["question"], result["answer"], result["reference"])
+
+    if judge_mode == "combined":
+        judged = await limited(aevaluate_combined(*judge_args, EVAL_METRICS))
+    else:
+        metric_results = await asyncio.gather(*[
+            limited(aevaluate_metric(metric, *judge_args)) for metric in EVAL_METRICS
+        ])
+        judged = dict(zip(EVAL_METRICS, metric_results))
+
+    return _example_record(result, judged)
+
+
+def _empty_scores() -> Dict[str, float]:
+    return {
+        "helpfulness": 0.0,
+        "correctness": 0.0,
+        "f1_score": 0.0,
+        "clarity": 0.0,
+        "precision": 0.0
+    }
+
+
+def _aggregate_scores(results: List[Dict[str, float]]) -> Dict[str, float]:
+    """Calcula as 5 métricas finais a partir dos scores por exemplo (None = veredicto com erro, ignorado)."""
+    f1_scores = [r["f1_score"] for r in results if r.get("f1_score") is not None]
+    clarity_scores = [r["clarity"] for r in results if r.get("clarity") is not None]
+    precision_scores = [r["precision"] for r in results if r.get("precision") is not None]
+
+    avg_f1 = sum(f1_scores) / len(f1_scores) if f1_scores else 0.0
+    avg_clarity = sum(clarity_scores) / len(clarity_scores) if clarity_scores else 0.0
+    avg_precision = sum(precision_scores) / len(precision_scores) if precision_scores else 0.0
+
+    avg_helpfulness = (avg_clarity + avg_precision) / 2
+    avg_correctness = (avg_f1 + avg_precision) / 2
+
+    return {
+        "helpfulness": round(avg_helpfulness, 4),
+        "correctness": round(avg_correctness, 4),
+        "f1_score": round(avg_f1, 4),
+        "clarity": round(avg_clarity, 4),
+        "precision": round(avg_precision, 4)
+    }
+
+
+def _format_example_score(score: Optional[float]) -> str:
+    return "erro" if score is None else f"{score:.2f}"
+
+
+def _print_example_scores(
+    i: int,
+    scores: Dict[str, Optional[float]],
+    resumed: bool = False,
+    label: Optional[str] = None,
+    total: Optional[int] = None
+):
+    suffix = " (journal)" if resumed else ""
+    prefix = f"[{label}]" if label else ""
+    position = f"{i}/{total}" if total else str(i)
+    print(
+        f"      {prefix}[{position}] F1:{_format_example_score(scores['f1_score'])} Clarity:{_format_example_score(scores['clarity'])} "
+        f"Precision:{_format_example_score(scores['precision'])}{suffix}"
+    )
+
+
+def _example_inputs(example: Any) -> Any:
+    return example.inputs if hasattr(example, 'inputs') else {}
+
+
+def _local_examples(jsonl_path: str) -> Iterator[Any]:
+    """Linhas do JSONL com os mesmos atributos de um Example do LangSmith."""
+    for row in read_dataset(jsonl_path):
+        yield SimpleNamespace(inputs=row.get("inputs", {}), outputs=row.get("outputs", {}), metadata=row.get("metadata"))
+
+
+def _list_examples(client: Optional[Client], dataset_name: str, where: Optional[Predicate] = None) -> Iterator[Any]:
+    """
+    Exemplos do dataset, lidos sob demanda e filtrados pelo metadata.
+
+    Com client, vêm do LangSmith (paginados); no modo local (client=None),
+    `dataset_name` é o caminho do JSONL.
+    """
+    source = client.list_examples(dataset_name=dataset_name) if client is not None else _local_examples(dataset_name)
+    return filter_examples(timed_iter("dataset.read", source), where)
+
+
+def _select_examples(
+    examples: Iterable[Any],
+    limit: Optional[int] = None,
+    shard: Optional[Tuple[int, int]] = None
+) -> Iterator[Tuple[int, str, Any]]:
+    """
+    Exemplos avaliados nesta execução, como (posição, example_key, exemplo).
+
+    Por padrão o dataset inteiro; `limit` mantém só os primeiros N e `shard`
+    (i, N) mantém só os exemplos cujo hash cai no shard i. É um gerador: o
+    dataset é lido à medida que a avaliação consome os exemplos.
+    """
+    if limit is not None:
+        examples = itertools.islice(examples, limit)
+
+    position = 0
+    for example in examples:
+        key = example_key(_example_inputs(example))
+        if in_shard(key, shard):
+            position += 1
+            yield position, key, example
+
+
+def _count_total(
+    cells: List[Dict[str, Any]],
+    client: Optional[Client],
+    dataset_name: str,
+    limit: Optional[int],
+    shard: Optional[Tuple[int, int]],
+    where: Optional[Predicate]
+):
+    """
+    Preenche o total das células (progresso [i/N]) quando ele sai barato.
+
+    No modo local as linhas do JSONL são contadas numa thread, sem segurar o
+    streaming (até lá o progresso mostra [i]); no LangSmith vale o --limit.
+    Com --shard ou --where o total só se conhece lendo o dataset.
+    """
+    def set_total(total: Optional[int]):
+        for cell in cells:
+            cell["total"] = total
+
+    if shard or where:
+        return
+    if client is None:
+        count_in_background(dataset_name, set_total, limit)
+    else:
+        set_total(limit)
+
+
+def _journal_scores(journal: RunJournal, prompt_name: str, keys: List[str]) -> List[Dict[str, float]]:
+    """Scores dos exemplos selecionados, lidos do journal (fonte das médias)."""
+    completed = journal.completed(prompt_name)
+    return [completed[key]["scores"] for key in keys if key in completed]
+
+
+def _finish_prompt(
+    prompt_name: str,
+    keys: List[str],
+    scored: List[Dict[str, float]],
+    resumed_count: int,
+    journal: Optional[RunJournal],
+    shard: Optional[Tuple[int, int]]
+) -> Dict[str, float]:
+    """Resumo da leitura do dataset, registro do plano no journal e agregação."""
+    print(f"   Dataset: {len(keys)} exemplos" + (f" ({resumed_count} retomados do journal)" if resumed_count else ""))
+
+    if journal is not None:
+        journal.record_plan(prompt_name, keys, shard)
+        scored = _journal_scores(journal, prompt_name, keys)
+
+    errors = sum(1 for scores in scored for value in scores.values() if value is None)
+    if errors:
+        print(f"   ⚠️  {errors} veredicto(s) com erro do juiz excluído(s) das médias")
+
+    return _aggregate_scores(scored)
+
+
+def _cell_label(prompt_name: str, model: Optional[str] = None) -> str:
+    """Nome da combinação no journal e nos relatórios: `prompt` ou `prompt@modelo`."""
+    return f"{prompt_name}@{model}" if model else prompt_name
+
+
+def _matrix_plan(prompt_sources: List[str], models: List[Optional[str]]) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Combinações (rótulo, fonte do prompt, modelo) da matriz, na ordem prompt × modelo.
+
+    Com um único modelo o rótulo é só o nome do prompt, como numa avaliação simples.
+    """
+    prompt_sources = list(dict.fromkeys(prompt_sources))
+    models = list(dict.fromkeys(models)) or [None]
+    multi_model = len(models) > 1
+    return [
+        (_cell_label(_prompt_label(source), model if multi_model else None), source, model)
+        for source in prompt_sources
+        for model in models
+    ]
+
+
+def adaptive_options(
+    confidence: Optional[float] = None,
+    min_examples: Optional[int] = None,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Configuração do modo adaptativo (--adaptive), com os defaults do .env.
+
+    Sem `seed`, sorteia uma (exibida no início, para reproduzir a ordem).
+    """
+    return {
+        "confidence": get_confidence(confidence),
+        "min_examples": get_min_examples(min_examples),
+        "seed": seed if seed is not None else random.randrange(2 ** 32),
+    }
+
+
+def _overall_score(scores: Dict[str, Optional[float]]) -> Optional[float]:
+    """Média geral de um exemplo (mesma fórmula do resumo), ou None se algum veredicto deu erro."""
+    if any(scores.get(metric) is None for metric in EVAL_METRICS):
+        return None
+    aggregated = _aggregate_scores([scores])
+    return sum(aggregated.values()) / len(aggregated)
+
+
+def _prepare_cells(
+    plan: List[Tuple[str, str, Optional[str]]],
+    client: Optional[Client],
+    journal: Optional[RunJournal],
+    shard: Optional[Tuple[int, int]],
+    adaptive: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Carrega cada prompt e cada modelo uma vez e monta o estado de cada combinação."""
+    templates = {}
+    llms = {}
+    cells = []
+
+    for label, source, model in plan:
+        if source not in templates:
+            templates[source] = _load_prompt(source, client)
+        if model not in llms:
+            llms[model] = get_llm(model)
+        cells.append({
+            "label": label,
+            "template": templates[source],
+            "llm": llms[model],
+            "completed": journal.completed(label) if journal else {},
+            "keys": [],
+            "scored": [],
+            "resumed": 0,
+            "test": SequentialTest(PASS_THRESHOLD, adaptive["confidence"], adaptive["min_examples"]) if adaptive else None,
+            "stopped": False,
+            "late": set(),
+            "total": None,
+        })
+
+    if shard:
+        print(f"   Shard {shard[0]}/{shard[1]}")
+    if adaptive:
+        print(
+            f"   Modo adaptativo: ordem aleatória (seed {adaptive['seed']}), para quando o veredicto "
+            f"estiver decidido com {adaptive['confidence']:.0%} de confiança (mínimo {adaptive['min_examples']} exemplos)"
+        )
+
+    completed = sum(len(cell["completed"]) for cell in cells)
+    if completed:
+        print(f"   Retomando: {completed} exemplos já concluídos no journal")
+
+    return cells
+
+
+def _matrix_items(
+    cells: List[Dict[str, Any]],
+    client: Optional[Client],
+    dataset_name: str,
+    limit: Optional[int],
+    shard: Optional[Tuple[int, int]],
+    where: Optional[Predicate],
+    adaptive: Optional[Dict[str, Any]] = None
+) -> Iterator[Tuple[Dict[str, Any], int, str, Any]]:
+    """
+    Células (combinação, posição, example_key, exemplo) da matriz.
+
+    O dataset é lido uma vez, sob demanda; cada exemplo lido gera uma célula
+    por combinação. No modo adaptativo os exemplos são embaralhados (o que
+    exige ler a seleção inteira) e as combinações com veredicto decidido
+    deixam de receber exemplos; quando todas decidem, a leitura para.
+    """
+    selected: Iterable[Tuple[int, str, Any]] = _select_examples(_list_examples(client, dataset_name, where), limit, shard)
+    if adaptive:
+        selected = list(selected)
+        random.Random(adaptive["seed"]).shuffle(selected)
+        for cell in cells:
+            cell["total"] = len(selected)
+    else:
+        _count_total(cells, client, dataset_name, limit, shard, where)
+
+    for position, key, example in selected:
+        active = [cell for cell in cells if not cell["stopped"]]
+        if not active:
+            break
+        for cell in active:
+            cell["keys"].append(key)
+            yield cell, position, key, example
+
+
+def _collect_cell(cell: Dict[str, Any], position: int, key: str, record: Optional[Dict[str, Any]], resumed: bool, show_label: bool):
+    test = cell["test"]
+    if test is not None and cell["stopped"]:
+        # Exemplos que já estavam em voo quando o veredicto saiu ficam no journal,
+        # mas fora das médias: o resumo cobre exatamente o que o teste consumiu
+        cell["late"].add(key)
+        return
+    if record is None:
+        return
+    cell["resumed"] += resumed
+    cell["scored"].append(record["scores"])
+    _print_example_scores(position, record["scores"], resumed, cell["label"] if show_label else None, cell["total"])
+
+    overall = _overall_score(record["scores"])
+    if test is None or cell["stopped"] or overall is None:
+        return
+    if test.update(overall, {metric: record["scores"][metric] for metric in EVAL_METRICS}):
+        cell["stopped"] = True
+        prefix = f"[{cell['label']}] " if show_label else ""
+        print(f"      ⏹  {prefix}Veredicto decidido após {test.n} exemplos: {test.decision.upper()} ({test.format_interval()})")
+
+
+def _print_sequential_summary(cell: Dict[str, Any]):
+    test = cell["test"]
+    if test.decision is None:
+        print(f"   Adaptativo: sem veredicto estatístico após {test.n} exemplos ({test.format_interval()})")
+    else:
+        print(f"   Adaptativo: {test.decision} após {test.decided_at} de {cell['total']} exemplos ({test.format_interval()})")
+    intervals = []
+    for metric, sequence in test.metrics.items():
+        low, high = sequence.interval()
+        intervals.append(f"{metric} [{low:.2f}, {high:.2f}]")
+    if intervals:
+        print(f"   IC {test.confidence:.0%} por métrica: {', '.join(intervals)}")
+
+
+def _finish_cells(
+    cells: List[Dict[str, Any]],
+    journal: Optional[RunJournal],
+    shard: Optional[Tuple[int, int]],
+    show_label: bool
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for cell in cells:
+        if show_label:
+            print(f"   {cell['label']}:")
+        keys = [key for key in cell["keys"] if key not in cell["late"]]
+        results[cell["label"]] = _finish_prompt(cell["label"], keys, cell["scored"], cell["resumed"], journal, shard)
+        if cell["late"]:
+            print(f"   {len(cell['late'])} exemplo(s) em voo após o veredicto fora das médias")
+        if cell["test"] is not None:
+            _print_sequential_summary(cell)
+    return results
+
+
+def evaluate_matrix(
+    prompt_sources: List[str],
+    models: List[Optional[str]],
+    dataset_name: str,
+    client: Optional[Client],
+    concurrency: int = 1,
+    judge_mode: str = "per-metric",
+    journal: Optional[RunJournal] = None,
+    limit: Optional[int] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    where: Optional[Predicate] = None,
+    adaptive: Optional[Dict[str, Any]] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Avalia todas as combinações prompt × modelo gerador no dataset.
+
+    Cada célula (prompt × modelo × exemplo) é uma tarefa do mesmo pool de
+    `concurrency` workers: o dataset é lido uma vez, os prompts e modelos são
+    carregados uma vez, e uma combinação lenta não deixa as outras esperando.
+
+    Args:
+        prompt_sources: Nomes no LangSmith Hub (ou em prompts/ com --local) ou caminhos de YAML
+        models: Modelos geradores (`provider:modelo`); None usa LLM_PROVIDER/LLM_MODEL
+        adaptive: Configuração do modo adaptativo (adaptive_options); cada
+            combinação para assim que o veredicto estiver decidido (sequential.py)
+
+    Returns:
+        Dict rótulo da combinação (`prompt` ou `prompt@modelo`) -> scores agregados
+    """
+    plan = _matrix_plan(prompt_sources, models)
+
+    try:
+        cells = _prepare_cells(plan, client, journal, shard, adaptive)
+        show_label = len(cells) > 1
+
+        if concurrency > 1:
+            print(f"   Avaliando exemplos ({concurrency} em paralelo)...")
+        else:
+            print("   Avaliando exemplos...")
+
+        def run(item: Tuple[Dict[str, Any], int, str, Any]) -> tuple:
+            cell, position, key, example = item
+            if key in cell["completed"]:
+                return cell, position, key, cell["completed"][key], True
+
+            with usage_scope(example=key, cell=cell["label"]), span("example", cell=cell["label"]):
+                record = _score_example(cell["template"], example, cell["llm"], judge_mode)
+            if record is not None and journal is not None:
+                journal.record_example(cell["label"], key, position, record)
+            return cell, position, key, record, False
+
+        # bounded_map lê o dataset sob demanda e devolve os resultados na ordem
+        # dos exemplos, então os logs e as médias são idênticos aos da execução
+        # sequencial. Cada exemplo vai para o journal assim que termina.
+        for cell, position, key, record, resumed in bounded_map(run, _matrix_items(cells, client, dataset_name, limit, shard, where, adaptive), concurrency):
+            _collect_cell(cell, position, key, record, resumed, show_label)
+
+        return _finish_cells(cells, journal, shard, show_label)
+
+    except Exception as e:
+        print(f"   ❌ Erro na avaliação: {e}")
+        return {label: _empty_scores() for label, _, _ in plan}
+
+
+async def aevaluate_matrix(
+    prompt_sources: List[str],
+    models: List[Optional[str]],
+    dataset_name: str,
+    client: Optional[Client],
+    concurrency: int = 1,
+    judge_mode: str = "per-metric",
+    journal: Optional[RunJournal] = None,
+    limit: Optional[int] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    where: Optional[Predicate] = None,
+    adaptive: Optional[Dict[str, Any]] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Versão assíncrona de evaluate_matrix.
+
+    As células são disparadas à medida que o dataset é lido; `concurrency` é
+    o número máximo de chamadas ao LLM (geração + juízes) em voo simultaneamente,
+    somando todas as combinações.
+    """
+    plan = _matrix_plan(prompt_sources, models)
+
+    try:
+        cells = _prepare_cells(plan, client, journal, shard, adaptive)
+        show_label = len(cells) > 1
+
+        print(f"   Avaliando exemplos (até {concurrency} requisições em voo)...")
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(item: Tuple[Dict[str, Any], int, str, Any]) -> tuple:
+            cell, position, key, example = item
+            if key in cell["completed"]:
+                return cell, position, key, cell["completed"][key], True
+
+            with usage_scope(example=key, cell=cell["label"]), span("example", cell=cell["label"]):
+                record = await _ascore_example(cell["template"], example, cell["llm"], semaphore, judge_mode)
+            if record is not None and journal is not None:
+                journal.record_example(cell["label"], key, position, record)
+            return cell, position, key, record, False
+
+        items = _matrix_items(cells, client, dataset_name, limit, shard, where, adaptive)
+        async for cell, position, key, record, resumed in abounded_map(run, items, concurrency * 2):
+            _collect_cell(cell, position, key, record, resumed, show_label)
+
+        return _finish_cells(cells, journal, shard, show_label)
+
+    except Exception as e:
+        print(f"   ❌ Erro na avaliação: {e}")
+        return {label: _empty_scores() for label, _, _ in plan}
 
 
 def evaluate_prompt(
     prompt_name: str,
     dataset_name: str,
-    client: Client
+    client: Optional[Client],
+    concurrency: int = 1,
+    judge_mode: str = "per-metric",
+    journal: Optional[RunJournal] = None,
+    limit: Optional[int] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    where: Optional[Predicate] = None,
+    model: Optional[str] = None,
+    adaptive: Optional[Dict[str, Any]] = None
 ) -> Dict[str, float]:
+    """Avalia um prompt com um modelo gerador (matriz de uma combinação)."""
     print(f"\n🔍 Avaliando: {prompt_name}")
+    results = evaluate_matrix([prompt_name], [model], dataset_name, client, concurrency, judge_mode, journal, limit, shard, where, adaptive)
+    return next(iter(results.values()))
 
-    try:
-        prompt_template = pull_prompt_from_langsmith(prompt_name)
 
-        examples = list(client.list_examples(dataset_name=dataset_name))
-        print(f"   Dataset: {len(examples)} exemplos")
+async def aevaluate_prompt(
+    prompt_name: str,
+    dataset_name: str,
+    client: Optional[Client],
+    concurrency: int = 1,
+    judge_mode: str = "per-metric",
+    journal: Optional[RunJournal] = None,
+    limit: Optional[int] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    where: Optional[Predicate] = None,
+    model: Optional[str] = None,
+    adaptive: Optional[Dict[str, Any]] = None
+) -> Dict[str, float]:
+    """Versão assíncrona de evaluate_prompt."""
+    print(f"\n🔍 Avaliando (async): {prompt_name}")
+    results = await aevaluate_matrix([prompt_name], [model], dataset_name, client, concurrency, judge_mode, journal, limit, shard, where, adaptive)
+    return next(iter(results.values()))
 
-        llm = get_llm()
 
-        f1_scores = []
-        clarity_scores = []
-        precision_scores = []
+def _batch_generate(
+    prompt_template: ChatPromptTemplate,
+    pending: List[Tuple[int, Any]],
+    llm: Any,
+    backend: Any,
+    poll_interval: float
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Fase 1 do modo batch: gera as respostas dos exemplos pendentes em um único job.
+
+    Respostas já presentes no cache de geração não são reenviadas.
+
+    Returns:
+        Dict posição do exemplo -> {"question", "answer", "reference"} (só os gerados com sucesso)
+    """
+    model, temperature = llm_identity(llm)
+    generated = {}
+    requests = []
+    cache_keys = {}
+
+    for index, example in pending:
+        inputs, reference, question = _example_fields(example)
+        key, messages, cached = prepare_generation(prompt_template, inputs, llm)
+        generated[index] = {"question": question, "answer": cached or "", "reference": reference}
+        if cached is None:
+            cache_keys[index] = key
+            requests.append(make_request(
+                f"gen-{index}", model, to_openai_messages(messages), temperature or 0.0,
+                **prompt_cache_hints(llm, messages)
+            ))
+
+    outputs = run_batch(backend, requests, "geração", poll_interval)
+
+    for index, key in cache_keys.items():
+        answer = outputs.get(f"gen-{index}")
+        if not answer:
+            print(f"      ⚠️  Geração do exemplo {index} falhou no batch")
+            continue
+        store_generation(key, answer)
+        generated[index]["answer"] = answer
+
+    return {index: result for index, result in generated.items() if result["answer"]}
+
+
+def _call_metrics(call_id: str) -> Tuple[List[str], bool]:
+    """(métricas, juiz combinado?) de uma chamada de build_judge_calls."""
+    if call_id == "combined":
+        return EVAL_METRICS, True
+    return [call_id], False
+
+
+def _batch_judge(
+    generated: Dict[int, Dict[str, Any]],
+    judge_mode: str,
+    backend: Any,
+    poll_interval: float
+) -> Dict[int, Dict[str, Dict[str, Any]]]:
+    """
+    Fase 2 do modo batch: envia todas as chamadas dos juízes em um único job.
+
+    Veredictos já presentes no cache de juízes não são reenviados.
+
+    Returns:
+        Dict posição do exemplo -> métricas (mesmo formato de evaluate_metrics)
+    """
+    eval_model = os.getenv("EVAL_MODEL", "gpt-4o")
+    calls = {}
+    results = {}
+    requests = []
+
+    for index, result in generated.items():
+        calls[index] = build_judge_calls(
+            result["question"], result["answer"], result["reference"],
+            EVAL_METRICS, mode=judge_mode
+        )
+        results[index] = {}
+        for call_id, evaluator_prompt in calls[index].items():
+            cached = cached_judge_result(evaluator_prompt)
+            if cached is not None:
+                results[index][call_id] = cached
+            else:
+                messages = [{"role": "user", "content": evaluator_prompt}]
+                requests.append(make_request(
+                    f"judge-{index}-{call_id}", eval_model, messages,
+                    **judge_request_options(*_call_metrics(call_id))
+                ))
+
+    outputs = run_batch(backend, requests, "juízes", poll_interval)
+
+    judged = {}
+    for index, example_calls in calls.items():
+        for call_id, evaluator_prompt in example_calls.items():
+            if call_id in results[index]:
+                continue
+            content = outputs.get(f"judge-{index}-{call_id}")
+            if content is None:
+                results[index][call_id] = RuntimeError("requisição falhou no batch")
+                continue
+            try:
+                results[index][call_id] = parse_judge_output(evaluator_prompt, content, *_call_metrics(call_id))
+            except Exception as e:
+                results[index][call_id] = e
+
+        judged[index] = judged_from_results(EVAL_METRICS, judge_mode, results[index])
+
+    return judged
+
+
+def evaluate_prompt_batch(
+    prompt_name: str,
+    dataset_name: str,
+    client: Optional[Client],
+    backend: Any,
+    judge_mode: str = "per-metric",
+    journal: Optional[RunJournal] = None,
+    poll_interval: float = 30.0,
+    limit: Optional[int] = None,
+    shard: Optional[Tuple[int, int]] = None,
+    where: Optional[Predicate] = None,
+    model: Optional[str] = None,
+    label: Optional[str] = None
+) -> Dict[str, float]:
+    """
+    Versão offline de evaluate_prompt usando a Batch API do provider.
 
-        print("   Avaliando exemplos...")
+    Todas as gerações são enviadas em um job; quando ele termina, todas as
+    chamadas dos juízes vão em um segundo job. O resultado passa pela mesma
+    agregação (e journal) dos outros modos. `label` é o nome da combinação
+    no journal (default: o nome do prompt).
+    """
+    label = label or _prompt_label(prompt_name)
+    print(f"\n🔍 Avaliando (batch): {label}")
 
-        for i, example in enumerate(examples[:10], 1):
-            result = evaluate_prompt_on_example(prompt_template, example, llm)
+    try:
+        prompt_template = _load_prompt(prompt_name, client)
 
-            if result["answer"]:
-                f1 = evaluate_f1_score(result["question"], result["answer"], result["reference"])
-                clarity = evaluate_clarity(result["question"], result["answer"], result["reference"])
-                precision = evaluate_precision(result["question"], result["answer"], result["reference"])
+        llm = get_llm(model)
 
-                f1_scores.append(f1["score"])
-                clarity_scores.append(clarity["score"])
-                precision_scores.append(precision["score"])
+        if shard:
+            print(f"   Shard {shard[0]}/{shard[1]}")
 
-                print(f"      [{i}/{min(10, len(examples))}] F1:{f1['score']:.2f} Clarity:{clarity['score']:.2f} Precision:{precision['score']:.2f}")
+        completed = journal.completed(label) if journal else {}
+        if completed:
+            print(f"   Retomando: {len(completed)} exemplos já concluídos no journal")
 
-        avg_f1 = sum(f1_scores) / len(f1_scores) if f1_scores else 0.0
-        avg_clarity = sum(clarity_scores) / len(clarity_scores) if clarity_scores else 0.0
-        avg_precision = sum(precision_scores) / len(precision_scores) if precision_scores else 0.0
+        # O job precisa de todas as requisições, então aqui o dataset é lido por inteiro
+        items = list(_select_examples(_list_examples(client, dataset_name, where), limit, shard))
+        keys = [key for _, key, _ in items]
+        pending = [(position, example) for position, key, example in items if key not in completed]
 
-        avg_helpfulness = (avg_clarity + avg_precision) / 2
-        avg_correctness = (avg_f1 + avg_precision) / 2
+        generated = _batch_generate(prompt_template, pending, llm, backend, poll_interval)
+        judged = _batch_judge(generated, judge_mode, backend, poll_interval)
 
-        return {
-            "helpfulness": round(avg_helpfulness, 4),
-            "correctness": round(avg_correctness, 4),
-            "f1_score": round(avg_f1, 4),
-            "clarity": round(avg_clarity, 4),
-            "precision": round(avg_precision, 4)
-        }
+        scored = []
+        resumed_count = 0
+        for position, key, _ in items:
+            resumed = key in completed
+            if resumed:
+                record = completed[key]
+            elif position in judged:
+                record = _example_record(generated[position], judged[position])
+                if journal is not None:
+                    journal.record_example(label, key, position, record)
+            else:
+                continue
+
+            resumed_count += resumed
+            scored.append(record["scores"])
+            _print_example_scores(position, record["scores"], resumed, total=len(items))
+
+        return _finish_prompt(label, keys, scored, resumed_count, journal, shard)
 
     except Exception as e:
         print(f"   ❌ Erro na avaliação: {e}")
-        return {
-            "helpfulness": 0.0,
-            "correctness": 0.0,
-            "f1_score": 0.0,
-            "clarity": 0.0,
-            "precision": 0.0
-        }
+        return _empty_scores()
 
 
 def display_results(prompt_name: str, scores: Dict[str, float]) -> bool:
@@ -270,83 +1039,499 @@ def display_results(prompt_name: str, scores: Dict[str, float]) -> bool:
     return passed
 
 
-def main():
+MATRIX_COLUMNS = [
+    ("helpfulness", "Help"),
+    ("correctness", "Corr"),
+    ("f1_score", "F1"),
+    ("clarity", "Clar"),
+    ("precision", "Prec"),
+]
+
+
+def display_matrix(results: Dict[str, Dict[str, float]]) -> bool:
+    """
+    Tabela comparativa das combinações prompt × modelo (uma linha por combinação).
+
+    Returns:
+        True se todas as combinações atingiram média >= 0.9
+    """
+    width = max([len("Combinação")] + [len(label) for label in results])
+    header = f"{'Combinação':<{width}}" + "".join(f" {title:>6}" for _, title in MATRIX_COLUMNS) + f" {'Média':>6}  Status"
+
+    print("\n" + "=" * len(header))
+    print("COMPARAÇÃO: PROMPT × MODELO")
+    print("=" * len(header))
+    print(header)
+    print("-" * len(header))
+
+    averages = {label: sum(scores.values()) / len(scores) for label, scores in results.items()}
+    # Só destaca quando há uma única melhor combinação
+    top = max(averages.values(), default=None)
+    leaders = [label for label, average in averages.items() if average == top]
+    best = leaders[0] if len(leaders) == 1 else None
+
+    for label, scores in results.items():
+        status = "✅" if averages[label] >= PASS_THRESHOLD else "❌"
+        marker = "  ← melhor" if label == best and len(results) > 1 else ""
+        print(
+            f"{label:<{width}}" + "".join(f" {scores[metric]:>6.2f}" for metric, _ in MATRIX_COLUMNS)
+            + f" {averages[label]:>6.4f}  {status}{marker}"
+        )
+
+    print("-" * len(header))
+    return all(average >= PASS_THRESHOLD for average in averages.values())
+
+
+def merge_runs(run_id: str) -> int:
+    """
+    Junta os journals dos shards de uma execução (--merge) e exibe o relatório consolidado.
+
+    As médias são recalculadas a partir dos scores por exemplo de todos os
+    shards. Shards ausentes reprovam o relatório; o resumo também é gravado em
+    runs/<run_id>.report.json.
+    """
+    print_section_header(f"RELATÓRIO CONSOLIDADO: {run_id}")
+
+    runs_dir = Path(os.getenv("EVAL_RUNS_DIR", "runs"))
+    merged = merge_journals(run_id, str(runs_dir))
+    if not merged:
+        print(f"❌ Nenhum journal encontrado para {run_id} em {runs_dir}/")
+        return 1
+
+    all_passed = True
+    report = {"run_id": run_id, "prompts": {}}
+
+    for prompt_name, entry in merged.items():
+        examples = entry["examples"]
+        shard_count = entry["shard_count"]
+        print(f"\n🔍 {prompt_name}: {len(examples)} exemplos de {len(entry['shards']) or 1} journal(s)")
+
+        missing_shards = []
+        if shard_count:
+            found = {int(shard.split("/")[0]) for shard in entry["shards"]}
+            missing_shards = [f"{i}/{shard_count}" for i in range(1, shard_count + 1) if i not in found]
+            if missing_shards:
+                print(f"   ⚠️  Shards ausentes ou interrompidos: {', '.join(missing_shards)}")
+
+        missing_examples = len(entry["expected"] - set(examples))
+        if missing_examples:
+            print(f"   ⚠️  {missing_examples} exemplos planejados sem resultado (execução interrompida ou geração falhou)")
+
+        scores = _aggregate_scores([record["scores"] for record in examples.values()])
+        passed = display_results(prompt_name, scores)
+        if missing_shards:
+            print("⚠️  Relatório incompleto: faltam shards, resultado considerado REPROVADO")
+            passed = False
+        all_passed = all_passed and passed
+
+        report["prompts"][prompt_name] = {
+            "scores": scores,
+            "passed": passed,
+            "examples": len(examples),
+            "missing_examples": missing_examples,
+            "shards": sorted(entry["shards"]),
+            "missing_shards": missing_shards,
+        }
+
+    report_path = runs_dir / f"{run_id}.report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nRelatório: {report_path}")
+
+    return 0 if all_passed else 1
+
+
+def _shard_arg(value: str) -> Tuple[int, int]:
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Avalia prompts otimizados contra o dataset")
+    parser.add_argument(
+        "--prompts",
+        nargs="+",
+        default=None,
+        metavar="PROMPT",
+        help="Prompts avaliados: nomes no LangSmith Hub (em prompts/ com --local) ou caminhos de YAML "
+             f"(default: {' '.join(DEFAULT_PROMPTS)})"
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=None,
+        metavar="PROVIDER:MODELO",
+        help="Modelos geradores (ex: openai:gpt-4o-mini google:gemini-1.5-flash). Com mais de um prompt "
+             "ou modelo, avalia a matriz completa e exibe uma tabela comparativa (default: LLM_PROVIDER/LLM_MODEL)"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=None,
+        help="Exemplos avaliados em paralelo (default: EVAL_CONCURRENCY ou 1)"
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Usa o motor assíncrono (ainvoke); --concurrency limita as requisições em voo"
+    )
+    parser.add_argument(
+        "--judge-mode",
+        choices=JUDGE_MODES,
+        default=None,
+        help="per-metric: uma chamada por métrica; combined: todas as métricas em uma chamada "
+             "(default: EVAL_JUDGE_MODE ou per-metric)"
+    )
+    parser.add_argument(
+        "--no-judge-cache",
+        action="store_true",
+        help="Ignora o cache local de veredictos dos juízes (JUDGE_CACHE_PATH)"
+    )
+    parser.add_argument(
+        "--no-gen-cache",
+        action="store_true",
+        help="Não lê nem grava o cache de respostas geradas (GENERATION_CACHE_PATH)"
+    )
+    parser.add_argument(
+        "--refresh-gen-cache",
+        action="store_true",
+        help="Gera todas as respostas de novo e sobrescreve o cache de geração"
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        default=None,
+        help="Retoma uma execução interrompida: pula exemplos já gravados em runs/<RUN_ID>.jsonl"
+    )
+    parser.add_argument(
+        "--batch",
+        choices=["openai", "file"],
+        default=None,
+        help="Modo offline: gerações e juízes enviados como jobs da Batch API "
+             "(openai) ou do substituto local em arquivos (file)"
+    )
+    parser.add_argument(
+        "--batch-dir",
+        default=None,
+        help="Diretório do backend --batch file (default: EVAL_BATCH_DIR ou .cache/batches)"
+    )
+    parser.add_argument(
+        "--batch-poll",
+        type=float,
+        default=30.0,
+        help="Intervalo em segundos entre consultas de status do batch (default: 30)"
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Avalia em ordem aleatória e para assim que o veredicto (média >= 0.9) estiver "
+             "estatisticamente decidido (ver sequential.py)"
+    )
+    parser.add_argument(
+        "--confidence",
+        type=float,
+        default=None,
+        help="Confiança do modo --adaptive (default: EVAL_SEQ_CONFIDENCE ou 0.95)"
+    )
+    parser.add_argument(
+        "--min-examples",
+        type=int,
+        default=None,
+        help="Exemplos mínimos antes de o --adaptive decidir (default: EVAL_SEQ_MIN_EXAMPLES ou 5)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Semente da ordem aleatória do --adaptive (default: sorteada e exibida)"
+    )
+    parser.add_argument(
+        "--limit", "-n",
+        type=int,
+        default=None,
+        help="Avalia só os primeiros N exemplos do dataset (default: todos)"
+    )
+    parser.add_argument(
+        "--shard",
+        type=_shard_arg,
+        default=None,
+        metavar="I/N",
+        help="Avalia só o shard I de N (divisão determinística pelo hash do exemplo). Requer --run-id"
+    )
+    parser.add_argument(
+        "--run-id",
+        default=None,
+        help="Run ID desta execução (compartilhado entre os shards). Default: gerado automaticamente"
+    )
+    parser.add_argument(
+        "--merge",
+        metavar="RUN_ID",
+        default=None,
+        help="Não avalia: junta os journals dos shards de RUN_ID em um relatório consolidado"
+    )
+    parser.add_argument(
+        "--filter",
+        dest="filters",
+        action="append",
+        default=None,
+        metavar="CHAVE=VALOR",
+        help="Avalia só exemplos cujo metadata bate (ex: complexity=medium, domain=saas,crm). Pode repetir"
+    )
+    parser.add_argument(
+        "--allow-mass-delete",
+        action="store_true",
+        help="Permite que a sincronização remova mais da metade dos exemplos do dataset no LangSmith"
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="ARQUIVO",
+        default=None,
+        help="Exporta os spans da execução no formato Chrome Trace (abre em chrome://tracing ou ui.perfetto.dev)"
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Não acessa o LangSmith: prompt lido de prompts/<nome>.yml e exemplos direto do JSONL"
+    )
+    parser.add_argument(
+        "--dataset",
+        default=DEFAULT_DATASET_PATH,
+        help=f"Dataset JSONL (.jsonl, .jsonl.gz ou .jsonl.zst). Default: {DEFAULT_DATASET_PATH}"
+    )
+    parser.add_argument(
+        "--publish",
+        action="store_true",
+        help="Ao terminar, publica os resultados no LangSmith em segundo plano (útil com --local)"
+    )
+    parser.add_argument(
+        "--publish-run",
+        metavar="RUN_ID",
+        default=None,
+        help="Não avalia: publica no LangSmith os resultados gravados em runs/<RUN_ID>.jsonl"
+    )
+    return parser.parse_args(argv)
+
+
+def _langsmith_client() -> Client:
+    from langsmith import Client
+
+    return Client()
+
+
+def _dataset_name() -> str:
+    project_name = os.getenv("LANGCHAIN_PROJECT", "prompt-optimization-challenge-resolved")
+    return f"{project_name}-eval"
+
+
+def publish_existing_run(run_id: str, jsonl_path: str) -> int:
+    """--publish-run: envia ao LangSmith uma execução já concluída (ex: feita com --local)."""
+    print_section_header(f"PUBLICANDO NO LANGSMITH: {run_id}")
+
+    if not check_env_vars(["LANGSMITH_API_KEY"]):
+        return 1
+
+    try:
+        publish_run(_langsmith_client(), run_id, _dataset_name(), jsonl_path)
+    except Exception as e:
+        print(f"❌ Falha ao publicar {run_id}: {e}")
+        return 1
+
+    print("✅ Publicação concluída")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    if args.merge:
+        return merge_runs(args.merge)
+    if args.publish_run:
+        return publish_existing_run(args.publish_run, args.dataset)
+
+    concurrency = get_concurrency(args.concurrency)
+    judge_mode = get_judge_mode(args.judge_mode)
+    try:
+        where = parse_filters(args.filters)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    if args.no_judge_cache:
+        get_judge_cache().enabled = False
+    configure_generation_cache(disabled=args.no_gen_cache, refresh=args.refresh_gen_cache)
+
+    adaptive = None
+    if args.adaptive:
+        if args.batch:
+            print("❌ --adaptive não combina com --batch (o job precisa de todos os exemplos de uma vez)")
+            return 1
+        try:
+            adaptive = adaptive_options(args.confidence, args.min_examples, args.seed)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+
+    run_id = args.resume or args.run_id
+    if args.shard and not run_id:
+        print("❌ --shard requer --run-id (o mesmo em todos os shards, para o --merge juntar os journals)")
+        return 1
+
+    journal = RunJournal(shard_run_id(run_id or new_run_id(), args.shard))
+    if args.resume and not journal.exists():
+        print(f"❌ Journal não encontrado para --resume {args.resume}: {journal.path}")
+        return 1
+
     print_section_header("AVALIAÇÃO DE PROMPTS OTIMIZADOS")
 
     provider = os.getenv("LLM_PROVIDER", "openai")
     llm_model = os.getenv("LLM_MODEL", "gpt-4o-mini")
     eval_model = os.getenv("EVAL_MODEL", "gpt-4o")
 
-    print(f"Provider: {provider}")
-    print(f"Modelo Principal: {llm_model}")
-    print(f"Modelo de Avaliação: {eval_model}\n")
+    prompt_sources = args.prompts or DEFAULT_PROMPTS
+    models = args.models or [None]
+    plan = _matrix_plan(prompt_sources, models)
+    is_matrix = len(plan) > 1
+    generator_providers = {(parse_model_spec(model)[0] or provider).lower() for model in models}
 
-    required_vars = ["LANGSMITH_API_KEY", "LLM_PROVIDER"]
-    if provider == "openai":
-        required_vars.append("OPENAI_API_KEY")
-    elif provider in ["google", "gemini"]:
-        required_vars.append("GOOGLE_API_KEY")
+    print(f"Provider: {provider}")
+    if args.models:
+        print(f"Modelos Geradores: {', '.join(dict.fromkeys(args.models))}")
+    else:
+        print(f"Modelo Principal: {llm_model}")
+    print(f"Modelo de Avaliação: {eval_model}")
+    if args.prompts:
+        print(f"Prompts: {', '.join(dict.fromkeys(args.prompts))}")
+    if is_matrix:
+        print(f"Matriz: {len(plan)} combinações prompt × modelo")
+    if args.batch:
+        print(f"Modo: batch ({args.batch})")
+    else:
+        print(f"Concorrência: {concurrency}{' (async)' if args.use_async else ''}")
+    print(f"Modo dos juízes: {judge_mode}")
+    if args.shard:
+        print(f"Shard: {args.shard[0]}/{args.shard[1]}")
+    print(f"Exemplos: {'primeiros ' + str(args.limit) if args.limit is not None else 'dataset completo'}")
+    if adaptive:
+        print(f"Parada antecipada: confiança {adaptive['confidence']:.0%}, mínimo {adaptive['min_examples']} exemplos, seed {adaptive['seed']}")
+    if args.filters:
+        print(f"Filtros de metadata: {', '.join(args.filters)}")
+    if args.local:
+        print(f"Fonte: local (prompts/ + {args.dataset}){' + publicação em segundo plano' if args.publish else ''}")
+    print(f"Run ID: {journal.run_id} (journal: {journal.path})\n")
+
+    required_vars = ["LLM_PROVIDER"]
+    if not args.local or args.publish:
+        required_vars.insert(0, "LANGSMITH_API_KEY")
+    # Chaves do provider dos juízes e de cada modelo gerador
+    for name in [provider.lower()] + sorted(generator_providers):
+        if name == "openai" and "OPENAI_API_KEY" not in required_vars:
+            required_vars.append("OPENAI_API_KEY")
+        elif name in ["google", "gemini"] and "GOOGLE_API_KEY" not in required_vars:
+            required_vars.append("GOOGLE_API_KEY")
 
     if not check_env_vars(required_vars):
         return 1
 
-    client = Client()
+    batch_backend = None
+    if args.batch:
+        if args.batch == "openai" and (provider != "openai" or generator_providers != {"openai"}):
+            print(f"❌ --batch openai requer LLM_PROVIDER=openai e modelos geradores da OpenAI")
+            return 1
+        batch_backend = get_batch_backend(args.batch, args.batch_dir)
+
     project_name = os.getenv("LANGCHAIN_PROJECT", "prompt-optimization-challenge-resolved")
 
-    jsonl_path = "datasets/bug_to_user_story.jsonl"
+    jsonl_path = args.dataset
 
     if not Path(jsonl_path).exists():
         print(f"❌ Arquivo de dataset não encontrado: {jsonl_path}")
         print("\nCertifique-se de que o arquivo existe antes de continuar.")
         return 1
 
-    dataset_name = f"{project_name}-eval"
-    create_evaluation_dataset(client, dataset_name, jsonl_path)
-
     print("\n" + "=" * 70)
     print("PROMPTS PARA AVALIAR")
     print("=" * 70)
-    print("\nEste script irá puxar prompts do LangSmith Hub.")
-    print("Certifique-se de ter feito push dos prompts antes de avaliar:")
-    print("  python src/push_prompts.py\n")
 
-    prompts_to_evaluate = [
-        "bug_to_user_story_v2",
-    ]
+    if args.local:
+        # Sem round-trips ao LangSmith: o JSONL é lido direto e o prompt vem do YAML
+        client = None
+        dataset_name = jsonl_path
+        print("\nModo local: prompts lidos de prompts/<nome>.yml (sem LangSmith Hub).\n")
+    else:
+        client = _langsmith_client()
+        dataset_name = _dataset_name()
+        with span("dataset.sync"):
+            create_evaluation_dataset(client, dataset_name, jsonl_path, allow_mass_delete=args.allow_mass_delete)
 
-    all_passed = True
-    evaluated_count = 0
-    results_summary = []
+        print("\nEste script irá puxar prompts do LangSmith Hub.")
+        print("Certifique-se de ter feito push dos prompts antes de avaliar:")
+        print("  python src/push_prompts.py\n")
 
-    for prompt_name in prompts_to_evaluate:
-        evaluated_count += 1
+    options = dict(judge_mode=judge_mode, journal=journal, limit=args.limit, shard=args.shard, where=where)
 
-        try:
-            scores = evaluate_prompt(prompt_name, dataset_name, client)
+    try:
+        if batch_backend is not None:
+            # Cada combinação é um par de jobs (geração e juízes) da Batch API
+            results = {}
+            for label, source, model in plan:
+                with span("prompt.evaluate", prompt=label):
+                    results[label] = evaluate_prompt_batch(
+                        source, dataset_name, client, batch_backend,
+                        poll_interval=args.batch_poll, model=model, label=label, **options
+                    )
+        elif is_matrix:
+            print(f"\n🔍 Avaliando matriz: {len(dict.fromkeys(prompt_sources))} prompt(s) × {len(dict.fromkeys(models))} modelo(s)")
+            with span("matrix.evaluate", cells=len(plan)):
+                if args.use_async:
+                    results = asyncio.run(aevaluate_matrix(prompt_sources, models, dataset_name, client, concurrency=concurrency, adaptive=adaptive, **options))
+                else:
+                    results = evaluate_matrix(prompt_sources, models, dataset_name, client, concurrency=concurrency, adaptive=adaptive, **options)
+        else:
+            label, source, model = plan[0]
+            with span("prompt.evaluate", prompt=label):
+                if args.use_async:
+                    scores = asyncio.run(aevaluate_prompt(source, dataset_name, client, concurrency=concurrency, model=model, adaptive=adaptive, **options))
+                else:
+                    scores = evaluate_prompt(source, dataset_name, client, concurrency=concurrency, model=model, adaptive=adaptive, **options)
+            results = {label: scores}
+
+    except KeyboardInterrupt:
+        print(f"\n⚠️  Avaliação interrompida. Exemplos concluídos estão em {journal.path}")
+        extra_flags = f" --shard {args.shard[0]}/{args.shard[1]}" if args.shard else ""
+        if args.prompts:
+            extra_flags += " --prompts " + " ".join(args.prompts)
+        if args.models:
+            extra_flags += " --models " + " ".join(args.models)
+        if adaptive:
+            extra_flags += f" --adaptive --seed {adaptive['seed']}"
+        print(f"   Para continuar de onde parou: python src/evaluate.py --resume {run_id or journal.run_id}{extra_flags}")
+        return 130
 
-            passed = display_results(prompt_name, scores)
-            all_passed = all_passed and passed
+    except Exception as e:
+        print(f"\n❌ Falha na avaliação: {e}")
+        results = {label: _empty_scores() for label, _, _ in plan}
+
+    evaluated_count = len(results)
+    results_summary = []
 
+    if is_matrix:
+        all_passed = display_matrix(results)
+        for label, scores in results.items():
             results_summary.append({
-                "prompt": prompt_name,
+                "prompt": label,
                 "scores": scores,
-                "passed": passed
+                "passed": sum(scores.values()) / len(scores) >= PASS_THRESHOLD
             })
-
-        except Exception as e:
-            print(f"\n❌ Falha ao avaliar '{prompt_name}': {e}")
-            all_passed = False
-
+    else:
+        all_passed = True
+        for label, scores in results.items():
+            passed = display_results(label, scores)
+            all_passed = all_passed and passed
             results_summary.append({
-                "prompt": prompt_name,
-                "scores": {
-                    "helpfulness": 0.0,
-                    "correctness": 0.0,
-                    "f1_score": 0.0,
-                    "clarity": 0.0,
-                    "precision": 0.0
-                },
-                "passed": False
+                "prompt": label,
+                "scores": scores,
+                "passed": passed
             })
 
     print("\n" + "=" * 50)
@@ -357,9 +1542,41 @@ def main():
         print("⚠️  Nenhum prompt foi avaliado")
         return 1
 
-    print(f"Prompts avaliados: {evaluated_count}")
+    print(f"{'Combinações avaliadas' if is_matrix else 'Prompts avaliados'}: {evaluated_count}")
     print(f"Aprovados: {sum(1 for r in results_summary if r['passed'])}")
-    print(f"Reprovados: {sum(1 for r in results_summary if not r['passed'])}\n")
+    print(f"Reprovados: {sum(1 for r in results_summary if not r['passed'])}")
+    print(f"Journal: {journal.path}")
+    print(format_cache_stats('Cache de geração', get_generation_cache()))
+    print(format_cache_stats('Cache de juízes', get_judge_cache()))
+    from rate_limit import format_rate_limit_stats
+    for line in format_rate_limit_stats():
+        print(f"LLM {line}")
+
+    usage = get_usage_recorder()
+    usage_lines = usage.format_table()
+    if usage_lines:
+        usage_path = journal.path.with_suffix(".usage.json")
+        usage.write_json(usage_path)
+        print("\nUso de tokens e custo:")
+        for line in usage_lines:
+            print(f"  {line}")
+        print(f"  (detalhes por exemplo: {usage_path})")
+
+    profiler = get_profiler()
+    stage_lines = profiler.format_table()
+    if stage_lines:
+        print("\nLatência por etapa:")
+        for line in stage_lines:
+            print(f"  {line}")
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+        print(f"  (trace: {args.trace})")
+
+    if args.publish:
+        log_path = start_background_publish(journal.run_id, jsonl_path)
+        print(f"\n📤 Publicando no LangSmith em segundo plano (log: {log_path})")
+        print(f"   Para publicar de novo: python src/evaluate.py --publish-run {journal.run_id}")
+    print()
 
     if all_passed:
         print("✅ Todos os prompts atingiram média >= 0.9!")
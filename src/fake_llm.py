@@ -0,0 +1,334 @@
+"""
+Providers offline de LLM para benchmarks e CI sem rede.
+
+- fake:   respostas sintéticas e determinísticas (mesma requisição, mesma
+          resposta), com latência e tokens configuráveis. Não usa cassete.
+- replay: serve as respostas gravadas em um cassete (JSONL), com a latência
+          e os tokens da gravação.
+
+Com LLM_PROVIDER=fake (ou replay) todo o pipeline (evaluate.py, metrics.py,
+run_recall_test.py) roda sem API keys e sem rede, passando pelo mesmo rate
+limiter, caches, journal e contabilidade de uso. Os dois emulam a API da
+OpenAI: aceitam `response_format` (o JSON Schema dos juízes vira um objeto
+sintético válido; é por ele que uma chamada é reconhecida como juiz) e `prompt_cache_key` (o fake simula o cache de prefixo do
+provider, em blocos de 128 tokens a partir de 1024).
+
+A gravação é opt-in: com LLM_RECORD=on, as chamadas reais (openai/google)
+são gravadas no cassete e podem ser reproduzidas depois com replay.
+
+Configuração via .env:
+- LLM_CASSETTE: caminho do cassete (default: .cache/llm_cassette.jsonl)
+- LLM_RECORD=on: grava as respostas reais no cassete
+- LLM_REPLAY_MISSING: error (default) ou fake, para requisições fora do cassete
+- LLM_REPLAY_LATENCY_SCALE: fator sobre a latência gravada (default: 1; 0 = instantâneo)
+- FAKE_LLM_LATENCY_MS / FAKE_LLM_LATENCY_SIGMA: mediana e sigma da latência
+  lognormal por chamada (default: 0 ms / 0.5)
+- FAKE_LLM_MS_PER_TOKEN: latência extra por token de saída (default: 0)
+- FAKE_LLM_OUTPUT_TOKENS: tamanho das respostas em texto (default: 150)
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict, Field
+
+from cache import make_cache_key
+
+# O cache de prefixo da OpenAI vale a partir de 1024 tokens, em blocos de 128
+_PREFIX_CACHE_MIN_TOKENS = 1024
+_PREFIX_CACHE_BLOCK = 128
+
+_STORY_WORDS = (
+    "Como usuário do sistema, eu quero que o problema relatado seja corrigido para que "
+    "eu consiga concluir minha tarefa sem erros. Critérios de aceitação: dado que o "
+    "fluxo é executado, quando a ação é concluída, então o resultado esperado aparece."
+).split()
+
+
+class ReplayMissError(LookupError):
+    """Requisição sem resposta gravada no cassete (provider replay)."""
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _message_pairs(messages: List[BaseMessage]) -> List[Tuple[str, Any]]:
+    return [(message.type, message.content) for message in messages]
+
+
+def _text(content: Any) -> str:
+    return content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+
+
+def request_key(model: str, messages: List[BaseMessage]) -> str:
+    """Chave do cassete: modelo + mensagens (tipo e conteúdo)."""
+    return make_cache_key("cassette", model, _message_pairs(messages))
+
+
+class Cassette:
+    """
+    Arquivo JSONL de respostas gravadas: uma linha por chamada.
+
+    Cada linha tem key, model, messages, content, usage e latency; se a mesma
+    requisição foi gravada mais de uma vez, vale a última.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._records: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._records is None:
+            records = {}
+            if self.path.exists():
+                with open(self.path, encoding="utf-8") as f:
+                    for line in f:
+                        line = line.strip()
+                        if line:
+                            record = json.loads(line)
+                            records[record["key"]] = record
+            self._records = records
+        return self._records
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._load().get(key)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def record(self, model: str, messages: List[BaseMessage], response: Any, latency: float):
+        """Grava a resposta de uma chamada real."""
+        usage = getattr(response, "usage_metadata", None) or {}
+        record = {
+            "key": request_key(model, messages),
+            "model": model,
+            "messages": _message_pairs(messages),
+            "content": response.content,
+            "usage": {
+                "input_tokens": usage.get("input_tokens") or 0,
+                "output_tokens": usage.get("output_tokens") or 0,
+                "cached_input_tokens": (usage.get("input_token_details") or {}).get("cache_read") or 0,
+            },
+            "latency": round(latency, 4),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._load()[record["key"]] = record
+
+
+_CASSETTES: Dict[str, Cassette] = {}
+_CASSETTES_LOCK = threading.Lock()
+
+
+def get_cassette(path: Optional[str] = None) -> Cassette:
+    """Cassete compartilhado do caminho (default: LLM_CASSETTE)."""
+    path = str(Path(path or os.getenv("LLM_CASSETTE", ".cache/llm_cassette.jsonl")).resolve())
+    with _CASSETTES_LOCK:
+        cassette = _CASSETTES.get(path)
+        if cassette is None:
+            cassette = _CASSETTES[path] = Cassette(path)
+        return cassette
+
+
+def recording_enabled() -> bool:
+    return os.getenv("LLM_RECORD", "off").lower() in ("on", "1", "true")
+
+
+def _synthetic_value(schema: Dict[str, Any], rng: random.Random) -> Any:
+    """Valor aleatório (determinístico pelo rng) que satisfaz o JSON Schema."""
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _synthetic_value(sub, rng) for name, sub in (schema.get("properties") or {}).items()}
+    if kind == "array":
+        return [_synthetic_value(schema.get("items") or {}, rng)]
+    if kind in ("number", "integer"):
+        low = schema.get("minimum", 0.0)
+        high = schema.get("maximum", 1.0)
+        # Scores sintéticos concentrados na parte de cima da escala
+        value = low + (high - low) * (0.7 + 0.3 * rng.random())
+        return int(value) if kind == "integer" else round(value, 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return "Resposta sintética do provider fake."
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model sintético: resposta, tokens e latência derivados do hash da requisição."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model_name: str = "fake"
+    temperature: float = 0.0
+    latency_ms: float = Field(default_factory=lambda: float(os.getenv("FAKE_LLM_LATENCY_MS", "0")))
+    latency_sigma: float = Field(default_factory=lambda: float(os.getenv("FAKE_LLM_LATENCY_SIGMA", "0.5")))
+    ms_per_token: float = Field(default_factory=lambda: float(os.getenv("FAKE_LLM_MS_PER_TOKEN", "0")))
+    output_tokens: int = Field(default_factory=lambda: int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "150")))
+    seen_prefixes: set = Field(default_factory=set, exclude=True)
+    prefix_lock: Any = Field(default_factory=threading.Lock, exclude=True)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name, "temperature": self.temperature}
+
+    def _synthesize(self, messages: List[BaseMessage], **kwargs: Any) -> Tuple[AIMessage, float]:
+        key = request_key(self.model_name, messages)
+        rng = random.Random(key)
+
+        response_format = kwargs.get("response_format") or {}
+        schema = (response_format.get("json_schema") or {}).get("schema")
+        prompt = "\n".join(_text(message.content) for message in messages)
+        if schema:
+            content = json.dumps(_synthetic_value(schema, rng), ensure_ascii=False)
+        elif response_format.get("type") == "json_object":
+            # Sem schema: objeto com os campos usuais dos juízes (score, precision/recall).
+            # O juiz se identifica pelo response_format, nunca pelo texto do prompt
+            content = json.dumps({
+                "score": round(0.7 + 0.3 * rng.random(), 2),
+                "precision": round(0.7 + 0.3 * rng.random(), 2),
+                "recall": round(0.7 + 0.3 * rng.random(), 2),
+                "reasoning": "Avaliação sintética do provider fake.",
+            })
+        else:
+            words = [_STORY_WORDS[(i + rng.randrange(len(_STORY_WORDS))) % len(_STORY_WORDS)] for i in range(max(1, self.output_tokens * 3 // 4))]
+            content = " ".join(words)
+
+        input_tokens = _estimate_tokens(prompt)
+        output_tokens = _estimate_tokens(content)
+        cached = self._cached_tokens(messages, kwargs.get("prompt_cache_key"))
+        message = AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": cached},
+        })
+
+        latency = 0.0
+        if self.latency_ms > 0:
+            latency = self.latency_ms * rng.lognormvariate(0.0, self.latency_sigma) / 1000
+        latency += self.ms_per_token * output_tokens / 1000
+        return message, latency
+
+    def _cached_tokens(self, messages: List[BaseMessage], prefix_key: Optional[str]) -> int:
+        """Simula o cache de prefixo: a partir da 2ª chamada com o mesmo prompt_cache_key."""
+        if not prefix_key:
+            return 0
+        prefix = "".join(_text(m.content) for m in messages if m.type == "system")
+        tokens = _estimate_tokens(prefix)
+        if tokens < _PREFIX_CACHE_MIN_TOKENS:
+            return 0
+        with self.prefix_lock:
+            if prefix_key not in self.seen_prefixes:
+                self.seen_prefixes.add(prefix_key)
+                return 0
+        return tokens - tokens % _PREFIX_CACHE_BLOCK
+
+    def _respond(self, messages: List[BaseMessage], **kwargs: Any) -> Tuple[AIMessage, float]:
+        return self._synthesize(messages, **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message, latency = self._respond(messages, **kwargs)
+        if latency > 0:
+            time.sleep(latency)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        message, latency = self._respond(messages, **kwargs)
+        if latency > 0:
+            await asyncio.sleep(latency)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+class ReplayChatModel(FakeChatModel):
+    """
+    Chat model que responde com as gravações do cassete.
+
+    Requisições fora do cassete levantam ReplayMissError, ou recebem uma
+    resposta sintética com LLM_REPLAY_MISSING=fake.
+    """
+
+    cassette: Any = Field(default_factory=get_cassette, exclude=True)
+    missing: str = Field(default_factory=lambda: os.getenv("LLM_REPLAY_MISSING", "error").lower())
+    latency_scale: float = Field(default_factory=lambda: float(os.getenv("LLM_REPLAY_LATENCY_SCALE", "1")))
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-chat"
+
+    def _respond(self, messages: List[BaseMessage], **kwargs: Any) -> Tuple[AIMessage, float]:
+        record = self.cassette.get(request_key(self.model_name, messages))
+        if record is None:
+            if self.missing == "fake":
+                return self._synthesize(messages, **kwargs)
+            raise ReplayMissError(
+                f"Requisição para {self.model_name} não encontrada no cassete {self.cassette.path} "
+                f"(grave com LLM_RECORD=on ou use LLM_REPLAY_MISSING=fake)"
+            )
+
+        usage = record.get("usage") or {}
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        message = AIMessage(content=record["content"], usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {"cache_read": usage.get("cached_input_tokens", 0)},
+        })
+        return message, record.get("latency", 0.0) * self.latency_scale
+
+
+class RecordingChatModel:
+    """
+    Envolve um chat model real e grava cada resposta no cassete (LLM_RECORD=on).
+
+    Atributos não definidos aqui (model_name, _llm_type, ...) vêm do modelo
+    envolvido, então o resto do pipeline não percebe a diferença.
+    """
+
+    def __init__(self, llm: Any, cassette: Cassette):
+        self.llm = llm
+        self.cassette = cassette
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def _model(self) -> str:
+        # O Gemini guarda o modelo como "models/<nome>"; o cassete usa o nome do LLM_MODEL
+        model = str(getattr(self.llm, "model_name", None) or getattr(self.llm, "model", None))
+        return model[len("models/"):] if model.startswith("models/") else model
+
+    def invoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
+        messages = self.llm._convert_input(input).to_messages()
+        start = time.perf_counter()
+        response = self.llm.invoke(input, config, **kwargs)
+        self.cassette.record(self._model(), messages, response, time.perf_counter() - start)
+        return response
+
+    async def ainvoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
+        messages = self.llm._convert_input(input).to_messages()
+        start = time.perf_counter()
+        response = await self.llm.ainvoke(input, config, **kwargs)
+        self.cassette.record(self._model(), messages, response, time.perf_counter() - start)
+        return response
@@ -0,0 +1,127 @@
+"""
+Geração de respostas pelo prompt avaliado, com cache local.
+
+A chave do cache combina as mensagens renderizadas do ChatPromptTemplate
+(system + user já com o bug report), o tipo do cliente (openai-chat,
+fake-chat, ...), o modelo, a temperatura e os inputs do exemplo. Se o YAML
+do prompt e o exemplo não mudaram, a resposta vem do cache em vez de uma
+nova chamada ao LLM.
+
+Nas chamadas à OpenAI é enviado prompt_cache_key (hash do prefixo estático,
+as mensagens de sistema), para que todas as requisições do mesmo prompt caiam
+no mesmo cache de prefixo do provider. OPENAI_PROMPT_CACHE_KEY=off desativa
+(ex: endpoints compatíveis que não aceitam o parâmetro).
+"""
+
+import os
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import get_generation_cache, make_cache_key
+from usage import usage_scope
+from profiling import span
+from utils import OPENAI_COMPATIBLE_TYPES, static_prefix
+
+
+def llm_identity(llm: Any) -> Tuple[str, Any]:
+    """(modelo, temperatura) do LLM, usados na chave do cache."""
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+    temperature = getattr(llm, "temperature", None)
+    return str(model), temperature
+
+
+def prompt_cache_hints(llm: Any, messages: List[Any]) -> Dict[str, Any]:
+    """
+    Parâmetros extras de cache de prefixo para a chamada ao provider.
+
+    OpenAI: prompt_cache_key derivado do prefixo estático. Gemini não recebe
+    parâmetro (o cache implícito usa o prefixo idêntico por conta própria).
+    """
+    if getattr(llm, "_llm_type", None) not in OPENAI_COMPATIBLE_TYPES:
+        return {}
+    if os.getenv("OPENAI_PROMPT_CACHE_KEY", "on").lower() in ("off", "0", "false"):
+        return {}
+
+    prefix = static_prefix(messages)
+    if not prefix:
+        return {}
+    return {"prompt_cache_key": _prefix_cache_key(tuple(prefix))}
+
+
+@lru_cache(maxsize=32)
+def _prefix_cache_key(prefix: Tuple[str, ...]) -> str:
+    # O prefixo é o mesmo objeto str em todos os exemplos (template compilado
+    # uma vez), então a consulta não re-hasheia o system prompt a cada chamada
+    return make_cache_key("prefix", list(prefix))[:32]
+
+
+def prepare_generation(prompt_template: Any, inputs: Dict[str, Any], llm: Any) -> Tuple[str, List[Any], Optional[str]]:
+    """
+    Renderiza as mensagens do exemplo e consulta o cache.
+
+    Returns:
+        (chave do cache, mensagens renderizadas, resposta em cache ou None)
+    """
+    messages = prompt_template.format_messages(**inputs)
+    rendered = [(message.type, message.content) for message in messages]
+    model, temperature = llm_identity(llm)
+    # O tipo do cliente separa os providers: respostas do fake/replay (mesmo
+    # model_name) nunca voltam como se fossem do modelo real
+    llm_type = getattr(llm, "_llm_type", None) or type(llm).__name__
+    key = make_cache_key("generation", llm_type, model, temperature, rendered, inputs)
+
+    cached = get_generation_cache().get(key)
+    return key, messages, cached["answer"] if cached is not None else None
+
+
+def store_generation(key: str, answer: str):
+    """Grava uma resposta gerada no cache (respostas vazias não são gravadas)."""
+    if answer:
+        get_generation_cache().set(key, {"answer": answer})
+
+
+def generate(prompt_template: Any, inputs: Dict[str, Any], llm: Any) -> str:
+    """
+    Executa prompt_template | llm para os inputs, reaproveitando o cache.
+
+    Args:
+        prompt_template: ChatPromptTemplate do prompt avaliado
+        inputs: Variáveis do exemplo (ex: {"bug_report": ...})
+        llm: Modelo gerador
+
+    Returns:
+        Texto da resposta gerada
+    """
+    key, messages, cached = prepare_generation(prompt_template, inputs, llm)
+    if cached is not None:
+        return cached
+
+    with usage_scope(site="geração"), span("generation"):
+        response = llm.invoke(messages, **prompt_cache_hints(llm, messages))
+    answer = response.content if hasattr(response, "content") else str(response)
+
+    store_generation(key, answer)
+    return answer
+
+
+async def agenerate(prompt_template: Any, inputs: Dict[str, Any], llm: Any) -> str:
+    """Versão assíncrona de generate (llm.ainvoke)."""
+    key, messages, cached = prepare_generation(prompt_template, inputs, llm)
+    if cached is not None:
+        return cached
+
+    with usage_scope(site="geração"), span("generation"):
+        response = await llm.ainvoke(messages, **prompt_cache_hints(llm, messages))
+    answer = response.content if hasattr(response, "content") else str(response)
+
+    store_generation(key, answer)
+    return answer
+
+
+def configure_generation_cache(disabled: bool = False, refresh: bool = False):
+    """Aplica as flags --no-gen-cache / --refresh-gen-cache."""
+    cache = get_generation_cache()
+    if disabled:
+        cache.enabled = False
+    if refresh:
+        cache.refresh = True
@@ -0,0 +1,187 @@
+"""
+Journal de execuções de avaliação (runs/<run_id>.jsonl).
+
+Cada exemplo concluído (resposta gerada, score e reasoning de cada métrica) é
+gravado em uma linha JSON assim que termina. Se a execução for interrompida,
+`--resume <run_id>` pula os exemplos já presentes no journal e as médias são
+recalculadas a partir dele.
+
+Com --shard i/N cada processo grava o próprio journal
+(runs/<run_id>.shard-<i>-of-<N>.jsonl); --merge <run_id> junta todos em um relatório.
+
+O diretório pode ser alterado com EVAL_RUNS_DIR (default: runs/).
+"""
+
+import os
+import json
+import uuid
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache import make_cache_key
+from profiling import span
+
+
+def new_run_id() -> str:
+    """Gera um identificador de execução ordenável (data/hora + sufixo aleatório)."""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def example_key(inputs: Any) -> str:
+    """
+    Identificador estável de um exemplo, baseado no conteúdo dos inputs.
+
+    Não depende da ordem do dataset nem do id no LangSmith, então o mesmo
+    exemplo é reconhecido entre execuções e entre fontes (JSONL local ou Hub).
+    """
+    return make_cache_key("example", inputs)[:16]
+
+
+class RunJournal:
+    """Arquivo JSONL append-only com os resultados por exemplo de uma execução."""
+
+    def __init__(self, run_id: str, runs_dir: Optional[str] = None):
+        self.run_id = run_id
+        self.path = Path(runs_dir or os.getenv("EVAL_RUNS_DIR", "runs")) / f"{run_id}.jsonl"
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def append(self, record: Dict[str, Any]):
+        """Grava um registro e força a escrita em disco antes de retornar."""
+        line = json.dumps(record, ensure_ascii=False)
+        with span("journal.write"), self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def records(self) -> List[Dict[str, Any]]:
+        """
+        Lê todos os registros do journal.
+
+        Uma última linha truncada (processo morto no meio da escrita) é ignorada.
+        """
+        if not self.path.exists():
+            return []
+
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    def completed(self, prompt: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Exemplos concluídos de um prompt: example_key -> registro.
+
+        Args:
+            prompt: Nome do prompt avaliado (um journal pode conter vários)
+        """
+        return {
+            record["example_key"]: record
+            for record in self.records()
+            if record.get("type") == "example" and record.get("prompt") == prompt
+        }
+
+    def record_plan(self, prompt: str, keys: List[str], shard: Optional[Tuple[int, int]] = None):
+        """Grava os exemplos que esta execução (ou shard) vai avaliar, para o --merge detectar lacunas."""
+        self.append({
+            "type": "plan",
+            "run_id": self.run_id,
+            "prompt": prompt,
+            "shard": f"{shard[0]}/{shard[1]}" if shard else None,
+            "example_keys": keys,
+        })
+
+    def record_example(self, prompt: str, key: str, index: int, result: Dict[str, Any]):
+        """Grava o resultado de um exemplo concluído."""
+        self.append({
+            "type": "example",
+            "run_id": self.run_id,
+            "prompt": prompt,
+            "example_key": key,
+            "index": index,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            **result,
+        })
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Interpreta "--shard i/N" (i de 1 a N).
+
+    Raises:
+        ValueError: Se o formato ou os números forem inválidos
+    """
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard inválido '{value}'. Use o formato i/N, ex: 2/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard inválido '{value}': i deve estar entre 1 e N")
+    return index, count
+
+
+def in_shard(key: str, shard: Optional[Tuple[int, int]]) -> bool:
+    """
+    Indica se o exemplo pertence ao shard (distribuição pelo hash do example_key).
+
+    A divisão é determinística: qualquer processo/máquina chega aos mesmos shards.
+    """
+    if shard is None:
+        return True
+    index, count = shard
+    return int(key, 16) % count == index - 1
+
+
+def shard_run_id(run_id: str, shard: Optional[Tuple[int, int]]) -> str:
+    """Run ID do journal de um shard: <run_id>.shard-<i>-of-<N>."""
+    if shard is None:
+        return run_id
+    return f"{run_id}.shard-{shard[0]}-of-{shard[1]}"
+
+
+def merge_journals(run_id: str, runs_dir: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Junta os journals de todos os shards de uma execução (e o journal sem shard, se houver).
+
+    Returns:
+        Dict prompt -> {
+            "examples": example_key -> registro,
+            "expected": example_keys planejados pelos shards encontrados,
+            "shards": shards encontrados (ex: {"1/4", "3/4"}),
+            "shard_count": N declarado pelos shards (ou None)
+        }
+    """
+    directory = Path(runs_dir or os.getenv("EVAL_RUNS_DIR", "runs"))
+    paths = sorted(directory.glob(f"{run_id}.shard-*-of-*.jsonl"))
+    if (directory / f"{run_id}.jsonl").exists():
+        paths.insert(0, directory / f"{run_id}.jsonl")
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        journal = RunJournal(path.stem, runs_dir=str(directory))
+        for record in journal.records():
+            prompt = record.get("prompt")
+            entry = merged.setdefault(prompt, {"examples": {}, "expected": set(), "shards": set(), "shard_count": None})
+
+            if record.get("type") == "plan":
+                entry["expected"].update(record.get("example_keys", []))
+                if record.get("shard"):
+                    entry["shards"].add(record["shard"])
+                    entry["shard_count"] = int(record["shard"].split("/")[1])
+            elif record.get("type") == "example":
+                entry["examples"].setdefault(record["example_key"], record)
+
+    return merged
@@ -25,10 +25,15 @@ Configure o provider no arquivo .env através da variável LLM_PROVIDER.
 import os
 import json
 import re
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
-from langchain_core.messages import SystemMessage, HumanMessage
-from utils import get_eval_llm
+from utils import OPENAI_COMPATIBLE_TYPES, get_eval_llm, parse_json_object
+from cache import get_judge_cache, make_cache_key
+from usage import usage_scope
+from profiling import span
+
+if TYPE_CHECKING:
+    from langchain_core.messages import HumanMessage
 
 load_dotenv()
 
@@ -44,63 +49,48 @@ def get_evaluator_llm():
 def extract_json_from_response(response_text: str) -> Dict[str, Any]:
     """
     Extrai JSON de uma resposta de LLM que pode conter texto adicional.
-    """
-    try:
-        # Tentar parsear diretamente
-        return json.loads(response_text)
-    except json.JSONDecodeError:
-        # Tentar encontrar JSON no meio do texto
-        start = response_text.find('{')
-        end = response_text.rfind('}') + 1
-
-        if start != -1 and end > start:
-            try:
-                json_str = response_text[start:end]
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                pass
 
-        # Se não conseguir extrair, retornar valores default
+    Mantida para quem importa de metrics; os juízes usam parse_json_object
+    e tratam a falha como erro (ver _call_judge).
+    """
+    result = parse_json_object(response_text)
+    if result is None:
         print(f"⚠️  Não foi possível extrair JSON da resposta: {response_text[:200]}...")
         return {"score": 0.0, "reasoning": "Erro ao processar resposta"}
+    return result
 
 
-def evaluate_f1_score(question: str, answer: str, reference: str) -> Dict[str, Any]:
-    """
-    Calcula F1-Score usando LLM-as-Judge.
+STRUCTURED_OUTPUT_MODES = ("schema", "json", "off")
 
-    F1-Score = 2 * (Precision * Recall) / (Precision + Recall)
 
-    Args:
-        question: Pergunta feita pelo usuário
-        answer: Resposta gerada pelo prompt
-        reference: Resposta esperada (ground truth)
+def get_structured_output_mode() -> str:
+    """
+    Saída estruturada dos juízes (JUDGE_STRUCTURED_OUTPUT):
 
-    Returns:
-        Dict com score e reasoning:
-        {
-            "score": 0.95,
-            "precision": 0.9,
-            "recall": 0.99,
-            "reasoning": "Explicação do LLM..."
-        }
+    - schema (default): OpenAI recebe o JSON Schema da métrica (strict); Gemini, modo JSON
+    - json: modo JSON do provider, sem schema (modelos/endpoints sem suporte a schema)
+    - off: só o prompt pede JSON
     """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em medir a qualidade de respostas geradas por IA.
+    mode = os.getenv("JUDGE_STRUCTURED_OUTPUT", "schema").strip().lower()
+    return mode if mode in STRUCTURED_OUTPUT_MODES else "schema"
 
-Sua tarefa é calcular PRECISION e RECALL para determinar o F1-Score.
 
-PERGUNTA DO USUÁRIO:
-{question}
+def get_repair_retries() -> int:
+    """Quantas vezes pedir ao juiz que corrija uma resposta fora do formato (JUDGE_REPAIR_RETRIES, default 1)."""
+    try:
+        return max(0, int(os.getenv("JUDGE_REPAIR_RETRIES", "1")))
+    except ValueError:
+        return 1
 
-RESPOSTA ESPERADA (Ground Truth):
-{reference}
 
-RESPOSTA GERADA PELO MODELO:
-{answer}
+class JudgeOutputError(ValueError):
+    """O juiz não devolveu um JSON válido no formato da métrica, mesmo após o reparo."""
 
-INSTRUÇÕES:
 
+# Critérios de cada juiz. Compartilhados entre o prompt individual da métrica
+# e o juiz combinado (evaluate_combined), para que os dois modos avaliem igual.
+
+_F1_CRITERIA = """\
 1. PRECISION (0.0 a 1.0):
    - Quantas informações na resposta gerada são CORRETAS e RELEVANTES?
    - Penalizar informações incorretas, inventadas ou desnecessárias
@@ -115,85 +105,9 @@ INSTRUÇÕES:
 
 3. RACIOCÍNIO:
    - Explique brevemente sua avaliação
-   - Cite exemplos específicos do que estava correto/incorreto
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "precision": <valor entre 0.0 e 1.0>,
-  "recall": <valor entre 0.0 e 1.0>,
-  "reasoning": "<sua explicação em até 100 palavras>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
-
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
-
-        precision = float(result.get("precision", 0.0))
-        recall = float(result.get("recall", 0.0))
-
-        # Calcular F1-Score
-        if (precision + recall) > 0:
-            f1_score = 2 * (precision * recall) / (precision + recall)
-        else:
-            f1_score = 0.0
-
-        return {
-            "score": round(f1_score, 4),
-            "precision": round(precision, 4),
-            "recall": round(recall, 4),
-            "reasoning": result.get("reasoning", "")
-        }
-
-    except Exception as e:
-        print(f"❌ Erro ao avaliar F1-Score: {e}")
-        return {
-            "score": 0.0,
-            "precision": 0.0,
-            "recall": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
-
-
-def evaluate_clarity(question: str, answer: str, reference: str) -> Dict[str, Any]:
-    """
-    Avalia a clareza e estrutura da resposta usando LLM-as-Judge.
-
-    Critérios:
-    - Organização e estrutura clara
-    - Linguagem simples e direta
-    - Ausência de ambiguidade
-    - Fácil de entender
-
-    Args:
-        question: Pergunta feita pelo usuário
-        answer: Resposta gerada pelo prompt
-        reference: Resposta esperada (ground truth)
-
-    Returns:
-        Dict com score e reasoning:
-        {
-            "score": 0.92,
-            "reasoning": "Explicação do LLM..."
-        }
-    """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em medir a CLAREZA de respostas geradas por IA.
-
-PERGUNTA DO USUÁRIO:
-{question}
-
-RESPOSTA GERADA PELO MODELO:
-{answer}
-
-RESPOSTA ESPERADA (Referência):
-{reference}
-
-INSTRUÇÕES:
+   - Cite exemplos específicos do que estava correto/incorreto"""
 
+_CLARITY_CRITERIA = """\
 Avalie a CLAREZA da resposta gerada com base nos critérios:
 
 1. ORGANIZAÇÃO (0.0 a 1.0):
@@ -213,73 +127,9 @@ Avalie a CLAREZA da resposta gerada com base nos critérios:
    - É concisa sem ser curta demais?
    - Não tem informações redundantes?
 
-Calcule a MÉDIA dos 4 critérios para obter o score final.
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada da avaliação em até 100 palavras>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
-
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
-
-        score = float(result.get("score", 0.0))
-
-        return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
-        }
-
-    except Exception as e:
-        print(f"❌ Erro ao avaliar Clarity: {e}")
-        return {
-            "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
-
-
-def evaluate_precision(question: str, answer: str, reference: str) -> Dict[str, Any]:
-    """
-    Avalia a precisão da resposta usando LLM-as-Judge.
-
-    Critérios:
-    - Ausência de informações inventadas (alucinações)
-    - Resposta focada na pergunta
-    - Informações corretas e verificáveis
-
-    Args:
-        question: Pergunta feita pelo usuário
-        answer: Resposta gerada pelo prompt
-        reference: Resposta esperada (ground truth)
-
-    Returns:
-        Dict com score e reasoning:
-        {
-            "score": 0.98,
-            "reasoning": "Explicação do LLM..."
-        }
-    """
-    
-    evaluator_prompt = f"""
-Você é um avaliador especializado em detectar PRECISÃO e ALUCINAÇÕES em respostas de IA.
-
-PERGUNTA DO USUÁRIO:
-{question}
-
-RESPOSTA GERADA PELO MODELO:
-{answer}
-
-RESPOSTA ESPERADA (Ground Truth):
-{reference}
-
-INSTRUÇÕES:
+Calcule a MÉDIA dos 4 critérios para obter o score final."""
 
+_PRECISION_CRITERIA = """\
 Avalie a PRECISÃO da resposta gerada:
 
 1. AUSÊNCIA DE ALUCINAÇÕES (0.0 a 1.0):
@@ -300,69 +150,9 @@ Avalie a PRECISÃO da resposta gerada:
    - 1.0 = todas informações corretas
    - 0.0 = informações incorretas
 
-Calcule a MÉDIA dos 3 critérios para obter o score final.
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada em até 100 palavras, cite exemplos>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
-
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
-
-        score = float(result.get("score", 0.0))
-
-        return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
-        }
-
-    except Exception as e:
-        print(f"❌ Erro ao avaliar Precision: {e}")
-        return {
-            "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
-
-
-def evaluate_tone_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
-    """
-    Avalia o tom da user story (profissional e empático).
-
-    Critérios específicos para Bug to User Story:
-    - Tom profissional mas não excessivamente técnico
-    - Empatia com o usuário afetado pelo bug
-    - Foco em valor de negócio, não apenas correção técnica
-    - Linguagem positiva (o que o usuário QUER fazer, não só o que não funciona)
-
-    Args:
-        bug_report: Descrição do bug original
-        user_story: User story gerada pelo prompt
-        reference: User story esperada (ground truth)
-
-    Returns:
-        Dict com score e reasoning
-    """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em User Stories ágeis.
-
-BUG REPORT ORIGINAL:
-{bug_report}
-
-USER STORY GERADA:
-{user_story}
-
-USER STORY ESPERADA (Referência):
-{reference}
-
-INSTRUÇÕES:
+Calcule a MÉDIA dos 3 critérios para obter o score final."""
 
+_TONE_CRITERIA = """\
 Avalie o TOM da user story gerada com base nos critérios:
 
 1. PROFISSIONALISMO (0.0 a 1.0):
@@ -385,70 +175,9 @@ Avalie o TOM da user story gerada com base nos critérios:
    - Tom construtivo e orientado a solução?
    - Evita linguagem negativa ou culpabilizante?
 
-Calcule a MÉDIA dos 4 critérios para obter o score final.
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada em até 150 palavras>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
-
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
-
-        score = float(result.get("score", 0.0))
-
-        return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
-        }
-
-    except Exception as e:
-        print(f"❌ Erro ao avaliar Tone Score: {e}")
-        return {
-            "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
-
-
-def evaluate_acceptance_criteria_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
-    """
-    Avalia a qualidade dos critérios de aceitação.
-
-    Critérios específicos:
-    - Usa formato Given-When-Then ou similar estruturado
-    - Critérios são específicos e testáveis
-    - Quantidade adequada (3-7 critérios idealmente)
-    - Cobertura completa do bug e solução
-    - Incluem cenários de edge case quando relevante
-
-    Args:
-        bug_report: Descrição do bug original
-        user_story: User story gerada pelo prompt
-        reference: User story esperada (ground truth)
-
-    Returns:
-        Dict com score e reasoning
-    """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em Critérios de Aceitação de User Stories.
-
-BUG REPORT ORIGINAL:
-{bug_report}
-
-USER STORY GERADA:
-{user_story}
-
-USER STORY ESPERADA (Referência):
-{reference}
-
-INSTRUÇÕES:
+Calcule a MÉDIA dos 4 critérios para obter o score final."""
 
+_ACCEPTANCE_CRITERIA_CRITERIA = """\
 Avalie os CRITÉRIOS DE ACEITAÇÃO da user story gerada:
 
 1. FORMATO ESTRUTURADO (0.0 a 1.0):
@@ -473,75 +202,15 @@ Avalie os CRITÉRIOS DE ACEITAÇÃO da user story gerada:
    - Considera edge cases quando relevante?
    - Aborda validações e requisitos técnicos do bug?
 
-Calcule a MÉDIA dos 4 critérios para obter o score final.
+Calcule a MÉDIA dos 4 critérios para obter o score final."""
 
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada com exemplos específicos, até 150 palavras>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
-
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
+_USER_STORY_FORMAT_CRITERIA = """\
+Avalie o FORMATO da user story gerada:
 
-        score = float(result.get("score", 0.0))
-
-        return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
-        }
-
-    except Exception as e:
-        print(f"❌ Erro ao avaliar Acceptance Criteria Score: {e}")
-        return {
-            "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
-
-
-def evaluate_user_story_format_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
-    """
-    Avalia se a user story segue o formato padrão correto.
-
-    Formato esperado:
-    - "Como um [tipo de usuário]"
-    - "Eu quero [ação/funcionalidade]"
-    - "Para que [benefício/valor]"
-    - Critérios de Aceitação claramente separados
-
-    Args:
-        bug_report: Descrição do bug original
-        user_story: User story gerada pelo prompt
-        reference: User story esperada (ground truth)
-
-    Returns:
-        Dict com score e reasoning
-    """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em formato de User Stories ágeis.
-
-BUG REPORT ORIGINAL:
-{bug_report}
-
-USER STORY GERADA:
-{user_story}
-
-USER STORY ESPERADA (Referência):
-{reference}
-
-INSTRUÇÕES:
-
-Avalie o FORMATO da user story gerada:
-
-1. TEMPLATE PADRÃO (0.0 a 1.0):
-   - Segue o formato "Como um [usuário], eu quero [ação], para que [benefício]"?
-   - Todas as três partes estão presentes e corretas?
-   - Ordem e estrutura seguem as melhores práticas?
+1. TEMPLATE PADRÃO (0.0 a 1.0):
+   - Segue o formato "Como um [usuário], eu quero [ação], para que [benefício]"?
+   - Todas as três partes estão presentes e corretas?
+   - Ordem e estrutura seguem as melhores práticas?
 
 2. IDENTIFICAÇÃO DE PERSONA (0.0 a 1.0):
    - "Como um..." identifica claramente o tipo de usuário?
@@ -563,68 +232,9 @@ Avalie o FORMATO da user story gerada:
    - Critérios de aceitação têm seção própria?
    - Estrutura facilita leitura e navegação?
 
-Calcule a MÉDIA dos 5 critérios para obter o score final.
-
-IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
-{{
-  "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada com exemplos, até 150 palavras>"
-}}
-
-NÃO adicione nenhum texto antes ou depois do JSON.
-"""
-
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
-
-        score = float(result.get("score", 0.0))
-
-        return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
-        }
-
-    except Exception as e:
-        print(f"❌ Erro ao avaliar User Story Format Score: {e}")
-        return {
-            "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
-
-
-def evaluate_completeness_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
-    """
-    Avalia a completude da user story em relação ao bug.
-
-    Critérios específicos baseados na complexidade do bug:
-    - Bugs simples: cobre o problema básico
-    - Bugs médios: inclui contexto técnico relevante
-    - Bugs complexos: aborda múltiplos aspectos, impacto, tasks técnicas
-
-    Args:
-        bug_report: Descrição do bug original
-        user_story: User story gerada pelo prompt
-        reference: User story esperada (ground truth)
-
-    Returns:
-        Dict com score e reasoning
-    """
-    evaluator_prompt = f"""
-Você é um avaliador especializado em completude de User Stories derivadas de bugs.
-
-BUG REPORT ORIGINAL:
-{bug_report}
-
-USER STORY GERADA:
-{user_story}
-
-USER STORY ESPERADA (Referência):
-{reference}
-
-INSTRUÇÕES:
+Calcule a MÉDIA dos 5 critérios para obter o score final."""
 
+_COMPLETENESS_CRITERIA = """\
 Avalie a COMPLETUDE da user story em relação ao bug:
 
 1. COBERTURA DO PROBLEMA (0.0 a 1.0):
@@ -663,35 +273,981 @@ Calcule a MÉDIA dos 5 critérios para obter o score final.
 IMPORTANTE:
 - Bugs SIMPLES podem ter score alto mesmo sem muitos detalhes técnicos
 - Bugs COMPLEXOS DEVEM ter seções adicionais (contexto técnico, tasks, impacto)
-- Compare com a referência para calibrar expectativa de completude
+- Compare com a referência para calibrar expectativa de completude"""
 
-Retorne APENAS um objeto JSON válido no formato:
+
+def _build_f1_prompt(question: str, answer: str, reference: str) -> str:
+    return f"""
+Você é um avaliador especializado em medir a qualidade de respostas geradas por IA.
+
+Sua tarefa é calcular PRECISION e RECALL para determinar o F1-Score.
+
+PERGUNTA DO USUÁRIO:
+{question}
+
+RESPOSTA ESPERADA (Ground Truth):
+{reference}
+
+RESPOSTA GERADA PELO MODELO:
+{answer}
+
+INSTRUÇÕES:
+
+{_F1_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "precision": <valor entre 0.0 e 1.0>,
+  "recall": <valor entre 0.0 e 1.0>,
+  "reasoning": "<sua explicação em até 100 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_clarity_prompt(question: str, answer: str, reference: str) -> str:
+    return f"""
+Você é um avaliador especializado em medir a CLAREZA de respostas geradas por IA.
+
+PERGUNTA DO USUÁRIO:
+{question}
+
+RESPOSTA GERADA PELO MODELO:
+{answer}
+
+RESPOSTA ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_CLARITY_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
 {{
   "score": <valor entre 0.0 e 1.0>,
-  "reasoning": "<explicação detalhada sobre o que foi bem coberto e o que faltou, até 200 palavras>"
+  "reasoning": "<explicação detalhada da avaliação em até 100 palavras>"
 }}
 
 NÃO adicione nenhum texto antes ou depois do JSON.
 """
 
-    try:
-        llm = get_evaluator_llm()
-        response = llm.invoke([HumanMessage(content=evaluator_prompt)])
-        result = extract_json_from_response(response.content)
 
-        score = float(result.get("score", 0.0))
+def _build_precision_prompt(question: str, answer: str, reference: str) -> str:
+    return f"""
+Você é um avaliador especializado em detectar PRECISÃO e ALUCINAÇÕES em respostas de IA.
 
-        return {
-            "score": round(score, 4),
-            "reasoning": result.get("reasoning", "")
-        }
+PERGUNTA DO USUÁRIO:
+{question}
 
-    except Exception as e:
-        print(f"❌ Erro ao avaliar Completeness Score: {e}")
-        return {
-            "score": 0.0,
-            "reasoning": f"Erro na avaliação: {str(e)}"
-        }
+RESPOSTA GERADA PELO MODELO:
+{answer}
+
+RESPOSTA ESPERADA (Ground Truth):
+{reference}
+
+INSTRUÇÕES:
+
+{_PRECISION_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada em até 100 palavras, cite exemplos>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_tone_prompt(bug_report: str, user_story: str, reference: str) -> str:
+    return f"""
+Você é um avaliador especializado em User Stories ágeis.
+
+BUG REPORT ORIGINAL:
+{bug_report}
+
+USER STORY GERADA:
+{user_story}
+
+USER STORY ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_TONE_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada em até 150 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_acceptance_criteria_prompt(bug_report: str, user_story: str, reference: str) -> str:
+    return f"""
+Você é um avaliador especializado em Critérios de Aceitação de User Stories.
+
+BUG REPORT ORIGINAL:
+{bug_report}
+
+USER STORY GERADA:
+{user_story}
+
+USER STORY ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_ACCEPTANCE_CRITERIA_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada com exemplos específicos, até 150 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_user_story_format_prompt(bug_report: str, user_story: str, reference: str) -> str:
+    return f"""
+Você é um avaliador especializado em formato de User Stories ágeis.
+
+BUG REPORT ORIGINAL:
+{bug_report}
+
+USER STORY GERADA:
+{user_story}
+
+USER STORY ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_USER_STORY_FORMAT_CRITERIA}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada com exemplos, até 150 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _build_completeness_prompt(bug_report: str, user_story: str, reference: str) -> str:
+    return f"""
+Você é um avaliador especializado em completude de User Stories derivadas de bugs.
+
+BUG REPORT ORIGINAL:
+{bug_report}
+
+USER STORY GERADA:
+{user_story}
+
+USER STORY ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES:
+
+{_COMPLETENESS_CRITERIA}
+
+Retorne APENAS um objeto JSON válido no formato:
+{{
+  "score": <valor entre 0.0 e 1.0>,
+  "reasoning": "<explicação detalhada sobre o que foi bem coberto e o que faltou, até 200 palavras>"
+}}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _parse_f1_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    precision = float(result.get("precision", 0.0))
+    recall = float(result.get("recall", 0.0))
+
+    # Calcular F1-Score
+    if (precision + recall) > 0:
+        f1_score = 2 * (precision * recall) / (precision + recall)
+    else:
+        f1_score = 0.0
+
+    return {
+        "score": round(f1_score, 4),
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "reasoning": result.get("reasoning", "")
+    }
+
+
+def _f1_error_result(error: Exception) -> Dict[str, Any]:
+    # "error" marca o veredicto como ausente: o score 0.0 não entra nas médias
+    return {
+        "score": 0.0,
+        "precision": 0.0,
+        "recall": 0.0,
+        "reasoning": f"Erro na avaliação: {str(error)}",
+        "error": True
+    }
+
+
+def _parse_score_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    score = float(result.get("score", 0.0))
+
+    return {
+        "score": round(score, 4),
+        "reasoning": result.get("reasoning", "")
+    }
+
+
+def _score_error_result(error: Exception) -> Dict[str, Any]:
+    return {
+        "score": 0.0,
+        "reasoning": f"Erro na avaliação: {str(error)}",
+        "error": True
+    }
+
+
+# Registro dos juízes: nome da métrica -> como montar o prompt e interpretar a resposta.
+# As versões síncrona e assíncrona compartilham exatamente o mesmo prompt e parser;
+# `criteria` e `output_format` alimentam o juiz combinado; `fields` são os campos
+# numéricos obrigatórios da resposta (validação e JSON Schema da saída estruturada).
+JUDGES: Dict[str, Dict[str, Any]] = {
+    "f1_score": {
+        "label": "F1-Score",
+        "build_prompt": _build_f1_prompt,
+        "parse": _parse_f1_result,
+        "on_error": _f1_error_result,
+        "fields": ("precision", "recall"),
+        "criteria": _F1_CRITERIA,
+        "output_format": '{"precision": <valor entre 0.0 e 1.0>, "recall": <valor entre 0.0 e 1.0>, "reasoning": "<explicação em até 100 palavras>"}',
+    },
+    "clarity": {
+        "label": "Clarity",
+        "build_prompt": _build_clarity_prompt,
+        "parse": _parse_score_result,
+        "on_error": _score_error_result,
+        "fields": ("score",),
+        "criteria": _CLARITY_CRITERIA,
+        "output_format": '{"score": <valor entre 0.0 e 1.0>, "reasoning": "<explicação em até 100 palavras>"}',
+    },
+    "precision": {
+        "label": "Precision",
+        "build_prompt": _build_precision_prompt,
+        "parse": _parse_score_result,
+        "on_error": _score_error_result,
+        "fields": ("score",),
+        "criteria": _PRECISION_CRITERIA,
+        "output_format": '{"score": <valor entre 0.0 e 1.0>, "reasoning": "<explicação em até 100 palavras, cite exemplos>"}',
+    },
+    "tone": {
+        "label": "Tone Score",
+        "build_prompt": _build_tone_prompt,
+        "parse": _parse_score_result,
+        "on_error": _score_error_result,
+        "fields": ("score",),
+        "criteria": _TONE_CRITERIA,
+        "output_format": '{"score": <valor entre 0.0 e 1.0>, "reasoning": "<explicação em até 150 palavras>"}',
+    },
+    "acceptance_criteria": {
+        "label": "Acceptance Criteria Score",
+        "build_prompt": _build_acceptance_criteria_prompt,
+        "parse": _parse_score_result,
+        "on_error": _score_error_result,
+        "fields": ("score",),
+        "criteria": _ACCEPTANCE_CRITERIA_CRITERIA,
+        "output_format": '{"score": <valor entre 0.0 e 1.0>, "reasoning": "<explicação com exemplos específicos, até 150 palavras>"}',
+    },
+    "user_story_format": {
+        "label": "User Story Format Score",
+        "build_prompt": _build_user_story_format_prompt,
+        "parse": _parse_score_result,
+        "on_error": _score_error_result,
+        "fields": ("score",),
+        "criteria": _USER_STORY_FORMAT_CRITERIA,
+        "output_format": '{"score": <valor entre 0.0 e 1.0>, "reasoning": "<explicação com exemplos, até 150 palavras>"}',
+    },
+    "completeness": {
+        "label": "Completeness Score",
+        "build_prompt": _build_completeness_prompt,
+        "parse": _parse_score_result,
+        "on_error": _score_error_result,
+        "fields": ("score",),
+        "criteria": _COMPLETENESS_CRITERIA,
+        "output_format": '{"score": <valor entre 0.0 e 1.0>, "reasoning": "<o que foi bem coberto e o que faltou, até 200 palavras>"}',
+    },
+}
+
+
+def _judge_cache_key(evaluator_prompt: str) -> str:
+    provider = os.getenv("LLM_PROVIDER", "openai").lower()
+    eval_model = os.getenv("EVAL_MODEL", "gpt-4o")
+    return make_cache_key("judge", provider, eval_model, 0.0, evaluator_prompt)
+
+
+def _metric_schema(metric: str) -> Dict[str, Any]:
+    fields = JUDGES[metric]["fields"]
+    properties = {field: {"type": "number"} for field in fields}
+    properties["reasoning"] = {"type": "string"}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": [*fields, "reasoning"],
+        "additionalProperties": False,
+    }
+
+
+def _output_schema(metrics: List[str], combined: bool) -> Dict[str, Any]:
+    """JSON Schema da resposta: o da métrica ou, no juiz combinado, um objeto por métrica."""
+    if not combined:
+        return _metric_schema(metrics[0])
+    return {
+        "type": "object",
+        "properties": {metric: _metric_schema(metric) for metric in metrics},
+        "required": list(metrics),
+        "additionalProperties": False,
+    }
+
+
+def judge_response_format(metrics: List[str], combined: bool = False) -> Optional[Dict[str, Any]]:
+    """`response_format` da OpenAI para o juiz (também usado nas requisições do modo batch)."""
+    mode = get_structured_output_mode()
+    if mode == "off":
+        return None
+    if mode == "json":
+        return {"type": "json_object"}
+    name = "juiz_combinado" if combined else f"juiz_{metrics[0]}"
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": _output_schema(metrics, combined), "strict": True},
+    }
+
+
+def _structured_kwargs(llm: Any, metrics: List[str], combined: bool) -> Dict[str, Any]:
+    """Parâmetros de saída estruturada do provider do avaliador (vazio se não houver suporte)."""
+    llm_type = getattr(llm, "_llm_type", None)
+    if llm_type in OPENAI_COMPATIBLE_TYPES:
+        response_format = judge_response_format(metrics, combined)
+        if response_format is None and llm_type in ("fake-chat", "replay-chat"):
+            # Os providers offline não leem o prompt: o modo JSON marca a chamada como juiz
+            response_format = {"type": "json_object"}
+        return {"response_format": response_format} if response_format else {}
+    if llm_type == "chat-google-generative-ai" and get_structured_output_mode() != "off":
+        return {"generation_config": {"response_mime_type": "application/json"}}
+    return {}
+
+
+def _valid_judge_json(result: Optional[Dict[str, Any]], metrics: List[str], combined: bool) -> bool:
+    """A resposta tem todos os campos numéricos das métricas avaliadas?"""
+    if result is None:
+        return False
+    sections = [result.get(metric) for metric in metrics] if combined else [result]
+    for section, metric in zip(sections, metrics):
+        if not isinstance(section, dict):
+            return False
+        for field in JUDGES[metric]["fields"]:
+            try:
+                float(section[field])
+            except (KeyError, TypeError, ValueError):
+                return False
+    return True
+
+
+def _repair_message(metrics: List[str], combined: bool) -> "HumanMessage":
+    from langchain_core.messages import HumanMessage
+
+    expected = _combined_output_format(metrics) if combined else JUDGES[metrics[0]]["output_format"]
+    return HumanMessage(content=(
+        "Sua resposta anterior não é um objeto JSON válido no formato pedido. "
+        "Responda novamente APENAS com o objeto JSON, sem texto antes ou depois, no formato:\n"
+        f"{expected}"
+    ))
+
+
+def _parse_judge_content(content: str, metrics: List[str], combined: bool) -> Optional[Dict[str, Any]]:
+    with span("judge.parse_json"):
+        result = parse_json_object(content)
+    return result if _valid_judge_json(result, metrics, combined) else None
+
+
+def _partial_combined_result(content: str, metrics: List[str]) -> Optional[Dict[str, Any]]:
+    """Seções válidas de uma resposta combinada incompleta, ou None se não houver nenhuma."""
+    result = parse_json_object(content)
+    if result is None:
+        return None
+    valid = {metric: result[metric] for metric in metrics if _valid_judge_json(result, [metric], combined=True)}
+    return valid or None
+
+
+def _store_judge_result(cache_key: str, content: str, result: Optional[Dict[str, Any]],
+                        metrics: List[str], combined: bool) -> Dict[str, Any]:
+    if result is None:
+        # Falha de parsing não vai para o cache: a próxima execução tenta de novo.
+        # No juiz combinado, as métricas válidas são aproveitadas e só as
+        # ausentes ou inválidas ficam com erro (ver _parse_combined_result).
+        partial = _partial_combined_result(content, metrics) if combined else None
+        if partial is not None:
+            return partial
+        raise JudgeOutputError(f"resposta do juiz fora do formato JSON esperado: {content[:200]!r}")
+    get_judge_cache().set(cache_key, result)
+    return result
+
+
+def _repair_judge(llm: Any, options: Dict[str, Any], evaluator_prompt: str, content: str,
+                  metrics: List[str], combined: bool) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Pede ao avaliador que corrija a resposta, até JUDGE_REPAIR_RETRIES vezes."""
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    messages = [HumanMessage(content=evaluator_prompt)]
+    result = None
+    for _ in range(get_repair_retries()):
+        messages = messages + [AIMessage(content=content), _repair_message(metrics, combined)]
+        with span("judge.repair"):
+            content = llm.invoke(messages, **options).content
+        result = _parse_judge_content(content, metrics, combined)
+        if result is not None:
+            break
+    return content, result
+
+
+async def _arepair_judge(llm: Any, options: Dict[str, Any], evaluator_prompt: str, content: str,
+                         metrics: List[str], combined: bool) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Versão assíncrona de _repair_judge."""
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    messages = [HumanMessage(content=evaluator_prompt)]
+    result = None
+    for _ in range(get_repair_retries()):
+        messages = messages + [AIMessage(content=content), _repair_message(metrics, combined)]
+        with span("judge.repair"):
+            content = (await llm.ainvoke(messages, **options)).content
+        result = _parse_judge_content(content, metrics, combined)
+        if result is not None:
+            break
+    return content, result
+
+
+def _call_judge(evaluator_prompt: str, metrics: List[str], combined: bool = False, site: str = "juiz") -> Dict[str, Any]:
+    """
+    Envia o prompt ao LLM avaliador e devolve o JSON da resposta.
+
+    Veredictos já calculados para o mesmo prompt/modelo vêm do cache local.
+    `metrics` (e `combined`) definem a saída estruturada pedida ao provider e
+    a validação da resposta; `site` identifica a chamada na contabilidade de
+    tokens (usage.py). Uma resposta fora do formato recebe até
+    JUDGE_REPAIR_RETRIES pedidos de correção antes de falhar.
+
+    Raises:
+        JudgeOutputError: Se a resposta continuar inválida após os reparos
+    """
+    cache_key = _judge_cache_key(evaluator_prompt)
+    cached = get_judge_cache().get(cache_key)
+    if cached is not None:
+        return cached
+
+    from langchain_core.messages import HumanMessage
+
+    llm = get_evaluator_llm()
+    options = _structured_kwargs(llm, metrics, combined)
+    with usage_scope(site=site), span(f"judge.{site}"):
+        content = llm.invoke([HumanMessage(content=evaluator_prompt)], **options).content
+        result = _parse_judge_content(content, metrics, combined)
+        if result is None:
+            content, result = _repair_judge(llm, options, evaluator_prompt, content, metrics, combined)
+    return _store_judge_result(cache_key, content, result, metrics, combined)
+
+
+async def _acall_judge(evaluator_prompt: str, metrics: List[str], combined: bool = False, site: str = "juiz") -> Dict[str, Any]:
+    """Versão assíncrona de _call_judge."""
+    cache_key = _judge_cache_key(evaluator_prompt)
+    cached = get_judge_cache().get(cache_key)
+    if cached is not None:
+        return cached
+
+    from langchain_core.messages import HumanMessage
+
+    llm = get_evaluator_llm()
+    options = _structured_kwargs(llm, metrics, combined)
+    with usage_scope(site=site), span(f"judge.{site}"):
+        content = (await llm.ainvoke([HumanMessage(content=evaluator_prompt)], **options)).content
+        result = _parse_judge_content(content, metrics, combined)
+        if result is None:
+            content, result = await _arepair_judge(llm, options, evaluator_prompt, content, metrics, combined)
+    return _store_judge_result(cache_key, content, result, metrics, combined)
+
+
+def evaluate_metric(metric: str, question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """
+    Executa um juiz (LLM-as-Judge) de forma síncrona.
+
+    Args:
+        metric: Chave da métrica em JUDGES
+        question: Entrada original (pergunta ou bug report)
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning no formato da métrica
+    """
+    judge = JUDGES[metric]
+    evaluator_prompt = judge["build_prompt"](question, answer, reference)
+
+    try:
+        result = _call_judge(evaluator_prompt, [metric], site=metric)
+        return judge["parse"](result)
+
+    except Exception as e:
+        print(f"❌ Erro ao avaliar {judge['label']}: {e}")
+        return judge["on_error"](e)
+
+
+async def aevaluate_metric(metric: str, question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """
+    Executa um juiz de forma assíncrona (llm.ainvoke).
+
+    Mesmo contrato de evaluate_metric.
+    """
+    judge = JUDGES[metric]
+    evaluator_prompt = judge["build_prompt"](question, answer, reference)
+
+    try:
+        result = await _acall_judge(evaluator_prompt, [metric], site=metric)
+        return judge["parse"](result)
+
+    except Exception as e:
+        print(f"❌ Erro ao avaliar {judge['label']}: {e}")
+        return judge["on_error"](e)
+
+
+JUDGE_MODES = ("per-metric", "combined")
+
+
+def get_judge_mode(value: Optional[str] = None) -> str:
+    """
+    Resolve o modo dos juízes: argumento explícito > EVAL_JUDGE_MODE > per-metric.
+
+    - per-metric: uma chamada ao LLM por métrica (prompts individuais)
+    - combined: uma única chamada que devolve todas as métricas em um JSON
+    """
+    mode = (value or os.getenv("EVAL_JUDGE_MODE", "per-metric")).strip().lower()
+    if mode not in JUDGE_MODES:
+        raise ValueError(
+            f"Modo de juiz '{mode}' não suportado. Use: {', '.join(JUDGE_MODES)}"
+        )
+    return mode
+
+
+def _combined_output_format(metrics: List[str]) -> str:
+    lines = ",\n".join(f'  "{metric}": {JUDGES[metric]["output_format"]}' for metric in metrics)
+    return "{\n" + lines + "\n}"
+
+
+def _build_combined_prompt(metrics: List[str], question: str, answer: str, reference: str) -> str:
+    sections = []
+    for metric in metrics:
+        judge = JUDGES[metric]
+        sections.append(f'MÉTRICA "{metric}" ({judge["label"]}):\n\n{judge["criteria"]}')
+
+    output_lines = _combined_output_format(metrics)
+    criteria_text = "\n\n---\n\n".join(sections)
+
+    return f"""
+Você é um avaliador especializado em medir a qualidade de respostas geradas por IA.
+
+Avalie a resposta gerada em CADA uma das {len(metrics)} métricas abaixo, de forma independente:
+o resultado de uma métrica não deve influenciar as demais.
+
+ENTRADA ORIGINAL (pergunta ou bug report):
+{question}
+
+RESPOSTA GERADA PELO MODELO:
+{answer}
+
+RESPOSTA ESPERADA (Referência):
+{reference}
+
+INSTRUÇÕES POR MÉTRICA:
+
+{criteria_text}
+
+IMPORTANTE: Retorne APENAS um objeto JSON válido, com uma chave por métrica, no formato:
+{output_lines}
+
+NÃO adicione nenhum texto antes ou depois do JSON.
+"""
+
+
+def _parse_combined_result(metrics: List[str], result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    parsed = {}
+    for metric in metrics:
+        judge = JUDGES[metric]
+        metric_result = result.get(metric)
+        if not isinstance(metric_result, dict):
+            print(f"⚠️  Juiz combinado não retornou a métrica {judge['label']}")
+            parsed[metric] = judge["on_error"](ValueError(f"métrica '{metric}' ausente na resposta"))
+            continue
+        try:
+            parsed[metric] = judge["parse"](metric_result)
+        except (TypeError, ValueError) as e:
+            # Um valor inválido invalida só a própria métrica, não as demais
+            print(f"⚠️  Juiz combinado retornou valor inválido para {judge['label']}: {e}")
+            parsed[metric] = judge["on_error"](e)
+    return parsed
+
+
+def _combined_error(metrics: List[str], error: Exception) -> Dict[str, Dict[str, Any]]:
+    print(f"❌ Erro no juiz combinado ({', '.join(metrics)}): {error}")
+    return {metric: JUDGES[metric]["on_error"](error) for metric in metrics}
+
+
+def evaluate_combined(
+    question: str,
+    answer: str,
+    reference: str,
+    metrics: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Avalia várias métricas com UMA única chamada ao LLM-as-Judge.
+
+    Usa os mesmos critérios dos juízes individuais, mas envia pergunta,
+    resposta e referência uma só vez.
+
+    Args:
+        question: Entrada original (pergunta ou bug report)
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+        metrics: Chaves de JUDGES a avaliar (ex: ["f1_score", "clarity"])
+
+    Returns:
+        Dict métrica -> resultado, no mesmo formato de evaluate_metric
+    """
+    evaluator_prompt = _build_combined_prompt(metrics, question, answer, reference)
+
+    try:
+        result = _call_judge(evaluator_prompt, metrics, combined=True, site="juiz combinado")
+        return _parse_combined_result(metrics, result)
+
+    except Exception as e:
+        return _combined_error(metrics, e)
+
+
+async def aevaluate_combined(
+    question: str,
+    answer: str,
+    reference: str,
+    metrics: List[str]
+) -> Dict[str, Dict[str, Any]]:
+    """Versão assíncrona de evaluate_combined."""
+    evaluator_prompt = _build_combined_prompt(metrics, question, answer, reference)
+
+    try:
+        result = await _acall_judge(evaluator_prompt, metrics, combined=True, site="juiz combinado")
+        return _parse_combined_result(metrics, result)
+
+    except Exception as e:
+        return _combined_error(metrics, e)
+
+
+def evaluate_metrics(
+    question: str,
+    answer: str,
+    reference: str,
+    metrics: List[str],
+    mode: str = "per-metric"
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Avalia uma lista de métricas no modo escolhido (per-metric ou combined).
+
+    Returns:
+        Dict métrica -> resultado
+    """
+    if mode == "combined":
+        return evaluate_combined(question, answer, reference, metrics)
+    return {metric: evaluate_metric(metric, question, answer, reference) for metric in metrics}
+
+
+def build_judge_calls(
+    question: str,
+    answer: str,
+    reference: str,
+    metrics: List[str],
+    mode: str = "per-metric"
+) -> Dict[str, str]:
+    """
+    Prompts que os juízes enviariam para um exemplo, sem chamar o LLM.
+
+    Usado pelo modo batch, que junta as chamadas de todos os exemplos em um job.
+
+    Returns:
+        Dict id da chamada -> prompt do avaliador ("combined" ou uma chave por métrica)
+    """
+    if mode == "combined":
+        return {"combined": _build_combined_prompt(metrics, question, answer, reference)}
+    return {metric: JUDGES[metric]["build_prompt"](question, answer, reference) for metric in metrics}
+
+
+def cached_judge_result(evaluator_prompt: str) -> Optional[Dict[str, Any]]:
+    """JSON do veredicto em cache para o prompt, ou None."""
+    return get_judge_cache().get(_judge_cache_key(evaluator_prompt))
+
+
+def judge_request_options(metrics: List[str], combined: bool = False) -> Dict[str, Any]:
+    """Campos extras da requisição (Batch API da OpenAI) com a saída estruturada do juiz."""
+    response_format = judge_response_format(metrics, combined)
+    return {"response_format": response_format} if response_format else {}
+
+
+def parse_judge_output(evaluator_prompt: str, content: str, metrics: List[str], combined: bool = False) -> Dict[str, Any]:
+    """
+    Interpreta a resposta do avaliador a um prompt (e grava no cache).
+
+    Uma resposta fora do formato é reparada com chamadas diretas ao
+    avaliador (até JUDGE_REPAIR_RETRIES), como em _call_judge.
+
+    Raises:
+        JudgeOutputError: Se a resposta continuar inválida após os reparos
+    """
+    result = _parse_judge_content(content, metrics, combined)
+    if result is None and get_repair_retries():
+        llm = get_evaluator_llm()
+        with usage_scope(site="reparo do juiz"):
+            content, result = _repair_judge(llm, _structured_kwargs(llm, metrics, combined), evaluator_prompt, content, metrics, combined)
+    return _store_judge_result(_judge_cache_key(evaluator_prompt), content, result, metrics, combined)
+
+
+def judged_from_results(
+    metrics: List[str],
+    mode: str,
+    results: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Monta o resultado por métrica a partir das respostas de build_judge_calls.
+
+    Args:
+        metrics: Métricas avaliadas
+        mode: per-metric ou combined
+        results: id da chamada -> JSON do avaliador, ou Exception se a chamada falhou
+
+    Returns:
+        Dict métrica -> resultado, no mesmo formato de evaluate_metrics
+    """
+    if mode == "combined":
+        result = results["combined"]
+        if isinstance(result, Exception):
+            return _combined_error(metrics, result)
+        return _parse_combined_result(metrics, result)
+
+    judged = {}
+    for metric in metrics:
+        judge = JUDGES[metric]
+        try:
+            result = results[metric]
+            if isinstance(result, Exception):
+                raise result
+            judged[metric] = judge["parse"](result)
+        except Exception as e:
+            print(f"❌ Erro ao avaliar {judge['label']}: {e}")
+            judged[metric] = judge["on_error"](e)
+    return judged
+
+
+def evaluate_f1_score(question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """
+    Calcula F1-Score usando LLM-as-Judge.
+
+    F1-Score = 2 * (Precision * Recall) / (Precision + Recall)
+
+    Args:
+        question: Pergunta feita pelo usuário
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning:
+        {
+            "score": 0.95,
+            "precision": 0.9,
+            "recall": 0.99,
+            "reasoning": "Explicação do LLM..."
+        }
+    """
+    return evaluate_metric("f1_score", question, answer, reference)
+
+
+def evaluate_clarity(question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """
+    Avalia a clareza e estrutura da resposta usando LLM-as-Judge.
+
+    Critérios:
+    - Organização e estrutura clara
+    - Linguagem simples e direta
+    - Ausência de ambiguidade
+    - Fácil de entender
+
+    Args:
+        question: Pergunta feita pelo usuário
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning:
+        {
+            "score": 0.92,
+            "reasoning": "Explicação do LLM..."
+        }
+    """
+    return evaluate_metric("clarity", question, answer, reference)
+
+
+def evaluate_precision(question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """
+    Avalia a precisão da resposta usando LLM-as-Judge.
+
+    Critérios:
+    - Ausência de informações inventadas (alucinações)
+    - Resposta focada na pergunta
+    - Informações corretas e verificáveis
+
+    Args:
+        question: Pergunta feita pelo usuário
+        answer: Resposta gerada pelo prompt
+        reference: Resposta esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning:
+        {
+            "score": 0.98,
+            "reasoning": "Explicação do LLM..."
+        }
+    """
+    return evaluate_metric("precision", question, answer, reference)
+
+
+def evaluate_tone_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
+    """
+    Avalia o tom da user story (profissional e empático).
+
+    Critérios específicos para Bug to User Story:
+    - Tom profissional mas não excessivamente técnico
+    - Empatia com o usuário afetado pelo bug
+    - Foco em valor de negócio, não apenas correção técnica
+    - Linguagem positiva (o que o usuário QUER fazer, não só o que não funciona)
+
+    Args:
+        bug_report: Descrição do bug original
+        user_story: User story gerada pelo prompt
+        reference: User story esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning
+    """
+    return evaluate_metric("tone", bug_report, user_story, reference)
+
+
+def evaluate_acceptance_criteria_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
+    """
+    Avalia a qualidade dos critérios de aceitação.
+
+    Critérios específicos:
+    - Usa formato Given-When-Then ou similar estruturado
+    - Critérios são específicos e testáveis
+    - Quantidade adequada (3-7 critérios idealmente)
+    - Cobertura completa do bug e solução
+    - Incluem cenários de edge case quando relevante
+
+    Args:
+        bug_report: Descrição do bug original
+        user_story: User story gerada pelo prompt
+        reference: User story esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning
+    """
+    return evaluate_metric("acceptance_criteria", bug_report, user_story, reference)
+
+
+def evaluate_user_story_format_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
+    """
+    Avalia se a user story segue o formato padrão correto.
+
+    Formato esperado:
+    - "Como um [tipo de usuário]"
+    - "Eu quero [ação/funcionalidade]"
+    - "Para que [benefício/valor]"
+    - Critérios de Aceitação claramente separados
+
+    Args:
+        bug_report: Descrição do bug original
+        user_story: User story gerada pelo prompt
+        reference: User story esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning
+    """
+    return evaluate_metric("user_story_format", bug_report, user_story, reference)
+
+
+def evaluate_completeness_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
+    """
+    Avalia a completude da user story em relação ao bug.
+
+    Critérios específicos baseados na complexidade do bug:
+    - Bugs simples: cobre o problema básico
+    - Bugs médios: inclui contexto técnico relevante
+    - Bugs complexos: aborda múltiplos aspectos, impacto, tasks técnicas
+
+    Args:
+        bug_report: Descrição do bug original
+        user_story: User story gerada pelo prompt
+        reference: User story esperada (ground truth)
+
+    Returns:
+        Dict com score e reasoning
+    """
+    return evaluate_metric("completeness", bug_report, user_story, reference)
+
+
+# Versões assíncronas (mesmos prompts, via llm.ainvoke)
+
+async def aevaluate_f1_score(question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """Versão assíncrona de evaluate_f1_score."""
+    return await aevaluate_metric("f1_score", question, answer, reference)
+
+
+async def aevaluate_clarity(question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """Versão assíncrona de evaluate_clarity."""
+    return await aevaluate_metric("clarity", question, answer, reference)
+
+
+async def aevaluate_precision(question: str, answer: str, reference: str) -> Dict[str, Any]:
+    """Versão assíncrona de evaluate_precision."""
+    return await aevaluate_metric("precision", question, answer, reference)
+
+
+async def aevaluate_tone_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
+    """Versão assíncrona de evaluate_tone_score."""
+    return await aevaluate_metric("tone", bug_report, user_story, reference)
+
+
+async def aevaluate_acceptance_criteria_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
+    """Versão assíncrona de evaluate_acceptance_criteria_score."""
+    return await aevaluate_metric("acceptance_criteria", bug_report, user_story, reference)
+
+
+async def aevaluate_user_story_format_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
+    """Versão assíncrona de evaluate_user_story_format_score."""
+    return await aevaluate_metric("user_story_format", bug_report, user_story, reference)
+
+
+async def aevaluate_completeness_score(bug_report: str, user_story: str, reference: str) -> Dict[str, Any]:
+    """Versão assíncrona de evaluate_completeness_score."""
+    return await aevaluate_metric("completeness", bug_report, user_story, reference)
 
 
 # Exemplo de uso e testes
@@ -0,0 +1,176 @@
+"""
+Spans de instrumentação do pipeline de avaliação.
+
+Cada etapa (hub.pull, sincronização do dataset, leitura de exemplos, geração,
+cada juiz, extração do JSON, gravação do journal, espera por rate limit...) é
+medida com `span("nome")`. No fim da execução o resumo mostra p50/p90/p99 por
+etapa, e `--trace arquivo.json` exporta a execução inteira no formato Chrome
+Trace (abre em chrome://tracing ou https://ui.perfetto.dev).
+
+Com asyncio, cada task ganha sua própria trilha no trace, já que várias
+corrotinas se intercalam na mesma thread.
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentil q (0-100) com interpolação linear; `sorted_values` já ordenado."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _track() -> Any:
+    """Identificador da trilha: a task asyncio atual ou, fora dela, a thread."""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return ("task", id(task))
+    return ("thread", threading.get_ident())
+
+
+class Profiler:
+    """Coleta os spans da execução (thread-safe)."""
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._tracks: Dict[Any, int] = {}
+
+    def _track_id(self, track: Any) -> int:
+        with self._lock:
+            if track not in self._tracks:
+                self._tracks[track] = len(self._tracks) + 1
+            return self._tracks[track]
+
+    @contextmanager
+    def span(self, name: str, **args: Any) -> Iterator[None]:
+        track = _track()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            record = {
+                "name": name,
+                "start": start - self._origin,
+                "duration": end - start,
+                "track": self._track_id(track),
+                "thread": track[0] == "thread",
+                "args": args,
+            }
+            with self._lock:
+                self.spans.append(record)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Por etapa: quantidade, p50, p90, p99, máximo e tempo total (segundos)."""
+        with self._lock:
+            spans = list(self.spans)
+
+        durations: Dict[str, List[float]] = {}
+        for record in spans:
+            durations.setdefault(record["name"], []).append(record["duration"])
+
+        stats = {}
+        for name, values in durations.items():
+            values.sort()
+            stats[name] = {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p90": percentile(values, 90),
+                "p99": percentile(values, 99),
+                "max": values[-1],
+                "total": sum(values),
+            }
+        return stats
+
+    def format_table(self) -> List[str]:
+        """Tabela de latência por etapa (ordenada pelo tempo total), para o resumo final."""
+        stats = self.stats()
+        if not stats:
+            return []
+
+        def ms(seconds: float) -> str:
+            return f"{seconds * 1000:.0f}ms" if seconds < 10 else f"{seconds:.1f}s"
+
+        lines = [f"{'Etapa':<24}{'N':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'máx':>10}{'total':>10}"]
+        for name in sorted(stats, key=lambda item: -stats[item]["total"]):
+            s = stats[name]
+            lines.append(
+                f"{name:<24}{s['count']:>7}{ms(s['p50']):>10}{ms(s['p90']):>10}"
+                f"{ms(s['p99']):>10}{ms(s['max']):>10}{ms(s['total']):>10}"
+            )
+        return lines
+
+    def export_chrome_trace(self, path: str):
+        """Grava os spans como eventos "X" do formato Chrome Trace / Perfetto."""
+        with self._lock:
+            spans = list(self.spans)
+            tracks = dict(self._tracks)
+
+        pid = os.getpid()
+        events = []
+        for track, tid in tracks.items():
+            label = "thread" if track[0] == "thread" else "task"
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": f"{label} {tid}"}})
+        for record in spans:
+            events.append({
+                "name": record["name"],
+                "cat": record["name"].split(".", 1)[0],
+                "ph": "X",
+                "ts": record["start"] * 1_000_000,
+                "dur": record["duration"] * 1_000_000,
+                "pid": pid,
+                "tid": record["track"],
+                "args": {key: str(value) for key, value in record["args"].items()},
+            })
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self._tracks.clear()
+            self._origin = time.perf_counter()
+
+
+_PROFILER = Profiler()
+
+
+def get_profiler() -> Profiler:
+    """Profiler compartilhado do processo."""
+    return _PROFILER
+
+
+def span(name: str, **args: Any):
+    """Mede o bloco como uma etapa `name` no profiler do processo."""
+    return _PROFILER.span(name, **args)
+
+
+def timed_iter(name: str, iterable: Any) -> Iterator[Any]:
+    """Itera medindo cada next() como um span (ex: páginas do LangSmith, linhas do JSONL)."""
+    iterator = iter(iterable)
+    while True:
+        with span(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
@@ -0,0 +1,135 @@
+"""
+Carregador compartilhado dos prompts em YAML, com memoização.
+
+O YAML é lido e parseado uma vez por conteúdo: enquanto mtime e tamanho do
+arquivo não mudam, nem o arquivo é relido; se mudam, o conteúdo é relido e,
+se o hash for o mesmo (ex: `touch`), o parse anterior é reaproveitado.
+O ChatPromptTemplate (utils.build_chat_prompt) também é compilado uma vez por
+conteúdo de system_prompt/user_prompt, então avaliações repetidas no mesmo
+processo (sweeps, modo watch, testes) não re-parseiam o template.
+
+Os templates são compartilhados: não altere o objeto retornado.
+"""
+
+import copy
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+from cache import make_cache_key
+from utils import build_chat_prompt
+
+# caminho -> ((mtime_ns, tamanho), sha256 do conteúdo, YAML parseado)
+_FILES: Dict[str, Tuple[Tuple[int, int], str, Dict[str, Any]]] = {}
+# hash de system_prompt + user_prompt -> ChatPromptTemplate
+_TEMPLATES: Dict[str, Any] = {}
+_LOCK = threading.Lock()
+_STATS = {"file_hits": 0, "file_loads": 0, "template_hits": 0, "template_builds": 0}
+
+
+def _read_file(path: Path) -> Optional[Dict[str, Any]]:
+    """YAML do arquivo, memoizado por mtime/tamanho e, em seguida, pelo hash do conteúdo."""
+    key = str(path.resolve())
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        print(f"❌ Arquivo não encontrado: {path}")
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _LOCK:
+        entry = _FILES.get(key)
+        if entry is not None and entry[0] == signature:
+            _STATS["file_hits"] += 1
+            return entry[2]
+
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    unchanged = entry is not None and entry[1] == digest
+    if unchanged:
+        data = entry[2]
+    else:
+        try:
+            data = yaml.safe_load(raw.decode("utf-8"))
+        except yaml.YAMLError as e:
+            print(f"❌ Erro ao parsear YAML: {e}")
+            return None
+
+    with _LOCK:
+        _STATS["file_hits" if unchanged else "file_loads"] += 1
+        _FILES[key] = (signature, digest, data)
+    return data
+
+
+def load_prompt_file(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Carrega um arquivo de prompts (formato {nome: {dados}}) com memoização.
+
+    Args:
+        path: Caminho do YAML
+
+    Returns:
+        Cópia do conteúdo do YAML ou None se erro
+    """
+    data = _read_file(Path(path))
+    return copy.deepcopy(data) if isinstance(data, dict) else None
+
+
+def compile_prompt(prompt_data: Dict[str, Any]):
+    """
+    ChatPromptTemplate do prompt (utils.build_chat_prompt), compilado uma vez por conteúdo.
+
+    Args:
+        prompt_data: Dados do prompt com system_prompt e user_prompt
+
+    Returns:
+        ChatPromptTemplate compartilhado (não altere)
+    """
+    key = make_cache_key("prompt-template", prompt_data.get("system_prompt"), prompt_data.get("user_prompt"))
+
+    with _LOCK:
+        template = _TEMPLATES.get(key)
+        if template is not None:
+            _STATS["template_hits"] += 1
+            return template
+
+    template = build_chat_prompt(prompt_data)
+    with _LOCK:
+        _STATS["template_builds"] += 1
+        return _TEMPLATES.setdefault(key, template)
+
+
+def load_prompt_template(path: str, name: Optional[str] = None):
+    """
+    Carrega o YAML e devolve o ChatPromptTemplate do prompt `name` (default: o primeiro).
+
+    Returns:
+        ChatPromptTemplate ou None se o arquivo ou o prompt não existirem
+    """
+    data = _read_file(Path(path))
+    if not isinstance(data, dict) or not data:
+        return None
+
+    prompt_data = data.get(name) if name else next(iter(data.values()))
+    if not isinstance(prompt_data, dict):
+        print(f"❌ Prompt '{name}' não encontrado em {path}")
+        return None
+    return compile_prompt(prompt_data)
+
+
+def prompt_cache_stats() -> Dict[str, int]:
+    """Acertos e cargas do cache de arquivos e de templates."""
+    with _LOCK:
+        return dict(_STATS)
+
+
+def clear_prompt_cache():
+    """Descarta arquivos e templates memoizados (ex: entre testes)."""
+    with _LOCK:
+        _FILES.clear()
+        _TEMPLATES.clear()
+        for key in _STATS:
+            _STATS[key] = 0
@@ -0,0 +1,309 @@
+"""
+CLI única do projeto: pull, push, validate, eval e recall.
+
+Uso (na raiz do projeto):
+    python src/promptops.py pull [owner/prompt ...] [--output-dir prompts]
+    python src/promptops.py push [prompts/bug_to_user_story_v2.yml]
+    python src/promptops.py validate [prompts/*.yml]
+    python src/promptops.py eval --local -c 16          (opções do evaluate.py)
+    python src/promptops.py recall --limit 5            (opções do run_recall_test.py)
+
+Cada subcomando aceita as mesmas opções do script correspondente.
+
+Modo daemon: `promptops.py serve` mantém um processo com os módulos do
+LangChain já importados, os clientes de LLM aquecidos (pool HTTP), os
+prompts compilados (prompt_loader) e as conexões dos caches abertas. Enquanto
+ele estiver no ar, os subcomandos conectam no socket Unix (PROMPTOPS_SOCKET,
+default: .cache/promptops.sock) e executam lá, com a saída transmitida ao
+terminal; sem daemon (ou com --no-daemon) executam no próprio processo.
+`promptops.py stop` encerra o daemon.
+
+O daemon executa um comando por vez, no diretório e com as variáveis de
+ambiente de quem chamou (mais as do .env desse diretório, sem sobrescrever
+as já definidas, como o load_dotenv() dos scripts); contadores, spans e estatísticas são zerados entre
+comandos. Caches, limitadores e clientes são criados na primeira vez que um
+comando os usa, então mudar caminhos de cache ou LLM_RPM/LLM_TPM no .env
+exige reiniciar o daemon.
+"""
+
+import io
+import os
+import sys
+import json
+import socket
+import argparse
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import dotenv_values
+
+COMMANDS = ("pull", "push", "validate", "eval", "recall")
+DEFAULT_SOCKET = ".cache/promptops.sock"
+DEFAULT_VALIDATE = ["prompts/bug_to_user_story_v2.yml"]
+
+
+def get_socket_path(value: Optional[str] = None) -> Path:
+    """Socket do daemon: argumento explícito (--socket) > PROMPTOPS_SOCKET > .cache/promptops.sock."""
+    return Path(value or os.getenv("PROMPTOPS_SOCKET", DEFAULT_SOCKET))
+
+
+def validate_files(argv: Optional[List[str]] = None) -> int:
+    """Valida os prompts dos YAMLs com as regras do push_prompts, sem acessar o LangSmith."""
+    from prompt_loader import load_prompt_file
+    from push_prompts import validate_prompt
+
+    parser = argparse.ArgumentParser(description="Valida prompts YAML antes do push")
+    parser.add_argument("files", nargs="*", default=DEFAULT_VALIDATE, help="YAMLs a validar (default: prompts/bug_to_user_story_v2.yml)")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for path in args.files:
+        data = load_prompt_file(path) if Path(path).exists() else None
+        if not data:
+            print(f"❌ {path}: arquivo não encontrado ou YAML inválido")
+            failures += 1
+            continue
+        for name, prompt_data in data.items():
+            is_valid, errors = validate_prompt(prompt_data if isinstance(prompt_data, dict) else {})
+            if is_valid:
+                print(f"✅ {path}: {name}")
+            else:
+                failures += 1
+                print(f"❌ {path}: {name}")
+                for error in errors:
+                    print(f"   - {error}")
+    return 1 if failures else 0
+
+
+def _command_main(command: str) -> Callable[[Optional[List[str]]], Any]:
+    """main(argv) do script de cada subcomando (importado só quando usado)."""
+    if command == "pull":
+        from pull_prompts import main
+    elif command == "push":
+        from push_prompts import main
+    elif command == "eval":
+        from evaluate import main
+    elif command == "recall":
+        from run_recall_test import main
+    else:
+        main = validate_files
+    return main
+
+
+def run_command(command: str, argv: List[str]) -> int:
+    """Executa um subcomando no processo atual e devolve o código de saída."""
+    try:
+        code = _command_main(command)(argv)
+    except SystemExit as e:
+        # argparse (--help, opção inválida) e scripts que chamam sys.exit
+        code = e.code
+    if code is None:
+        return 0
+    return code if isinstance(code, int) else 1
+
+
+def reset_run_state():
+    """Zera o que cada comando acumula no processo (spans, uso, contadores e flags dos caches)."""
+    from cache import reset_cache_state
+    from profiling import get_profiler
+    from usage import get_usage_recorder
+
+    get_profiler().reset()
+    get_usage_recorder().reset()
+    reset_cache_state()
+    if "rate_limit" in sys.modules:
+        sys.modules["rate_limit"].reset_rate_limit_stats()
+
+
+def _send(conn: socket.socket, message: Dict[str, Any]):
+    conn.sendall((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+class _SocketStream(io.TextIOBase):
+    """stdout/stderr de um comando no daemon: cada write vai para o cliente."""
+
+    def __init__(self, conn: socket.socket, name: str):
+        self.conn = conn
+        self.name = name
+        self.closed_by_client = False
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if text and not self.closed_by_client:
+            try:
+                _send(self.conn, {"stream": self.name, "data": text})
+            except OSError:
+                # Cliente saiu (Ctrl+C): o comando termina sem saída
+                self.closed_by_client = True
+        return len(text)
+
+
+def _read_message(conn: socket.socket) -> Optional[Dict[str, Any]]:
+    buffer = b""
+    while not buffer.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            return None
+        buffer += chunk
+    return json.loads(buffer)
+
+
+def _handle(conn: socket.socket) -> bool:
+    """Atende uma conexão; devolve False quando o cliente pede para encerrar o daemon."""
+    request = _read_message(conn)
+    if request is None:
+        return True
+    if request.get("command") == "stop":
+        _send(conn, {"exit": 0})
+        return False
+    if request.get("command") not in COMMANDS:
+        _send(conn, {"stream": "stderr", "data": f"❌ Comando desconhecido: {request.get('command')}\n"})
+        _send(conn, {"exit": 2})
+        return True
+
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    stdout, stderr = _SocketStream(conn, "stdout"), _SocketStream(conn, "stderr")
+    try:
+        os.environ.clear()
+        os.environ.update(request.get("env", {}))
+        os.chdir(request.get("cwd", saved_cwd))
+        # Como o load_dotenv() dos scripts: o .env de quem chamou, sem sobrescrever o ambiente
+        for key, value in dotenv_values(".env").items():
+            if value is not None:
+                os.environ.setdefault(key, value)
+        reset_run_state()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                code = run_command(request["command"], request.get("argv", []))
+            except Exception:
+                traceback.print_exc()
+                code = 1
+    finally:
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+    if not stdout.closed_by_client:
+        try:
+            _send(conn, {"exit": code})
+        except OSError:
+            pass
+    return True
+
+
+def warm_up():
+    """Importa os módulos pesados uma vez, antes do primeiro comando."""
+    import evaluate  # noqa: F401
+    import run_recall_test  # noqa: F401
+    import rate_limit  # noqa: F401
+    from langchain import hub  # noqa: F401
+    from langsmith import Client  # noqa: F401
+
+
+def serve(socket_path: Path) -> int:
+    """Daemon: atende os comandos, um de cada vez, até receber `stop`."""
+    if daemon_running(socket_path):
+        print(f"❌ Já existe um daemon em {socket_path}")
+        return 1
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        socket_path.unlink()
+
+    warm_up()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(socket_path))
+    server.listen()
+    print(f"✅ Daemon no ar em {socket_path} (pid {os.getpid()}); encerre com: python src/promptops.py stop")
+
+    try:
+        running = True
+        while running:
+            conn, _ = server.accept()
+            with conn:
+                running = _handle(conn)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        if socket_path.exists():
+            socket_path.unlink()
+    print("👋 Daemon encerrado")
+    return 0
+
+
+def _connect(socket_path: Path) -> Optional[socket.socket]:
+    if not socket_path.exists():
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(str(socket_path))
+    except OSError:
+        # Socket órfão de um daemon que morreu
+        conn.close()
+        return None
+    return conn
+
+
+def daemon_running(socket_path: Path) -> bool:
+    conn = _connect(socket_path)
+    if conn is None:
+        return False
+    conn.close()
+    return True
+
+
+def run_remote(conn: socket.socket, command: str, argv: List[str]) -> int:
+    """Envia o comando ao daemon e repassa a saída até o código de saída."""
+    with conn:
+        _send(conn, {"command": command, "argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)})
+        reader = conn.makefile("r", encoding="utf-8")
+        for line in reader:
+            message = json.loads(line)
+            if "exit" in message:
+                return message["exit"]
+            stream = sys.stderr if message["stream"] == "stderr" else sys.stdout
+            stream.write(message["data"])
+            stream.flush()
+    print("❌ Conexão com o daemon encerrada antes do fim do comando", file=sys.stderr)
+    return 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    parser = argparse.ArgumentParser(
+        description="CLI do projeto: pull, push, validate, eval e recall (com daemon opcional)",
+        usage="promptops.py [--socket SOCKET] [--no-daemon] {pull,push,validate,eval,recall,serve,stop} [opções do comando]",
+    )
+    parser.add_argument("--socket", default=None, help=f"Socket do daemon (default: PROMPTOPS_SOCKET ou {DEFAULT_SOCKET})")
+    parser.add_argument("--no-daemon", action="store_true", help="Executa no próprio processo mesmo com o daemon no ar")
+    parser.add_argument("command", choices=COMMANDS + ("serve", "stop"), help="Subcomando")
+    # As opções depois do subcomando são do script correspondente
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    options = parser.parse_args(argv)
+    socket_path = get_socket_path(options.socket)
+
+    if options.command == "serve":
+        return serve(socket_path)
+
+    conn = None if options.no_daemon else _connect(socket_path)
+    if options.command == "stop":
+        if conn is None:
+            print(f"⚠️  Nenhum daemon em {socket_path}")
+            return 1
+        with conn:
+            _send(conn, {"command": "stop"})
+            _read_message(conn)
+        print("✅ Daemon encerrado")
+        return 0
+
+    if conn is not None:
+        return run_remote(conn, options.command, options.args)
+    return run_command(options.command, options.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
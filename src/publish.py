@@ -0,0 +1,184 @@
+"""
+Publicação de uma execução local no LangSmith.
+
+No modo `evaluate.py --local` nada é enviado ao LangSmith durante a avaliação:
+o prompt vem do YAML, os exemplos do JSONL e os resultados vão para o journal
+(runs/<RUN_ID>.jsonl). Este módulo publica o journal depois, como um
+experimento ligado ao dataset:
+
+1. sincroniza o dataset (dataset_sync.py, só o que mudou);
+2. cria um projeto de experimento por prompt (`<prompt>-<RUN_ID>`);
+3. envia um run por exemplo (pergunta, resposta e referência) em lote;
+4. grava o score de cada métrica como feedback do run (em paralelo,
+   EVAL_PUBLISH_CONCURRENCY requisições, default: 8). Veredictos com erro
+   não são publicados (ficariam como 0.0 no experimento).
+
+Os ids de runs e feedbacks são derivados de (RUN_ID, prompt, exemplo,
+métrica), então repetir `--publish-run` depois de uma falha parcial envia só
+o que faltou, sem duplicar.
+
+`start_background_publish` dispara a publicação em um processo separado, então
+a avaliação termina sem esperar pelas APIs remotas.
+"""
+
+import os
+import sys
+import uuid
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dataset import read_dataset
+from dataset_sync import sync_dataset
+from journal import RunJournal, example_key
+from utils import bounded_map
+
+# Namespace dos uuid5 de runs e feedbacks publicados (ids estáveis entre tentativas)
+_PUBLISH_NAMESPACE = uuid.UUID("5d7c1c3e-8a6b-4f2e-9a51-3c0f6f1d2b47")
+
+
+def get_publish_concurrency() -> int:
+    """Requisições de feedback em paralelo (EVAL_PUBLISH_CONCURRENCY, default: 8)."""
+    try:
+        return max(1, int(os.getenv("EVAL_PUBLISH_CONCURRENCY", "8")))
+    except ValueError:
+        return 8
+
+
+def _prompts_in(journal: RunJournal) -> List[str]:
+    prompts = []
+    for record in journal.records():
+        if record.get("type") == "example" and record.get("prompt") not in prompts:
+            prompts.append(record["prompt"])
+    return prompts
+
+
+def _run_uuid(run_id: str, prompt: str, key: str) -> uuid.UUID:
+    return uuid.uuid5(_PUBLISH_NAMESPACE, f"{run_id}/{prompt}/{key}")
+
+
+def _feedback_uuid(run_uuid: uuid.UUID, metric: str) -> uuid.UUID:
+    return uuid.uuid5(_PUBLISH_NAMESPACE, f"{run_uuid}/{metric}")
+
+
+def _run_payload(project_name: str, record: Dict[str, Any], example_id: Any, run_id: uuid.UUID) -> Dict[str, Any]:
+    """Run (formato do batch_ingest_runs) de um exemplo avaliado."""
+    finished = datetime.fromisoformat(record["finished_at"]).astimezone(timezone.utc) if record.get("finished_at") else datetime.now(timezone.utc)
+    return {
+        "id": run_id,
+        "trace_id": run_id,
+        "dotted_order": f"{finished:%Y%m%dT%H%M%S%fZ}{run_id}",
+        "name": record["prompt"],
+        "run_type": "chain",
+        "session_name": project_name,
+        "reference_example_id": example_id,
+        "start_time": finished,
+        "end_time": finished,
+        "inputs": {"question": record.get("question", "")},
+        "outputs": {"answer": record.get("answer", ""), "reference": record.get("reference", "")},
+        "extra": {"metadata": {"example_key": record["example_key"]}},
+    }
+
+
+def publish_run(client: Any, run_id: str, dataset_name: str, jsonl_path: str, runs_dir: Optional[str] = None) -> Dict[str, int]:
+    """
+    Publica os resultados do journal `run_id` como experimentos no LangSmith.
+
+    Args:
+        client: langsmith.Client
+        run_id: Run ID da execução (runs/<run_id>.jsonl)
+        dataset_name: Dataset do LangSmith ao qual os experimentos ficam ligados
+        jsonl_path: JSONL local usado na avaliação (sincronizado antes)
+        runs_dir: Diretório dos journals (default: EVAL_RUNS_DIR ou runs)
+
+    Returns:
+        Dict prompt -> quantidade de exemplos publicados
+
+    Raises:
+        FileNotFoundError: Se o journal não existir
+    """
+    journal = RunJournal(run_id, runs_dir)
+    if not journal.exists():
+        raise FileNotFoundError(f"Journal não encontrado: {journal.path}")
+
+    counts = sync_dataset(client, dataset_name, read_dataset(jsonl_path))
+    print(f"   ✓ Dataset sincronizado: {counts['created']} novos, {counts['updated']} alterados, {counts['deleted']} removidos")
+
+    dataset = client.read_dataset(dataset_name=dataset_name)
+    example_ids = {example_key(example.inputs): example.id for example in client.list_examples(dataset_id=dataset.id)}
+
+    published = {}
+    for prompt in _prompts_in(journal):
+        records = list(journal.completed(prompt).values())
+        project_name = f"{prompt}-{run_id}"
+        client.create_project(
+            project_name,
+            reference_dataset_id=dataset.id,
+            metadata={"run_id": run_id, "prompt": prompt, "source": "evaluate.py --local"},
+            upsert=True,
+        )
+
+        # O que uma tentativa anterior já publicou não é reenviado
+        run_ids = [_run_uuid(run_id, prompt, record["example_key"]) for record in records]
+        existing_runs = {run.id for run in client.list_runs(project_name=project_name, select=["id"])}
+        existing_feedback = {feedback.id for feedback in client.list_feedback(run_ids=list(existing_runs))} if existing_runs else set()
+
+        runs = [
+            _run_payload(project_name, record, example_ids.get(record["example_key"]), run_uuid)
+            for run_uuid, record in zip(run_ids, records) if run_uuid not in existing_runs
+        ]
+        if runs:
+            client.batch_ingest_runs(create=runs)
+
+        feedback = []
+        errors = 0
+        for run_uuid, record in zip(run_ids, records):
+            for metric, result in (record.get("metrics") or {}).items():
+                if result.get("error"):
+                    errors += 1
+                    continue
+                feedback_id = _feedback_uuid(run_uuid, metric)
+                if feedback_id not in existing_feedback:
+                    feedback.append((run_uuid, metric, result, feedback_id))
+
+        def send(item):
+            run_uuid, metric, result, feedback_id = item
+            client.create_feedback(
+                run_uuid,
+                metric,
+                score=result.get("score"),
+                comment=result.get("reasoning"),
+                feedback_id=feedback_id,
+                trace_id=run_uuid,
+            )
+
+        for _ in bounded_map(send, feedback, get_publish_concurrency()):
+            pass
+
+        published[prompt] = len(records)
+        print(f"   ✓ {prompt}: {len(records)} exemplos publicados no experimento {project_name} ({len(runs)} runs e {len(feedback)} feedbacks enviados agora)")
+        if errors:
+            print(f"   ⚠️  {errors} veredictos com erro não publicados")
+
+    return published
+
+
+def start_background_publish(run_id: str, dataset_path: str, runs_dir: Optional[str] = None) -> Path:
+    """
+    Dispara `evaluate.py --publish-run` em um processo separado (não bloqueia).
+
+    Returns:
+        Caminho do log da publicação (runs/<run_id>.publish.log)
+    """
+    runs_dir = Path(runs_dir or os.getenv("EVAL_RUNS_DIR", "runs"))
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    log_path = runs_dir / f"{run_id}.publish.log"
+
+    command = [
+        sys.executable, str(Path(__file__).resolve().parent / "evaluate.py"),
+        "--publish-run", run_id, "--dataset", str(dataset_path),
+    ]
+    with open(log_path, "w", encoding="utf-8") as log:
+        subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+    return log_path
@@ -12,14 +12,17 @@ SIMPLIFICADO: Usa serialização nativa do LangChain para extrair prompts.
 import os
 import sys
 import json
+import argparse
 from datetime import date
 from pathlib import Path
+from typing import List, Optional
 from dotenv import load_dotenv
-from langsmith import Client
 from utils import save_yaml, check_env_vars, print_section_header
 
 load_dotenv()
 
+DEFAULT_PROMPTS = ["leonanluppi/bug_to_user_story_v1"]
+
 
 def _local_prompt_name(prompt_identifier: str) -> str:
     """Converte 'owner/repo' -> 'repo' para nome local."""
@@ -55,8 +58,9 @@ def _extract_chat_prompt_parts(prompt_obj) -> tuple[str, str]:
                     template = msg.prompt.template
                 elif hasattr(msg, "template"):
                     template = msg.template  # fallback
-                elif hasattr(msg, "content"):
-                    template = msg.content
+                elif hasattr(msg, "content") and isinstance(msg.content, str):
+                    # Mensagem literal (já renderizada): volta a ser template com as chaves escapadas
+                    template = msg.content.replace("{", "{{").replace("}", "}}")
 
                 template = (template or "").strip()
                 if not template:
@@ -110,19 +114,17 @@ def _build_yaml_entry(
     return entry
 
 
-def pull_prompts_from_langsmith():
+def pull_prompts_from_langsmith(prompts_to_pull: Optional[List[str]] = None, output_dir: str = "prompts"):
     required_vars = ["LANGSMITH_API_KEY"]
     if not check_env_vars(required_vars):
         return 1
 
+    from langsmith import Client
     client = Client()
 
-    # Prompts a puxar (pode expandir depois)
-    prompts_to_pull = [
-        "leonanluppi/bug_to_user_story_v1",
-    ]
+    prompts_to_pull = prompts_to_pull or DEFAULT_PROMPTS
 
-    prompts_dir = Path("prompts")
+    prompts_dir = Path(output_dir)
     prompts_dir.mkdir(parents=True, exist_ok=True)
 
     for prompt_identifier in prompts_to_pull:
@@ -156,8 +158,14 @@ def pull_prompts_from_langsmith():
     return 0
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Faz pull de prompts do LangSmith Hub para YAML local")
+    parser.add_argument("prompts", nargs="*", default=None,
+                        help=f"Prompts no formato owner/nome (default: {' '.join(DEFAULT_PROMPTS)})")
+    parser.add_argument("--output-dir", default="prompts", help="Diretório dos YAMLs (default: prompts)")
+    args = parser.parse_args(argv)
+
     print_section_header("PULL DE PROMPTS DO LANGSMITH")
 
     # Validação extra: evita rodar sem .env/.env.example
@@ -167,7 +175,7 @@ def main():
         return 1
 
     try:
-        return pull_prompts_from_langsmith()
+        return pull_prompts_from_langsmith(args.prompts, args.output_dir)
     except Exception as e:
         print(f"\n❌ Erro inesperado durante pull: {e}")
         return 1
@@ -15,15 +15,14 @@ import re
 import sys
 import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 from dotenv import load_dotenv
-from langchain import hub
-from langchain_core.prompts import (
-    ChatPromptTemplate,
-    SystemMessagePromptTemplate,
-    HumanMessagePromptTemplate,
-    PromptTemplate,
-)
-from utils import load_yaml, check_env_vars, print_section_header
+from utils import build_chat_prompt, check_env_vars, print_section_header
+from prompt_loader import load_prompt_file
+
+# langchain.hub só é importado no push (validação e erros saem sem carregá-lo)
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
 
 load_dotenv()
 
@@ -77,12 +76,15 @@ def validate_prompt(prompt_data: dict) -> tuple[bool, list]:
     return (len(errors) == 0, errors)
 
 
-def _build_chat_prompt_template(prompt_data: dict) -> ChatPromptTemplate:
+def _build_chat_prompt_template(prompt_data: dict) -> "ChatPromptTemplate":
     """
     Constrói um ChatPromptTemplate a partir dos dados do prompt.
     
     IMPORTANTE: Esta função apenas LÊ do prompt_data, não altera nada.
-    Os valores são copiados para criar o template.
+    A estrutura (prefixo estático do system_prompt primeiro, {bug_report} por
+    último) é a mesma do run_recall_test, ver utils.build_chat_prompt, mas o
+    system_prompt é publicado como template (não pré-renderizado), para que
+    chaves escapadas `{{...}}` continuem escapadas no Hub e no pull.
 
     Args:
         prompt_data: Dados do prompt com system_prompt e user_prompt
@@ -90,31 +92,7 @@ def _build_chat_prompt_template(prompt_data: dict) -> ChatPromptTemplate:
     Returns:
         ChatPromptTemplate configurado
     """
-    # Lê os valores originais (sem alterar o prompt_data)
-    system_prompt_text = prompt_data.get("system_prompt", "")
-    user_prompt_text = prompt_data.get("user_prompt", "")
-
-    # Normaliza strings (apenas para construção do template, não altera o original)
-    if isinstance(system_prompt_text, str):
-        system_prompt_text = system_prompt_text.strip()
-    if isinstance(user_prompt_text, str):
-        user_prompt_text = user_prompt_text.strip()
-
-    # Se não tiver user_prompt, usa um padrão mínimo
-    if not user_prompt_text:
-        user_prompt_text = "{bug_report}"
-
-    # Cria os templates
-    system_template = PromptTemplate.from_template(system_prompt_text)
-    human_template = PromptTemplate.from_template(user_prompt_text)
-
-    # Constrói o ChatPromptTemplate
-    messages = [
-        SystemMessagePromptTemplate(prompt=system_template),
-        HumanMessagePromptTemplate(prompt=human_template),
-    ]
-
-    return ChatPromptTemplate.from_messages(messages)
+    return build_chat_prompt(prompt_data, prerender_system=False)
 
 
 def push_prompt_to_langsmith(prompt_name: str, prompt_data: dict) -> bool:
@@ -159,6 +137,7 @@ def push_prompt_to_langsmith(prompt_name: str, prompt_data: dict) -> bool:
         print(f"   🏷️  Tags: {', '.join(tags[:5])}")
 
         # Faz push para o LangSmith Hub (público)
+        from langchain import hub
         commit_hash = hub.push(
             repo_full_name=repo_full_name,
             object=prompt_template,
@@ -180,7 +159,7 @@ def push_prompt_to_langsmith(prompt_name: str, prompt_data: dict) -> bool:
         return False
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Função principal"""
     parser = argparse.ArgumentParser(
         description="Faz push de prompts otimizados para o LangSmith Hub"
@@ -191,7 +170,7 @@ def main():
         default="prompts/bug_to_user_story_v2.yml",
         help="Caminho do arquivo YAML do prompt (default: prompts/bug_to_user_story_v2.yml)",
     )
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     print_section_header("PUSH DE PROMPTS PARA O LANGSMITH HUB")
 
@@ -211,7 +190,7 @@ def main():
         return 1
 
     # Carrega o arquivo YAML
-    yaml_data = load_yaml(str(prompt_file))
+    yaml_data = load_prompt_file(str(prompt_file))
     if not yaml_data:
         print(f"❌ Erro ao carregar arquivo: {prompt_file}")
         return 1
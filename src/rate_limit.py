@@ -0,0 +1,359 @@
+"""
+Rate limiting e retry para todas as chamadas a LLM.
+
+Cada combinação provider/modelo tem um limitador com dois token buckets:
+requisições por minuto (RPM) e tokens por minuto (TPM). Erros 429 / 5xx /
+timeouts são repetidos com backoff exponencial com jitter, respeitando o
+cabeçalho Retry-After quando o provider informa (com jitter e limitado a
+LLM_BACKOFF_MAX).
+
+O tempo esperado no limitador (throttle) é contabilizado separado da
+latência do modelo, para o resumo final mostrar onde o tempo foi gasto.
+
+Configuração via .env:
+- LLM_RPM / LLM_TPM: limites por provider/modelo (0 = sem limite, default)
+- LLM_MAX_RETRIES: tentativas extras em erros transitórios (default: 5)
+- LLM_BACKOFF_BASE / LLM_BACKOFF_MAX: backoff em segundos (default: 1 / 60);
+  LLM_BACKOFF_MAX também limita o Retry-After
+"""
+
+import os
+import re
+import time
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import Runnable
+
+from usage import get_usage_recorder
+from profiling import span
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {
+    "RateLimitError",
+    "APITimeoutError",
+    "APIConnectionError",
+    "InternalServerError",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "TooManyRequests",
+}
+
+
+class TokenBucket:
+    """
+    Token bucket com reserva: quem chega reserva a quantidade e recebe o tempo
+    que precisa esperar, então chamadas concorrentes são enfileiradas de forma justa.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Reserva `amount` e retorna quantos segundos esperar antes de usar."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        """Devolve (ou cobra, se negativo) a diferença entre o estimado e o real."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """Limites e estatísticas de um provider/modelo."""
+
+    def __init__(self, name: str, rpm: float = 0, tpm: float = 0):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "throttle_wait": 0.0,
+            "backoff_wait": 0.0,
+            "latency": 0.0,
+            "input_tokens": 0,
+            "cached_input_tokens": 0,
+            "output_tokens": 0,
+        }
+
+    def reserve(self, estimated_tokens: int) -> float:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        return wait
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        if self.tokens is not None and actual_tokens is not None:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def record(self, **increments: float):
+        with self._lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+
+_LIMITERS: Dict[Tuple[str, str], RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(provider: str, model: str) -> RateLimiter:
+    """Retorna o limitador compartilhado de um provider/modelo."""
+    key = (provider, model)
+    limiter = _LIMITERS.get(key)
+    if limiter is None:
+        with _LIMITERS_LOCK:
+            limiter = _LIMITERS.get(key)
+            if limiter is None:
+                limiter = RateLimiter(
+                    f"{provider}/{model}",
+                    rpm=float(os.getenv("LLM_RPM", "0")),
+                    tpm=float(os.getenv("LLM_TPM", "0")),
+                )
+                _LIMITERS[key] = limiter
+    return limiter
+
+
+def reset_rate_limit_stats():
+    """Zera as estatísticas dos limitadores (os buckets continuam valendo entre comandos)."""
+    with _LIMITERS_LOCK:
+        for limiter in _LIMITERS.values():
+            with limiter._lock:
+                for key, value in limiter.stats.items():
+                    limiter.stats[key] = type(value)()
+
+
+def _estimate_tokens(value: Any) -> int:
+    """Estimativa grosseira (~4 caracteres por token) do tamanho da requisição."""
+    if isinstance(value, str):
+        return len(value) // 4 + 1
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_tokens(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_estimate_tokens(item) for item in value.values())
+    content = getattr(value, "content", None)
+    if content is not None:
+        return _estimate_tokens(content)
+    if hasattr(value, "to_messages"):
+        return _estimate_tokens(value.to_messages())
+    return 1
+
+
+def _actual_tokens(response: Any) -> Optional[int]:
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("total_tokens")
+    return None
+
+
+def _token_usage(response: Any) -> Dict[str, int]:
+    """Tokens de entrada (total e lidos do cache de prefixo do provider) e de saída."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return {
+        "input_tokens": usage.get("input_tokens") or 0,
+        "cached_input_tokens": details.get("cache_read") or 0,
+        "output_tokens": usage.get("output_tokens") or 0,
+    }
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Erros transitórios: rate limit, sobrecarga, timeout ou falha de conexão."""
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    return _status_code(error) in RETRYABLE_STATUS
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return _status_code(error) == 429 or type(error).__name__ in ("RateLimitError", "ResourceExhausted", "TooManyRequests")
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """
+    Tempo de espera sugerido pelo provider, em segundos.
+
+    OpenAI: cabeçalhos retry-after-ms / retry-after (segundos ou data HTTP).
+    Google: "retry_delay { seconds: N }" ou "Please retry in Ns" na mensagem.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", str(error)) or \
+        re.search(r"retry in ([\d.]+)\s*s", str(error), re.IGNORECASE)
+    if match:
+        return float(match.group(1))
+    return None
+
+
+def _backoff_max() -> float:
+    return float(os.getenv("LLM_BACKOFF_MAX", "60"))
+
+
+def backoff_delay(attempt: int) -> float:
+    """Backoff exponencial com jitter completo: uniforme em [0, min(max, base * 2^attempt)]."""
+    base = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+    return random.uniform(0, min(_backoff_max(), base * (2 ** attempt)))
+
+
+def retry_after_delay(suggested: float) -> float:
+    """
+    Espera para um Retry-After do provider: até 20% de jitter acima do valor
+    sugerido (clientes limitados no mesmo instante não voltam juntos), sempre
+    limitada a LLM_BACKOFF_MAX.
+    """
+    return min(_backoff_max(), suggested * random.uniform(1.0, 1.2))
+
+
+class RateLimitedChatModel(Runnable):
+    """
+    Envolve um chat model do LangChain aplicando o RateLimiter e os retries.
+
+    Atributos não definidos aqui (model_name, temperature, http_client...) são
+    repassados ao modelo original.
+    """
+
+    def __init__(self, llm: Any, limiter: RateLimiter, max_retries: Optional[int] = None):
+        self.llm = llm
+        self.limiter = limiter
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "5")) if max_retries is None else max_retries
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def _next_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+
+        rate_limited = is_rate_limited(error)
+        suggested = retry_after(error)
+        delay = backoff_delay(attempt) if suggested is None else retry_after_delay(suggested)
+        self.limiter.record(retries=1, rate_limited=1 if rate_limited else 0, backoff_wait=delay)
+        print(f"      ⏳ {self.limiter.name}: {type(error).__name__}, nova tentativa em {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+        return delay
+
+    def invoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
+        estimated = _estimate_tokens(input)
+        attempt = 0
+        while True:
+            wait = self.limiter.reserve(estimated)
+            if wait > 0:
+                with span("llm.throttle"):
+                    time.sleep(wait)
+                self.limiter.record(throttle_wait=wait)
+
+            start = time.perf_counter()
+            try:
+                with span("llm.call", model=self.limiter.name):
+                    response = self.llm.invoke(input, config, **kwargs)
+            except Exception as e:
+                self.limiter.record(latency=time.perf_counter() - start)
+                delay = self._next_delay(e, attempt)
+                if delay is None:
+                    raise
+                with span("llm.backoff"):
+                    time.sleep(delay)
+                attempt += 1
+                continue
+
+            latency = time.perf_counter() - start
+            usage = _token_usage(response)
+            self.limiter.record(calls=1, latency=latency, **usage)
+            self.limiter.settle(estimated, _actual_tokens(response))
+            get_usage_recorder().record(self.limiter.name, latency=latency, **usage)
+            return response
+
+    async def ainvoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> Any:
+        estimated = _estimate_tokens(input)
+        attempt = 0
+        while True:
+            wait = self.limiter.reserve(estimated)
+            if wait > 0:
+                with span("llm.throttle"):
+                    await asyncio.sleep(wait)
+                self.limiter.record(throttle_wait=wait)
+
+            start = time.perf_counter()
+            try:
+                with span("llm.call", model=self.limiter.name):
+                    response = await self.llm.ainvoke(input, config, **kwargs)
+            except Exception as e:
+                self.limiter.record(latency=time.perf_counter() - start)
+                delay = self._next_delay(e, attempt)
+                if delay is None:
+                    raise
+                with span("llm.backoff"):
+                    await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            latency = time.perf_counter() - start
+            usage = _token_usage(response)
+            self.limiter.record(calls=1, latency=latency, **usage)
+            self.limiter.settle(estimated, _actual_tokens(response))
+            get_usage_recorder().record(self.limiter.name, latency=latency, **usage)
+            return response
+
+
+def format_rate_limit_stats() -> List[str]:
+    """Linhas de resumo (uma por provider/modelo usado) para o relatório final."""
+    lines = []
+    for limiter in _LIMITERS.values():
+        stats = limiter.stats
+        if not stats["calls"] and not stats["retries"]:
+            continue
+        lines.append(
+            f"{limiter.name}: {stats['calls']} chamadas | "
+            f"latência do modelo {stats['latency']:.1f}s | "
+            f"espera por throttle {stats['throttle_wait']:.1f}s | "
+            f"backoff {stats['backoff_wait']:.1f}s ({stats['retries']} retries, {stats['rate_limited']} × 429)"
+        )
+        if stats["input_tokens"]:
+            cached = stats["cached_input_tokens"]
+            lines.append(
+                f"{limiter.name}: tokens de entrada {stats['input_tokens']} "
+                f"({cached} em cache / {stats['input_tokens'] - cached} sem cache, "
+                f"{cached / stats['input_tokens'] * 100:.0f}% em cache) | saída {stats['output_tokens']}"
+            )
+    return lines
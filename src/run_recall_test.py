@@ -4,17 +4,18 @@ Teste de recall: roda o prompt local (YAML) contra o dataset JSONL e mede Recall
 Uso (na raiz do projeto, com venv ativado e dependências instaladas):
   python src/run_recall_test.py
 
-Configure o .env: LLM_PROVIDER=openai ou google; OPENAI_API_KEY ou GOOGLE_API_KEY.
+Configure o .env: LLM_PROVIDER=openai ou google; OPENAI_API_KEY ou GOOGLE_API_KEY
+(ou LLM_PROVIDER=fake/replay para rodar offline, ver fake_llm.py).
 Não depende do LangSmith: carrega o prompt de prompts/bug_to_user_story_v2.yml
 e o dataset de datasets/bug_to_user_story.jsonl.
 """
 
 import argparse
+import itertools
 import os
 import sys
-import json
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 # garantir que src está no path
 sys.path.insert(0, str(Path(__file__).resolve().parent))
@@ -22,49 +23,62 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 from dotenv import load_dotenv
 load_dotenv()
 
-from utils import load_yaml, check_env_vars, get_llm
+from utils import check_env_vars, get_llm
+from prompt_loader import compile_prompt, load_prompt_template
 from metrics import evaluate_f1_score
-from langchain_core.prompts import (
-    ChatPromptTemplate,
-    SystemMessagePromptTemplate,
-    HumanMessagePromptTemplate,
-    PromptTemplate,
-)
-
-
-def load_dataset_from_jsonl(jsonl_path: str) -> List[Dict[str, Any]]:
-    examples = []
-    with open(jsonl_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                examples.append(json.loads(line))
-    return examples
-
-
-def build_prompt_from_yaml(prompt_data: dict) -> ChatPromptTemplate:
-    system_prompt_text = (prompt_data.get("system_prompt") or "").strip()
-    user_prompt_text = (prompt_data.get("user_prompt") or "").strip() or "{bug_report}"
-    system_template = PromptTemplate.from_template(system_prompt_text)
-    human_template = PromptTemplate.from_template(user_prompt_text)
-    return ChatPromptTemplate.from_messages([
-        SystemMessagePromptTemplate(prompt=system_template),
-        HumanMessagePromptTemplate(prompt=human_template),
-    ])
-
-
-def main():
+from cache import get_judge_cache, get_generation_cache, format_cache_stats
+from generation import generate, configure_generation_cache
+from journal import RunJournal, new_run_id, example_key
+from usage import get_usage_recorder, usage_scope
+from profiling import get_profiler, span
+from dataset import count_in_background, read_dataset, parse_filters
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
+
+
+def build_prompt_from_yaml(prompt_data: dict) -> "ChatPromptTemplate":
+    """Mesmo template do push_prompts: prefixo estático primeiro, {bug_report} por último."""
+    return compile_prompt(prompt_data)
+
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description="Teste de recall: prompt local vs dataset JSONL")
     parser.add_argument("--limit", "-n", type=int, default=0, help="Máximo de exemplos a rodar (0 = todos)")
-    args = parser.parse_args()
+    parser.add_argument("--no-judge-cache", action="store_true", help="Ignora o cache local de veredictos dos juízes")
+    parser.add_argument("--no-gen-cache", action="store_true", help="Não lê nem grava o cache de respostas geradas")
+    parser.add_argument("--refresh-gen-cache", action="store_true", help="Gera todas as respostas de novo e sobrescreve o cache")
+    parser.add_argument("--resume", metavar="RUN_ID", default=None, help="Retoma a execução gravada em runs/<RUN_ID>.jsonl")
+    parser.add_argument("--filter", dest="filters", action="append", default=None, metavar="CHAVE=VALOR",
+                        help="Só exemplos cujo metadata bate (ex: complexity=medium). Pode repetir")
+    parser.add_argument("--prompt", default=None, help="YAML do prompt (usa o primeiro prompt do arquivo). Default: prompts/bug_to_user_story_v2.yml")
+    parser.add_argument("--dataset", default=None, help="Dataset JSONL (.jsonl, .jsonl.gz ou .jsonl.zst). Default: datasets/bug_to_user_story.jsonl")
+    parser.add_argument("--watch", action="store_true", help="Monitora o prompt e o dataset e reavalia só os exemplos afetados a cada alteração (ver watch.py)")
+    parser.add_argument("--trace", metavar="ARQUIVO", default=None, help="Exporta os spans da execução no formato Chrome Trace (chrome://tracing ou ui.perfetto.dev)")
+    args = parser.parse_args(argv)
+
+    try:
+        where = parse_filters(args.filters)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.no_judge_cache:
+        get_judge_cache().enabled = False
+    configure_generation_cache(disabled=args.no_gen_cache, refresh=args.refresh_gen_cache)
+
+    journal = RunJournal(args.resume or new_run_id())
+    if args.resume and not journal.exists():
+        print(f"❌ Journal não encontrado para --resume {args.resume}: {journal.path}")
+        return 1
 
     print("=" * 60)
     print("TESTE DE RECALL – Prompt local vs dataset JSONL")
     print("=" * 60)
 
     # Config
-    prompt_path = Path(__file__).resolve().parent.parent / "prompts" / "bug_to_user_story_v2.yml"
-    jsonl_path = Path(__file__).resolve().parent.parent / "datasets" / "bug_to_user_story.jsonl"
+    prompt_path = Path(args.prompt) if args.prompt else Path(__file__).resolve().parent.parent / "prompts" / "bug_to_user_story_v2.yml"
+    jsonl_path = Path(args.dataset) if args.dataset else Path(__file__).resolve().parent.parent / "datasets" / "bug_to_user_story.jsonl"
 
     if not prompt_path.exists():
         print(f"❌ Prompt não encontrado: {prompt_path}")
@@ -89,59 +103,108 @@ def main():
     print(f"✓ LLM: {provider} / {model}")
 
     # Carregar prompt do YAML
-    data = load_yaml(str(prompt_path))
-    if not data or "bug_to_user_story_v2" not in data:
-        print("❌ YAML inválido ou chave bug_to_user_story_v2 não encontrada")
+    prompt_key = None if args.prompt else "bug_to_user_story_v2"
+    prompt_template = load_prompt_template(str(prompt_path), prompt_key)
+    if prompt_template is None:
+        print(f"❌ YAML inválido ou chave {prompt_key or 'de prompt'} não encontrada")
         return 1
-    prompt_template = build_prompt_from_yaml(data["bug_to_user_story_v2"])
     print(f"\n✓ Prompt carregado: {prompt_path.name}")
 
-    # Carregar dataset
-    examples = load_dataset_from_jsonl(str(jsonl_path))
+    if args.watch:
+        from watch import RecallWatch, watch_recall
+        if args.resume:
+            print("❌ --watch não grava journal; não combine com --resume")
+            return 1
+        print(f"✓ Dataset: {jsonl_path.name}\n")
+        return watch_recall(RecallWatch(prompt_path, prompt_key, jsonl_path, llm, where=where, limit=args.limit))
+
+    # Dataset lido em streaming: cada exemplo roda assim que é lido
+    examples = read_dataset(str(jsonl_path), where)
     if args.limit and args.limit > 0:
-        examples = examples[: args.limit]
-        print(f"✓ Dataset (primeiros {len(examples)}): {jsonl_path.name}\n")
+        examples = itertools.islice(examples, args.limit)
+        print(f"✓ Dataset (primeiros {args.limit}): {jsonl_path.name}")
     else:
-        print(f"✓ Dataset carregado: {len(examples)} exemplos de {jsonl_path.name}\n")
-
-    chain = prompt_template | llm
-
-    recalls: List[float] = []
-    f1_scores: List[float] = []
-    precision_scores: List[float] = []
-
-    for i, ex in enumerate(examples, 1):
-        inputs = ex.get("inputs", {})
-        outputs = ex.get("outputs", {})
-        bug_report = inputs.get("bug_report", "")
-        reference = outputs.get("reference", "")
-        metadata = ex.get("metadata", {})
-        complexity = metadata.get("complexity", "?")
-
-        if not bug_report or not reference:
-            print(f"   [{i}] Ignorado (entrada/saída vazia)")
-            continue
-
-        print(f"   [{i}/{len(examples)}] Rodando (complexity={complexity})...", end=" ", flush=True)
-        try:
-            response = chain.invoke({"bug_report": bug_report})
-            answer = response.content if hasattr(response, "content") else str(response)
-        except Exception as e:
-            print(f"Erro: {e}")
-            continue
-
-        if not answer:
-            print("Resposta vazia")
-            continue
-
-        result = evaluate_f1_score(bug_report, answer, reference)
-        rec = result["recall"]
-        f1 = result["score"]
-        prec = result["precision"]
-        recalls.append(rec)
-        f1_scores.append(f1)
-        precision_scores.append(prec)
-        print(f"Recall: {rec:.2f}  F1: {f1:.2f}  Precision: {prec:.2f}")
+        print(f"✓ Dataset: {jsonl_path.name}")
+    if args.filters:
+        print(f"✓ Filtros de metadata: {', '.join(args.filters)}")
+
+    prompt_name = prompt_path.stem
+    completed = journal.completed(prompt_name)
+    print(f"✓ Run ID: {journal.run_id} (journal: {journal.path})")
+    if completed:
+        print(f"✓ Retomando: {len(completed)} exemplos já concluídos no journal")
+    print()
+
+    # Total contado em paralelo (sem segurar o streaming); com --filter fica só [i]
+    progress: Dict[str, int] = {}
+    if where is None:
+        count_in_background(str(jsonl_path), lambda total: progress.update(total=total), args.limit if args.limit and args.limit > 0 else None)
+
+    keys: List[str] = []
+    read_count = 0
+
+    try:
+        for i, ex in enumerate(examples, 1):
+            read_count = i
+            position = f"{i}/{progress['total']}" if "total" in progress else str(i)
+            inputs = ex.get("inputs", {})
+            outputs = ex.get("outputs", {})
+            bug_report = inputs.get("bug_report", "")
+            reference = outputs.get("reference", "")
+            metadata = ex.get("metadata", {})
+            complexity = metadata.get("complexity", "?")
+
+            if not bug_report or not reference:
+                print(f"   [{position}] Ignorado (entrada/saída vazia)")
+                continue
+
+            key = example_key(inputs)
+            keys.append(key)
+
+            if key in completed:
+                scores = completed[key]["scores"]
+                print(f"   [{position}] Journal: Recall: {scores['recall']:.2f}  F1: {scores['f1_score']:.2f}  Precision: {scores['precision']:.2f}")
+                continue
+
+            print(f"   [{position}] Rodando (complexity={complexity})...", end=" ", flush=True)
+            with usage_scope(example=key), span("example"):
+                try:
+                    answer = generate(prompt_template, {"bug_report": bug_report}, llm)
+                except Exception as e:
+                    print(f"Erro: {e}")
+                    continue
+
+                if not answer:
+                    print("Resposta vazia")
+                    continue
+
+                result = evaluate_f1_score(bug_report, answer, reference)
+            if result.get("error"):
+                # Sem veredicto válido: não vai para o journal nem para as médias
+                print(result["reasoning"])
+                continue
+            rec = result["recall"]
+            f1 = result["score"]
+            prec = result["precision"]
+            journal.record_example(prompt_name, key, i, {
+                "question": bug_report,
+                "answer": answer,
+                "reference": reference,
+                "metrics": {"f1_score": result},
+                "scores": {"recall": rec, "f1_score": f1, "precision": prec},
+            })
+            print(f"Recall: {rec:.2f}  F1: {f1:.2f}  Precision: {prec:.2f}")
+
+    except KeyboardInterrupt:
+        print(f"\n\n⚠️  Interrompido. Para continuar de onde parou: python src/run_recall_test.py --resume {journal.run_id}")
+        return 130
+
+    # Médias recalculadas a partir do journal (inclui exemplos de execuções anteriores)
+    completed = journal.completed(prompt_name)
+    journal_scores = [completed[key]["scores"] for key in keys if key in completed]
+    recalls = [scores["recall"] for scores in journal_scores]
+    f1_scores = [scores["f1_score"] for scores in journal_scores]
+    precision_scores = [scores["precision"] for scores in journal_scores]
 
     if not recalls:
         print("\n❌ Nenhum exemplo avaliado com sucesso.")
@@ -157,7 +220,26 @@ def main():
     print(f"  Recall médio:    {avg_recall:.4f}")
     print(f"  F1 médio:        {avg_f1:.4f}")
     print(f"  Precision média: {avg_precision:.4f}")
-    print(f"  Exemplos:        {len(recalls)}/{len(examples)}")
+    print(f"  Exemplos:        {len(recalls)}/{read_count}")
+    print(f"  {format_cache_stats('Cache de geração', get_generation_cache())}")
+    print(f"  {format_cache_stats('Cache de juízes', get_judge_cache())}")
+    from rate_limit import format_rate_limit_stats
+    for line in format_rate_limit_stats():
+        print(f"  LLM {line}")
+    usage = get_usage_recorder()
+    usage_lines = usage.format_table()
+    if usage_lines:
+        usage_path = journal.path.with_suffix(".usage.json")
+        usage.write_json(usage_path)
+        for line in usage_lines:
+            print(f"  {line}")
+        print(f"  Uso detalhado: {usage_path}")
+    profiler = get_profiler()
+    for line in profiler.format_table():
+        print(f"  {line}")
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+        print(f"  Trace: {args.trace}")
     avg_three = (avg_recall + avg_f1 + avg_precision) / 3
     # F1 já equilibra recall e precision; usar F1 como critério principal
     f1_ok = avg_f1 >= 0.9
@@ -0,0 +1,163 @@
+"""
+Avaliação adaptativa: parada antecipada com estatística sequencial.
+
+Em vez de avaliar o dataset inteiro para só então comparar a média com o
+limiar de aprovação (0.9), o modo adaptativo (`evaluate.py --adaptive`)
+avalia os exemplos em ordem aleatória e mantém, a cada exemplo, um intervalo
+de confiança para a média de cada métrica e para a média geral. A avaliação
+para assim que o intervalo da média geral fica inteiro acima (aprovado) ou
+abaixo (reprovado) do limiar.
+
+Os intervalos são sequências de confiança (válidas a qualquer momento, então
+olhar o resultado a cada exemplo e parar quando quiser não infla o erro),
+construídas por apostas ("hedged capital", Waudby-Smith & Ramdas, 2023)
+para variáveis em [0, 1]. Quanto mais longe do limiar e menor a variância,
+mais rápido o intervalo o exclui, então um prompt claramente reprovado custa
+poucos exemplos.
+
+Configuração: EVAL_SEQ_CONFIDENCE (default: 0.95) e EVAL_SEQ_MIN_EXAMPLES
+(default: 5, exemplos mínimos antes de decidir).
+"""
+
+import math
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+PASS = "aprovado"
+FAIL = "reprovado"
+
+# Resolução da grade de candidatos a média e fração máxima do capital apostada
+_GRID_STEPS = 100
+_MAX_BET = 0.75
+
+
+def get_confidence(value: Optional[float] = None) -> float:
+    """Nível de confiança: argumento explícito (--confidence) > EVAL_SEQ_CONFIDENCE > 0.95."""
+    if value is None:
+        try:
+            value = float(os.getenv("EVAL_SEQ_CONFIDENCE", "0.95"))
+        except ValueError:
+            value = 0.95
+    if not 0.5 <= value < 1:
+        raise ValueError(f"Confiança deve estar em [0.5, 1): {value}")
+    return value
+
+
+def get_min_examples(value: Optional[int] = None) -> int:
+    """Exemplos mínimos antes de decidir: argumento explícito > EVAL_SEQ_MIN_EXAMPLES > 5."""
+    if value is None:
+        try:
+            value = int(os.getenv("EVAL_SEQ_MIN_EXAMPLES", "5"))
+        except ValueError:
+            value = 5
+    return max(1, value)
+
+
+class ConfidenceSequence:
+    """
+    Sequência de confiança para a média de observações em [0, 1].
+
+    Para cada candidato m de uma grade, duas "carteiras" apostam que a média
+    está acima (K+) ou abaixo (K-) de m; m sai do intervalo quando uma delas
+    multiplica o capital por 2/alpha. O intervalo vale simultaneamente para
+    todos os n com probabilidade >= 1 - alpha.
+    """
+
+    def __init__(self, alpha: float, points: Iterable[float] = ()):
+        self.alpha = alpha
+        self.n = 0
+        self.total = 0.0
+        self.grid = sorted(set([i / _GRID_STEPS for i in range(_GRID_STEPS + 1)] + [float(m) for m in points]))
+        self._index = {m: j for j, m in enumerate(self.grid)}
+        self._log_plus = [0.0] * len(self.grid)
+        self._log_minus = [0.0] * len(self.grid)
+        # +1: m rejeitado por estar abaixo da média; -1: acima; 0: ainda no intervalo
+        self._rejected = [0] * len(self.grid)
+        self._log_barrier = math.log(2 / alpha)
+        self._log_term = math.log(2 / alpha)
+        self._sum_x = 0.0
+        self._sum_sq = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    def update(self, x: float):
+        x = min(1.0, max(0.0, float(x)))
+        t = self.n + 1
+
+        # Aposta previsível (só usa X_1..X_{t-1}): plug-in de variância
+        prev_var = (0.25 + self._sum_sq) / t
+        lam = math.sqrt(2 * self._log_term / (prev_var * t * math.log(1 + t)))
+
+        for j, m in enumerate(self.grid):
+            # A aposta é limitada para o capital nunca zerar (nos extremos x - m não muda de sinal)
+            self._log_plus[j] += math.log1p((min(lam, _MAX_BET / m) if m > 0 else lam) * (x - m))
+            self._log_minus[j] += math.log1p((min(lam, _MAX_BET / (1 - m)) if m < 1 else lam) * (m - x))
+            if not self._rejected[j]:
+                if self._log_plus[j] >= self._log_barrier:
+                    self._rejected[j] = 1
+                elif self._log_minus[j] >= self._log_barrier:
+                    self._rejected[j] = -1
+
+        self.n = t
+        self.total += x
+        self._sum_x += x
+        self._sum_sq += (x - (0.5 + self._sum_x) / (t + 1)) ** 2
+
+    def excludes(self, m: float) -> int:
+        """+1 se m já ficou abaixo do intervalo, -1 se acima, 0 se ainda está nele (m deve estar em `points`)."""
+        return self._rejected[self._index[float(m)]]
+
+    def interval(self) -> Tuple[float, float]:
+        remaining = [m for m, rejected in zip(self.grid, self._rejected) if not rejected]
+        if not remaining:
+            # Grade inteira rejeitada (a média está entre dois pontos da grade)
+            below = max((m for m, r in zip(self.grid, self._rejected) if r > 0), default=0.0)
+            above = min((m for m, r in zip(self.grid, self._rejected) if r < 0), default=1.0)
+            return below, above
+        return remaining[0], remaining[-1]
+
+
+class SequentialTest:
+    """
+    Teste sequencial da média geral contra o limiar de aprovação.
+
+    Recebe, a cada exemplo, a média geral do exemplo e os scores por métrica;
+    `decision` fica None enquanto o veredicto não estiver estatisticamente
+    decidido e vira PASS/FAIL (definitivo) quando o intervalo da média geral
+    deixa de conter o limiar.
+    """
+
+    def __init__(self, threshold: float = 0.9, confidence: float = 0.95, min_examples: int = 5):
+        self.threshold = threshold
+        self.confidence = confidence
+        self.min_examples = min_examples
+        self.overall = ConfidenceSequence(1 - confidence, points=[threshold])
+        self.metrics: Dict[str, ConfidenceSequence] = {}
+        self.decision: Optional[str] = None
+        self.decided_at: Optional[int] = None
+
+    @property
+    def n(self) -> int:
+        return self.overall.n
+
+    def update(self, overall: float, scores: Dict[str, float]) -> Optional[str]:
+        """Registra um exemplo e devolve o veredicto (None se ainda indefinido)."""
+        self.overall.update(overall)
+        for metric, score in scores.items():
+            self.metrics.setdefault(metric, ConfidenceSequence(1 - self.confidence)).update(score)
+
+        if self.decision is None and self.n >= self.min_examples:
+            side = self.overall.excludes(self.threshold)
+            if side > 0:
+                self.decision = PASS
+            elif side < 0:
+                self.decision = FAIL
+            if self.decision is not None:
+                self.decided_at = self.n
+        return self.decision
+
+    def format_interval(self) -> str:
+        low, high = self.overall.interval()
+        return f"média {self.overall.mean:.3f}, IC {self.confidence:.0%} [{low:.3f}, {high:.3f}]"
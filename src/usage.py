@@ -0,0 +1,220 @@
+"""
+Contabilidade de tokens, latência e custo de cada chamada a LLM.
+
+Toda chamada que passa pelo RateLimitedChatModel é registrada com o modelo,
+tokens de entrada (e quantos vieram do cache de prefixo do provider), tokens
+de saída, latência, origem (geração ou a métrica do juiz), o exemplo avaliado
+e, na avaliação em matriz, a combinação prompt × modelo. Origem, exemplo e
+combinação vêm de `usage_scope`, que usa contextvars e por isso funciona
+tanto com threads quanto com asyncio.
+
+O resumo é agregado por origem, por modelo, por exemplo, por combinação (com
+o detalhamento por exemplo de cada uma) e no total; aparece como tabela no
+fim da execução e é gravado em JSON (runs/<run_id>.usage.json).
+
+Preços (US$ por 1M tokens: entrada, entrada em cache, saída) têm defaults
+para os modelos suportados e podem ser sobrescritos via .env:
+LLM_PRICES='{"gpt-4o": [2.5, 1.25, 10.0]}'
+"""
+
+import os
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gemini-1.5-flash": (0.075, 0.01875, 0.30),
+    "gemini-1.5-pro": (1.25, 0.3125, 5.00),
+    "gemini-2.0-flash": (0.10, 0.025, 0.40),
+}
+
+_site: ContextVar[str] = ContextVar("usage_site", default="outros")
+_example: ContextVar[Optional[str]] = ContextVar("usage_example", default=None)
+_cell: ContextVar[Optional[str]] = ContextVar("usage_cell", default=None)
+
+
+@contextmanager
+def usage_scope(site: Optional[str] = None, example: Optional[str] = None, cell: Optional[str] = None) -> Iterator[None]:
+    """
+    Define a origem (ex: "geração", "f1_score"), o exemplo e/ou a combinação
+    (ex: "v2@openai:gpt-4o") das chamadas feitas dentro do bloco.
+
+    Escopos aninhados herdam o que não for informado (ex: o exemplo definido
+    pelo loop de avaliação vale para a geração e para cada juiz).
+    """
+    resets = []
+    if site is not None:
+        resets.append((_site, _site.set(site)))
+    if example is not None:
+        resets.append((_example, _example.set(example)))
+    if cell is not None:
+        resets.append((_cell, _cell.set(cell)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(resets):
+            var.reset(token)
+
+
+def load_prices() -> Dict[str, Tuple[float, float, float]]:
+    """Tabela de preços: defaults + LLM_PRICES (JSON) do .env."""
+    prices = dict(DEFAULT_PRICES)
+    raw = os.getenv("LLM_PRICES", "").strip()
+    if raw:
+        try:
+            for model, values in json.loads(raw).items():
+                prices[model] = tuple(float(v) for v in values)
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"⚠️  LLM_PRICES inválido, usando preços padrão: {e}")
+    return prices
+
+
+def _price_for(model: str, prices: Dict[str, Tuple[float, float, float]]) -> Optional[Tuple[float, float, float]]:
+    """Preço do modelo; nomes com sufixo de versão (gpt-4o-mini-2024-07-18) usam o prefixo mais longo."""
+    name = model.split("/", 1)[-1]
+    matches = [key for key in prices if name == key or name.startswith(key + "-")]
+    return prices[max(matches, key=len)] if matches else None
+
+
+def call_cost(model: str, input_tokens: int, cached_input_tokens: int, output_tokens: int,
+              prices: Optional[Dict[str, Tuple[float, float, float]]] = None) -> Optional[float]:
+    """Custo em US$ de uma chamada, ou None se o modelo não tiver preço conhecido."""
+    price = _price_for(model, prices if prices is not None else load_prices())
+    if price is None:
+        return None
+    input_price, cached_price, output_price = price
+    uncached = max(0, input_tokens - cached_input_tokens)
+    return (uncached * input_price + cached_input_tokens * cached_price + output_tokens * output_price) / 1_000_000
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "input_tokens": 0,
+        "cached_input_tokens": 0,
+        "output_tokens": 0,
+        "latency": 0.0,
+        "cost": 0.0,
+        "cost_known": True,
+    }
+
+
+def _add(totals: Dict[str, Any], call: Dict[str, Any]):
+    totals["calls"] += 1
+    for field in ("input_tokens", "cached_input_tokens", "output_tokens", "latency"):
+        totals[field] += call[field]
+    if call["cost"] is None:
+        totals["cost_known"] = False
+    else:
+        totals["cost"] += call["cost"]
+
+
+class UsageRecorder:
+    """Registro thread-safe das chamadas de uma execução."""
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._prices = load_prices()
+
+    def record(self, model: str, input_tokens: int, cached_input_tokens: int, output_tokens: int, latency: float):
+        """Registra uma chamada concluída (origem, exemplo e combinação vêm do usage_scope atual)."""
+        call = {
+            "site": _site.get(),
+            "example": _example.get(),
+            "cell": _cell.get(),
+            "model": model,
+            "input_tokens": input_tokens,
+            "cached_input_tokens": cached_input_tokens,
+            "output_tokens": output_tokens,
+            "latency": latency,
+            "cost": call_cost(model, input_tokens, cached_input_tokens, output_tokens, self._prices),
+        }
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Agregados por origem, por modelo, por exemplo, por combinação e total.
+
+        Chamadas feitas dentro de uma combinação entram em `by_cell[combinação]`
+        (total e `by_example` da combinação), não no `by_example` geral: o mesmo
+        exemplo avaliado por vários prompts/modelos tem um custo por combinação.
+        """
+        with self._lock:
+            calls = list(self.calls)
+
+        rollups: Dict[str, Dict[str, Dict[str, Any]]] = {"by_site": {}, "by_model": {}, "by_example": {}, "by_cell": {}}
+        total = _empty_totals()
+        for call in calls:
+            _add(rollups["by_site"].setdefault(call["site"], _empty_totals()), call)
+            _add(rollups["by_model"].setdefault(call["model"], _empty_totals()), call)
+            by_example = rollups["by_example"]
+            if call["cell"] is not None:
+                cell = rollups["by_cell"].setdefault(call["cell"], {"total": _empty_totals(), "by_example": {}})
+                _add(cell["total"], call)
+                by_example = cell["by_example"]
+            if call["example"] is not None:
+                _add(by_example.setdefault(call["example"], _empty_totals()), call)
+            _add(total, call)
+
+        return {"total": total, **rollups}
+
+    def format_table(self) -> List[str]:
+        """Tabela por origem (geração e cada métrica) + total, para o resumo final."""
+        summary = self.summary()
+        if not summary["total"]["calls"]:
+            return []
+
+        def row(name: str, totals: Dict[str, Any]) -> str:
+            cost = f"{totals['cost']:.4f}" if totals["cost_known"] else "—"
+            return (
+                f"{name:<22}{totals['calls']:>9}{totals['input_tokens']:>12}"
+                f"{totals['cached_input_tokens']:>12}{totals['output_tokens']:>10}"
+                f"{totals['latency']:>11.1f}s{cost:>12}"
+            )
+
+        lines = [f"{'Origem':<22}{'Chamadas':>9}{'Entrada':>12}{'(em cache)':>12}{'Saída':>10}{'Latência':>12}{'Custo US$':>12}"]
+        by_site = summary["by_site"]
+        for site in sorted(by_site, key=lambda name: -by_site[name]["input_tokens"]):
+            lines.append(row(site, by_site[site]))
+        lines.append(row("TOTAL", summary["total"]))
+
+        by_cell = summary["by_cell"]
+        examples = len(summary["by_example"]) + sum(len(cell["by_example"]) for cell in by_cell.values())
+        if examples and summary["total"]["cost_known"]:
+            lines.append(f"Custo médio por exemplo: US$ {summary['total']['cost'] / examples:.5f} ({examples} exemplos)")
+        if len(by_cell) > 1:
+            for label, cell in by_cell.items():
+                cell_examples = len(cell["by_example"])
+                if cell_examples and cell["total"]["cost_known"]:
+                    lines.append(
+                        f"   {label}: US$ {cell['total']['cost']:.4f} "
+                        f"(US$ {cell['total']['cost'] / cell_examples:.5f} por exemplo, {cell_examples} exemplos)"
+                    )
+        return lines
+
+    def write_json(self, path: Path):
+        """Grava o resumo (e a tabela de preços usada) em JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        report = {"prices_per_million": self._prices, **self.summary()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+
+_RECORDER = UsageRecorder()
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """Registro compartilhado do processo."""
+    return _RECORDER
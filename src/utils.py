@@ -5,7 +5,11 @@ Funções auxiliares para o projeto de otimização de prompts.
 import os
 import yaml
 import json
-from typing import Dict, Any, Optional
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -147,49 +151,138 @@ def validate_prompt_structure(prompt_data: Dict[str, Any]) -> tuple[bool, list]:
     return (len(errors) == 0, errors)
 
 
-def extract_json_from_response(response_text: str) -> Optional[Dict[str, Any]]:
+def build_chat_prompt(prompt_data: Dict[str, Any], prerender_system: bool = True):
     """
-    Extrai JSON de uma resposta de LLM que pode conter texto adicional.
+    Constrói o ChatPromptTemplate de um prompt do YAML (system_prompt + user_prompt).
+
+    A estrutura favorece o cache de prefixo dos providers (OpenAI e Gemini
+    reaproveitam o processamento de prefixos idênticos):
+    - system_prompt sem variáveis vira uma SystemMessage já renderizada, então
+      o prefixo é byte a byte igual em todas as chamadas;
+    - a parte dinâmica (user_prompt, default "{bug_report}") fica por último.
 
     Args:
-        response_text: Texto da resposta do LLM
+        prompt_data: Dados do prompt com system_prompt e user_prompt
+        prerender_system: False mantém o system_prompt como template (com as
+            chaves escapadas `{{...}}` preservadas), para o push ao Hub: o
+            artefato publicado volta igual ao YAML no pull
 
     Returns:
-        Dicionário extraído ou None se não encontrar JSON válido
+        ChatPromptTemplate com o prefixo estático primeiro
     """
-    try:
-        return json.loads(response_text)
-    except json.JSONDecodeError:
-        start = response_text.find('{')
-        end = response_text.rfind('}') + 1
-
-        if start != -1 and end > start:
-            try:
-                json_str = response_text[start:end]
-                return json.loads(json_str)
-            except json.JSONDecodeError:
-                pass
+    from langchain_core.messages import SystemMessage
+    from langchain_core.prompts import (
+        ChatPromptTemplate,
+        HumanMessagePromptTemplate,
+        PromptTemplate,
+        SystemMessagePromptTemplate,
+    )
+
+    system_prompt_text = (prompt_data.get("system_prompt") or "").strip()
+    user_prompt_text = (prompt_data.get("user_prompt") or "").strip() or "{bug_report}"
+
+    system_template = PromptTemplate.from_template(system_prompt_text)
+    human_template = PromptTemplate.from_template(user_prompt_text)
+
+    if system_template.input_variables:
+        print(
+            f"⚠️  system_prompt usa variáveis ({', '.join(system_template.input_variables)}): "
+            "o prefixo muda a cada exemplo e o cache de prefixo do provider não se aplica"
+        )
+    if system_template.input_variables or not prerender_system:
+        system_message = SystemMessagePromptTemplate(prompt=system_template)
+    else:
+        system_message = SystemMessage(content=system_template.format())
+
+    return ChatPromptTemplate.from_messages([
+        system_message,
+        HumanMessagePromptTemplate(prompt=human_template),
+    ])
+
+
+def static_prefix(messages: list) -> list:
+    """Conteúdo das mensagens de sistema iniciais (o prefixo comum a todos os exemplos)."""
+    prefix = []
+    for message in messages:
+        if getattr(message, "type", None) != "system":
+            break
+        prefix.append(message.content)
+    return prefix
 
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def parse_json_object(text: str, max_candidates: int = 8) -> Optional[Dict[str, Any]]:
+    """
+    Extrai o primeiro objeto JSON de uma resposta de LLM, em uma passada.
+
+    Decodifica a partir do primeiro "{" com raw_decode, que para no fim do
+    objeto: cercas de código (```json ... ```) e texto antes ou depois não
+    exigem recortar nem reparsear a string. Se o "{" não iniciar um JSON
+    válido (ex: chaves no meio do texto), tenta o próximo, até `max_candidates`.
+
+    Returns:
+        Dicionário extraído ou None se não houver objeto JSON válido
+    """
+    if not text:
+        return None
+
+    start = text.find("{")
+    for _ in range(max_candidates):
+        if start == -1:
+            return None
+        try:
+            return _JSON_DECODER.raw_decode(text, start)[0]
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)
     return None
 
 
-def get_llm(model: Optional[str] = None, temperature: float = 0.0):
+def extract_json_from_response(response_text: str) -> Optional[Dict[str, Any]]:
     """
-    Retorna uma instância de LLM configurada baseada no provider.
+    Extrai JSON de uma resposta de LLM que pode conter texto adicional.
 
     Args:
-        model: Nome do modelo (opcional, usa LLM_MODEL do .env por padrão)
-        temperature: Temperatura para geração (padrão: 0.0 para determinístico)
+        response_text: Texto da resposta do LLM
 
     Returns:
-        Instância de ChatOpenAI ou ChatGoogleGenerativeAI
+        Dicionário extraído ou None se não encontrar JSON válido
+    """
+    return parse_json_object(response_text)
 
-    Raises:
-        ValueError: Se provider não for suportado ou API key não configurada
+
+# Registro de clientes LLM do processo: (provider, modelo, temperatura) -> instância.
+# Cada combinação é construída uma única vez e compartilhada entre threads e tasks.
+_LLM_CLIENTS: Dict[Tuple[str, str, float], Any] = {}
+_LLM_CLIENTS_LOCK = threading.Lock()
+_HTTP_CLIENT = None
+
+
+def _get_http_client():
     """
-    provider = os.getenv('LLM_PROVIDER', 'openai').lower()
-    model_name = model or os.getenv('LLM_MODEL', 'gpt-4o-mini')
+    Retorna o httpx.Client compartilhado pelos modelos OpenAI (keep-alive + pool).
+
+    O cliente assíncrono fica a cargo do SDK (um por instância de modelo), pois
+    um httpx.AsyncClient fica preso ao event loop em que foi usado pela primeira vez.
+    """
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        import httpx
+
+        max_connections = int(os.getenv('LLM_HTTP_MAX_CONNECTIONS', '100'))
+        _HTTP_CLIENT = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=60.0,
+            ),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        )
+    return _HTTP_CLIENT
 
+
+def _build_llm(provider: str, model_name: str, temperature: float):
     if provider == 'openai':
         from langchain_openai import ChatOpenAI
 
@@ -203,7 +296,10 @@ def get_llm(model: Optional[str] = None, temperature: float = 0.0):
         return ChatOpenAI(
             model=model_name,
             temperature=temperature,
-            api_key=api_key
+            api_key=api_key,
+            http_client=_get_http_client(),
+            # Retries ficam com o RateLimitedChatModel (backoff + Retry-After)
+            max_retries=0
         )
 
     elif provider == 'google':
@@ -219,16 +315,110 @@ def get_llm(model: Optional[str] = None, temperature: float = 0.0):
         return ChatGoogleGenerativeAI(
             model=model_name,
             temperature=temperature,
-            google_api_key=api_key
+            google_api_key=api_key,
+            # Retries ficam com o RateLimitedChatModel (backoff + Retry-After)
+            max_retries=0
         )
 
+    elif provider in ('fake', 'replay'):
+        # Providers offline (sem rede nem API key), ver fake_llm.py
+        from fake_llm import FakeChatModel, ReplayChatModel
+
+        model_class = FakeChatModel if provider == 'fake' else ReplayChatModel
+        return model_class(model_name=model_name, temperature=temperature)
+
     else:
         raise ValueError(
             f"Provider '{provider}' não suportado.\n"
-            f"Use 'openai' ou 'google' na variável LLM_PROVIDER do .env"
+            f"Use 'openai', 'google', 'fake' ou 'replay' na variável LLM_PROVIDER do .env"
         )
 
 
+MODEL_PROVIDERS = ("openai", "google", "fake", "replay")
+
+# Tipos de LLM que aceitam os parâmetros da API da OpenAI (response_format,
+# prompt_cache_key); os providers offline (fake_llm.py) emulam essa API
+OPENAI_COMPATIBLE_TYPES = ("openai-chat", "fake-chat", "replay-chat")
+
+
+def parse_model_spec(spec: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Interpreta um modelo no formato `provider:modelo` (ex: google:gemini-1.5-flash).
+
+    Sem prefixo de provider conhecido, o texto todo é o nome do modelo e o
+    provider fica o do LLM_PROVIDER (ex: "gpt-4o" ou "ft:gpt-4o-mini:org::id").
+
+    Returns:
+        (provider ou None, modelo ou None)
+    """
+    if not spec:
+        return None, None
+    provider, sep, model = spec.partition(":")
+    provider = provider.strip().lower()
+    if provider == "gemini":
+        provider = "google"
+    if sep and provider in MODEL_PROVIDERS and model.strip():
+        return provider, model.strip()
+    return None, spec.strip()
+
+
+def get_llm(model: Optional[str] = None, temperature: float = 0.0, provider: Optional[str] = None):
+    """
+    Retorna uma instância de LLM configurada baseada no provider.
+
+    A instância é criada na primeira chamada e reutilizada nas seguintes
+    (mesmo provider, modelo e temperatura), preservando as conexões HTTP.
+    Todas as chamadas passam pelo rate limiter do provider/modelo
+    (ver rate_limit.py). Com LLM_RECORD=on as respostas reais são gravadas
+    no cassete do provider replay (ver fake_llm.py).
+
+    Args:
+        model: Nome do modelo (opcional, usa LLM_MODEL do .env por padrão)
+        temperature: Temperatura para geração (padrão: 0.0 para determinístico)
+        provider: openai, google, fake ou replay (opcional, usa LLM_PROVIDER do .env por padrão)
+
+    Returns:
+        ChatOpenAI ou ChatGoogleGenerativeAI envolvido em RateLimitedChatModel
+
+    Raises:
+        ValueError: Se provider não for suportado ou API key não configurada
+    """
+    provider = (provider or os.getenv('LLM_PROVIDER', 'openai')).lower()
+    model_name = model or os.getenv('LLM_MODEL', 'gpt-4o-mini')
+    key = (provider, model_name, float(temperature))
+
+    llm = _LLM_CLIENTS.get(key)
+    if llm is not None:
+        return llm
+
+    with _LLM_CLIENTS_LOCK:
+        llm = _LLM_CLIENTS.get(key)
+        if llm is None:
+            from rate_limit import RateLimitedChatModel, get_rate_limiter
+
+            chat_model = _build_llm(provider, model_name, temperature)
+            if provider in ('openai', 'google'):
+                from fake_llm import recording_enabled, get_cassette, RecordingChatModel
+
+                if recording_enabled():
+                    chat_model = RecordingChatModel(chat_model, get_cassette())
+
+            llm = RateLimitedChatModel(chat_model, get_rate_limiter(provider, model_name))
+            _LLM_CLIENTS[key] = llm
+
+    return llm
+
+
+def clear_llm_clients():
+    """Descarta os clientes LLM em cache (ex: após trocar variáveis de ambiente)."""
+    global _HTTP_CLIENT
+    with _LLM_CLIENTS_LOCK:
+        _LLM_CLIENTS.clear()
+        if _HTTP_CLIENT is not None:
+            _HTTP_CLIENT.close()
+            _HTTP_CLIENT = None
+
+
 def get_eval_llm(temperature: float = 0.0):
     """
     Retorna LLM configurado especificamente para avaliação (usa EVAL_MODEL).
@@ -241,3 +431,55 @@ def get_eval_llm(temperature: float = 0.0):
     """
     eval_model = os.getenv('EVAL_MODEL', 'gpt-4o')
     return get_llm(model=eval_model, temperature=temperature)
+
+
+def bounded_map(fn: Callable[[Any], Any], items: Iterable[Any], workers: int, max_pending: Optional[int] = None) -> Iterator[Any]:
+    """
+    Como ThreadPoolExecutor.map, mas consome `items` sob demanda.
+
+    No máximo `max_pending` itens (default: 2 × workers) ficam submetidos ao
+    mesmo tempo, então um iterável longo (ex: dataset lido em streaming) não é
+    materializado e o primeiro resultado sai antes da leitura terminar.
+    Os resultados saem na ordem de entrada. Se uma chamada falhar (ou o
+    consumidor parar antes do fim), os itens ainda não iniciados são
+    cancelados e a exceção sobe depois que os em andamento terminam.
+    """
+    max_pending = max_pending or workers * 2
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for item in items:
+                pending.append(executor.submit(fn, item))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def abounded_map(fn: Callable[[Any], Awaitable[Any]], items: Iterable[Any], max_pending: int) -> AsyncIterator[Any]:
+    """
+    Versão assíncrona de bounded_map: até `max_pending` corrotinas em andamento, resultados em ordem.
+
+    Se uma corrotina falhar (ou o consumidor parar antes do fim), as demais
+    em andamento são canceladas antes de a exceção subir.
+    """
+    pending = deque()
+
+    try:
+        for item in items:
+            pending.append(asyncio.ensure_future(fn(item)))
+            if len(pending) >= max_pending:
+                yield await pending.popleft()
+
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
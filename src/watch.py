@@ -0,0 +1,284 @@
+"""
+Modo watch do teste de recall (`run_recall_test.py --watch`).
+
+Monitora o YAML do prompt e o dataset e, a cada alteração salva, reavalia
+só os exemplos afetados:
+
+- cada linha do dataset tem uma impressão digital (mensagens renderizadas
+  pelo template + referência); linhas com a mesma impressão da rodada
+  anterior reaproveitam o resultado, sem chamar o LLM
+- as demais passam por geração e juiz, que ainda consultam os caches locais
+  (voltar uma edição, por exemplo, não gera chamadas novas)
+
+Edições que não mudam a renderização (description, tags, comentários do
+YAML) não reavaliam nada; uma linha nova ou alterada no dataset reavalia só
+essa linha. Mudar o system_prompt muda a renderização de todos os exemplos,
+e todos são reavaliados. As médias são reimpressas a cada exemplo.
+
+As alterações são detectadas com inotify no Linux (os diretórios dos
+arquivos são monitorados, então editores que salvam via rename funcionam);
+em outros sistemas, por polling de mtime/tamanho.
+"""
+
+import os
+import sys
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from cache import make_cache_key
+from dataset import Predicate, read_dataset
+from generation import generate
+from journal import example_key
+from metrics import evaluate_f1_score
+from prompt_loader import load_prompt_template
+from profiling import span
+from usage import usage_scope
+
+# Eventos do inotify (linux/inotify.h)
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_EVENT = struct.Struct("iIII")
+
+# Espera por mais eventos depois do primeiro (editores gravam em etapas)
+_DEBOUNCE = 0.2
+
+
+class FileWatcher:
+    """
+    Espera alterações em um conjunto de arquivos.
+
+    `wait(timeout)` bloqueia até algum arquivo mudar e devolve os caminhos
+    alterados (lista vazia se o timeout passar). `backend` indica se as
+    alterações vêm do inotify ou de polling.
+    """
+
+    def __init__(self, paths: Iterable[Path], interval: float = 0.5):
+        self.paths = [Path(path).resolve() for path in paths]
+        self.interval = interval
+        self._fd: Optional[int] = None
+        self._watches: Dict[int, Path] = {}
+        self._signatures = {path: self._signature(path) for path in self.paths}
+        if sys.platform.startswith("linux"):
+            self._init_inotify()
+        self.backend = "inotify" if self._fd is not None else "polling"
+
+    def _init_inotify(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                return
+            mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+            for directory in {path.parent for path in self.paths}:
+                wd = libc.inotify_add_watch(fd, str(directory).encode(), mask)
+                if wd < 0:
+                    os.close(fd)
+                    return
+                self._watches[wd] = directory
+            self._fd = fd
+        except (OSError, AttributeError):
+            # Sem libc/inotify (ex: musl antigo, sandbox): polling
+            self._fd = None
+
+    @staticmethod
+    def _signature(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _changed(self, update: bool = True) -> List[Path]:
+        """Arquivos cuja assinatura (mtime, tamanho) mudou desde a última consulta."""
+        changed = []
+        for path in self.paths:
+            signature = self._signature(path)
+            if signature != self._signatures[path]:
+                if update:
+                    self._signatures[path] = signature
+                changed.append(path)
+        return changed
+
+    def _drain(self, timeout: float) -> bool:
+        """Consome os eventos do inotify; True se algum for de um arquivo monitorado."""
+        relevant = False
+        while select.select([self._fd], [], [], _DEBOUNCE if relevant else timeout)[0]:
+            data = os.read(self._fd, 65536)
+            offset = 0
+            while offset < len(data):
+                wd, _, _, length = _IN_EVENT.unpack_from(data, offset)
+                name = data[offset + _IN_EVENT.size:offset + _IN_EVENT.size + length].rstrip(b"\0").decode(errors="replace")
+                offset += _IN_EVENT.size + length
+                if self._watches.get(wd, Path()) / name in self.paths:
+                    relevant = True
+            if not relevant:
+                return False
+        return relevant
+
+    def wait(self, timeout: Optional[float] = None) -> List[Path]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._fd is not None:
+                self._drain(3600 if remaining is None else remaining)
+            else:
+                time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+                if self._changed(update=False):
+                    time.sleep(_DEBOUNCE)
+            # A assinatura decide: eventos de escrita sem mudança (ou de outro arquivo) não disparam
+            changed = self._changed()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+class RecallWatch:
+    """
+    Rodadas incrementais do teste de recall.
+
+    `results` guarda, por impressão digital (template renderizado +
+    referência), os scores da última avaliação; `run()` reavalia só o que não
+    está lá e descarta o que saiu do dataset ou mudou.
+    """
+
+    def __init__(self, prompt_path: Path, prompt_key: Optional[str], dataset_path: Path, llm: Any,
+                 where: Optional[Predicate] = None, limit: int = 0, out: Callable[..., None] = print):
+        self.prompt_path = Path(prompt_path)
+        self.prompt_key = prompt_key
+        self.dataset_path = Path(dataset_path)
+        self.llm = llm
+        self.where = where
+        self.limit = limit
+        self.out = out
+        self.results: Dict[str, Dict[str, float]] = {}
+        self.rows: Dict[str, str] = {}
+        self.template_fingerprint: Optional[str] = None
+
+    def _read_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for row in read_dataset(str(self.dataset_path), self.where):
+            bug_report = row.get("inputs", {}).get("bug_report", "")
+            reference = row.get("outputs", {}).get("reference", "")
+            if bug_report and reference:
+                rows.append({"bug_report": bug_report, "reference": reference, "key": example_key(row.get("inputs", {}))})
+            if self.limit and len(rows) >= self.limit:
+                break
+        return rows
+
+    def _print_totals(self, fingerprints: List[str], prefix: str):
+        scores = [self.results[fp] for fp in fingerprints if fp in self.results]
+        self.out(
+            f"{prefix}Recall {_mean([s['recall'] for s in scores]):.4f} | "
+            f"F1 {_mean([s['f1_score'] for s in scores]):.4f} | "
+            f"Precision {_mean([s['precision'] for s in scores]):.4f} "
+            f"({len(scores)}/{len(fingerprints)} exemplos)"
+        )
+
+    def run(self) -> Optional[Dict[str, int]]:
+        """
+        Uma rodada: diff do template e do dataset, reavaliação do que mudou.
+
+        Returns:
+            Contagens da rodada (exemplos, reaproveitados, reavaliados, falhas)
+            ou None se o prompt ou o dataset não puderem ser lidos (ex: YAML
+            salvo pela metade), caso em que os resultados anteriores ficam
+        """
+        prompt_template = load_prompt_template(str(self.prompt_path), self.prompt_key)
+        if prompt_template is None:
+            self.out("⚠️  Prompt inválido; aguardando a próxima alteração")
+            return None
+        try:
+            rows = self._read_rows()
+        except (OSError, ValueError) as e:
+            self.out(f"⚠️  Dataset ilegível ({e}); aguardando a próxima alteração")
+            return None
+
+        # O que mudou desde a rodada anterior (só informativo: a decisão é pela impressão de cada linha)
+        template_fingerprint = make_cache_key(
+            "watch-template", [(m.type, m.content) for m in prompt_template.format_messages(bug_report="{bug_report}")]
+        )
+        rows_now = {row["key"]: row["reference"] for row in rows}
+        if self.template_fingerprint is not None:
+            added = len(rows_now.keys() - self.rows.keys())
+            removed = len(self.rows.keys() - rows_now.keys())
+            edited = sum(1 for key, reference in rows_now.items() if key in self.rows and self.rows[key] != reference)
+            prompt_change = "renderização mudou" if template_fingerprint != self.template_fingerprint else "sem mudança na renderização"
+            self.out(f"🔄 Prompt: {prompt_change} | dataset: +{added} ~{edited} -{removed} linhas")
+        self.template_fingerprint = template_fingerprint
+        self.rows = rows_now
+
+        pending = []
+        fingerprints = []
+        for row in rows:
+            with span("watch.render"):
+                messages = prompt_template.format_messages(bug_report=row["bug_report"])
+            fingerprint = make_cache_key("watch", [(m.type, m.content) for m in messages], row["reference"])
+            fingerprints.append(fingerprint)
+            if fingerprint not in self.results:
+                pending.append((fingerprint, row))
+
+        # Resultados de linhas que mudaram ou saíram não valem mais
+        current = set(fingerprints)
+        self.results = {fp: scores for fp, scores in self.results.items() if fp in current}
+        reused = len(rows) - len(pending)
+        self.out(f"   {len(rows)} exemplos: {reused} reaproveitados, {len(pending)} a reavaliar")
+
+        failures = 0
+        for i, (fingerprint, row) in enumerate(pending, 1):
+            scores = self._evaluate(prompt_template, row)
+            if scores is None:
+                failures += 1
+                self.out(f"   [{i}/{len(pending)}] falhou")
+                continue
+            self.results[fingerprint] = scores
+            self._print_totals(fingerprints, f"   [{i}/{len(pending)}] ")
+
+        self._print_totals(fingerprints, "📊 ")
+        return {"examples": len(rows), "reused": reused, "evaluated": len(pending) - failures, "failed": failures}
+
+    def _evaluate(self, prompt_template: Any, row: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        with usage_scope(example=row["key"]), span("example"):
+            try:
+                answer = generate(prompt_template, {"bug_report": row["bug_report"]}, self.llm)
+            except Exception as e:
+                self.out(f"   Erro na geração: {e}")
+                return None
+            if not answer:
+                return None
+            result = evaluate_f1_score(row["bug_report"], answer, row["reference"])
+        if result.get("error"):
+            self.out(f"   {result['reasoning']}")
+            return None
+        return {"recall": result["recall"], "f1_score": result["score"], "precision": result["precision"]}
+
+
+def watch_recall(session: RecallWatch, watcher: Optional[FileWatcher] = None) -> int:
+    """Roda uma vez e reavalia a cada alteração do prompt ou do dataset, até Ctrl+C."""
+    watcher = watcher or FileWatcher([session.prompt_path, session.dataset_path])
+    try:
+        session.run()
+        print(f"\n👀 Monitorando {session.prompt_path.name} e {session.dataset_path.name} ({watcher.backend}); Ctrl+C para sair\n")
+        while True:
+            changed = watcher.wait()
+            print(f"\n✏️  Alterado: {', '.join(path.name for path in changed)}")
+            session.run()
+    except KeyboardInterrupt:
+        print("\n👋 Watch encerrado")
+        return 0
+    finally:
+        watcher.close()
@@ -0,0 +1,158 @@
+"""
+Fakes compartilhados entre os testes.
+"""
+import sys
+import uuid
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.messages import AIMessage
+
+import metrics
+from cache import SQLiteCache
+
+
+class FakeJudge:
+    """Avaliador falso: devolve as respostas da fila e grava as mensagens e kwargs recebidos."""
+    _llm_type = "openai-chat"
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def invoke(self, messages, **kwargs):
+        self.calls.append((messages, kwargs))
+        return AIMessage(content=self.responses.pop(0))
+
+    async def ainvoke(self, messages, **kwargs):
+        return self.invoke(messages, **kwargs)
+
+
+@pytest.fixture
+def judge(tmp_path, monkeypatch):
+    """Instala um FakeJudge com as respostas dadas como avaliador de metrics (cache isolado)."""
+    monkeypatch.setattr(metrics, "get_judge_cache", lambda: SQLiteCache(str(tmp_path / "judge.sqlite"), 10**6))
+
+    def install(*responses):
+        fake = FakeJudge(*responses)
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: fake)
+        return fake
+    return install
+
+
+class FakeLLM:
+    """Gerador falso: responde com o nome do modelo e mede quantas chamadas ficam em voo."""
+
+    def __init__(self, model, tracker):
+        self.model_name = model
+        self.tracker = tracker
+
+    def invoke(self, messages, **kwargs):
+        with self.tracker["lock"]:
+            self.tracker["active"] += 1
+            self.tracker["peak"] = max(self.tracker["peak"], self.tracker["active"])
+        threading.Event().wait(0.01)
+        with self.tracker["lock"]:
+            self.tracker["active"] -= 1
+        return AIMessage(content=f"história de {self.model_name}")
+
+    async def ainvoke(self, messages, **kwargs):
+        return self.invoke(messages, **kwargs)
+
+
+class FakeClient:
+    """
+    Cliente LangSmith em memória, contando as requisições feitas.
+
+    Cobre datasets e exemplos (dataset_sync) e projetos, runs e feedback
+    (publish); `fail_feedback_after` faz o create_feedback falhar depois de N
+    feedbacks, como uma publicação interrompida.
+    """
+
+    def __init__(self):
+        self.datasets = {}
+        self.examples = {}
+        self.requests = []
+        self.projects = []
+        self.runs = []
+        self.feedback = {}
+        self.fail_feedback_after = None
+
+    def has_dataset(self, dataset_name):
+        self.requests.append("has_dataset")
+        return dataset_name in self.datasets
+
+    def read_dataset(self, dataset_name):
+        self.requests.append("read_dataset")
+        return self.datasets[dataset_name]
+
+    def create_dataset(self, dataset_name):
+        self.requests.append("create_dataset")
+        dataset = SimpleNamespace(id=uuid.uuid4(), name=dataset_name)
+        self.datasets[dataset_name] = dataset
+        return dataset
+
+    def list_examples(self, dataset_id):
+        self.requests.append("list_examples")
+        return [SimpleNamespace(id=i, **fields) for i, fields in self.examples.items()]
+
+    def create_examples(self, inputs, outputs, metadata, dataset_id):
+        self.requests.append("create_examples")
+        for i, o, m in zip(inputs, outputs, metadata):
+            self.examples[uuid.uuid4()] = {"inputs": i, "outputs": o, "metadata": m}
+
+    def update_examples(self, example_ids, inputs, outputs, metadata):
+        self.requests.append("update_examples")
+        for example_id, i, o, m in zip(example_ids, inputs, outputs, metadata):
+            self.examples[example_id] = {"inputs": i, "outputs": o, "metadata": m}
+
+    def delete_example(self, example_id):
+        self.requests.append("delete_example")
+        del self.examples[example_id]
+
+    def create_project(self, project_name, reference_dataset_id=None, metadata=None, upsert=False):
+        if not upsert and project_name in [name for name, _ in self.projects]:
+            raise RuntimeError("409 Conflict")
+        self.projects.append((project_name, reference_dataset_id))
+
+    def batch_ingest_runs(self, create=None):
+        self.requests.append("batch_ingest_runs")
+        self.runs.extend(create or [])
+
+    def list_runs(self, project_name=None, select=None):
+        return [SimpleNamespace(id=run["id"]) for run in self.runs if run["session_name"] == project_name]
+
+    def list_feedback(self, run_ids=None):
+        return [SimpleNamespace(id=feedback_id) for feedback_id, (run_id, _, _) in self.feedback.items() if run_id in run_ids]
+
+    def create_feedback(self, run_id, key, score=None, comment=None, feedback_id=None, trace_id=None):
+        if self.fail_feedback_after is not None and len(self.feedback) >= self.fail_feedback_after:
+            raise RuntimeError("503 Service Unavailable")
+        assert feedback_id not in self.feedback
+        self.feedback[feedback_id] = (run_id, key, score)
+
+
+@pytest.fixture
+def fake_client():
+    return FakeClient()
+
+
+@pytest.fixture
+def llm_tracker():
+    """Chamadas em voo (atual e pico) dos FakeLLM e modelos pedidos ao fake_llm."""
+    return {"lock": threading.Lock(), "active": 0, "peak": 0, "llms": []}
+
+
+@pytest.fixture
+def fake_llm(llm_tracker):
+    """Substituto do get_llm: registra o modelo pedido e devolve um FakeLLM."""
+    def get_llm(model=None):
+        llm_tracker["llms"].append(model)
+        return FakeLLM(model or "default", llm_tracker)
+    return get_llm
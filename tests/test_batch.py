@@ -0,0 +1,68 @@
+"""
+Testes do modo batch (src/batch.py) usando o substituto local em arquivos.
+"""
+import sys
+import json
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from batch import FileBatchBackend, make_request, process_file_batch, run_batch, to_openai_messages
+
+
+def echo_responder(messages, model, temperature):
+    if "falha" in messages[-1]["content"]:
+        raise RuntimeError("erro do provider")
+    return f"{model}: {messages[-1]['content']}"
+
+
+class TestFileBatchBackend:
+    def test_round_trip_returns_results_by_custom_id(self, tmp_path):
+        backend = FileBatchBackend(str(tmp_path), responder=echo_responder)
+        requests = [
+            make_request("gen-0", "gpt-4o-mini", [{"role": "user", "content": "a"}]),
+            make_request("gen-1", "gpt-4o-mini", [{"role": "user", "content": "falha"}]),
+        ]
+
+        results = run_batch(backend, requests, "teste", poll_interval=0)
+
+        assert results == {"gen-0": "gpt-4o-mini: a", "gen-1": None}
+
+    def test_waits_for_external_worker(self, tmp_path):
+        backend = FileBatchBackend(str(tmp_path))
+        batch_id = backend.submit([make_request("x", "m", [{"role": "user", "content": "b"}])])
+        assert backend.status(batch_id) == "in_progress"
+
+        process_file_batch(str(tmp_path), batch_id, echo_responder)
+
+        assert backend.status(batch_id) == "completed"
+        assert backend.results(batch_id) == {"x": "m: b"}
+        line = json.loads((tmp_path / batch_id / "input.jsonl").read_text(encoding="utf-8"))
+        assert line["url"] == "/v1/chat/completions"
+
+    def test_failed_batch_raises(self, tmp_path):
+        backend = FileBatchBackend(str(tmp_path))
+        batch_id = backend.submit([make_request("x", "m", [])])
+        (tmp_path / batch_id / "failed").touch()
+
+        class Fixed:
+            def submit(self, requests):
+                return batch_id
+
+            def status(self, _):
+                return backend.status(batch_id)
+
+        with pytest.raises(RuntimeError):
+            run_batch(Fixed(), [make_request("x", "m", [])], "teste", poll_interval=0)
+
+    def test_converts_langchain_messages(self):
+        messages = [SystemMessage(content="s"), HumanMessage(content="u")]
+        assert to_openai_messages(messages) == [
+            {"role": "system", "content": "s"},
+            {"role": "user", "content": "u"},
+        ]
@@ -0,0 +1,46 @@
+"""
+Testes do benchmark do harness (benchmarks/bench_harness.py).
+"""
+import sys
+import json
+import copy
+from pathlib import Path
+
+# Adicionar benchmarks ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+import bench_harness
+
+
+class TestBenchHarness:
+    def test_execucao_pequena_gera_json(self, tmp_path):
+        output = tmp_path / "result.json"
+        code = bench_harness.main([
+            "--sizes", "15", "--skip-startup", "--latency-ms", "0",
+            "--max-judge-examples", "3", "--output", str(output),
+        ])
+        result = json.loads(output.read_text(encoding="utf-8"))
+        entry = result["sizes"]["15"]
+
+        assert code == 0
+        assert entry["loaders"]["dataset_rows"] == 15
+        assert entry["evaluate"]["examples"] == 15 and entry["evaluate"]["scores_ok"]
+        assert entry["judges"]["combined"]["calls"] == 3 < entry["judges"]["per-metric"]["calls"]
+        assert {"example", "generation", "llm.call"} <= set(entry["evaluate"]["stages"])
+
+    def test_compare_aponta_regressoes(self):
+        baseline = {
+            "meta": {"commit": "a"},
+            "startup": {"import_evaluate_ms": 1000.0},
+            "sizes": {"15": {"evaluate": {"examples_per_sec": 100.0, "overhead_ms_per_example": 10.0}, "peak_rss_mb": 80.0}},
+        }
+        current = copy.deepcopy(baseline)
+        current["meta"]["commit"] = "b"
+        current["startup"]["import_evaluate_ms"] = 500.0
+        current["sizes"]["15"]["evaluate"]["examples_per_sec"] = 50.0
+
+        lines, regressions = bench_harness.compare(baseline, current, tolerance=0.1)
+
+        assert regressions == 1
+        assert any("exemplos/s" in line and "regressão" in line for line in lines)
+        assert any("import evaluate" in line and "melhora" in line for line in lines)
@@ -0,0 +1,63 @@
+"""
+Testes do cache local (src/cache.py).
+"""
+import sys
+from pathlib import Path
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from cache import SQLiteCache, make_cache_key
+
+
+class TestSQLiteCache:
+    def test_key_is_deterministic_and_content_sensitive(self):
+        """Mesmas partes geram a mesma chave; qualquer diferença muda a chave."""
+        assert make_cache_key("judge", "gpt-4o", 0.0, "prompt") == make_cache_key("judge", "gpt-4o", 0.0, "prompt")
+        assert make_cache_key("judge", "gpt-4o", 0.0, "prompt") != make_cache_key("judge", "gpt-4o", 0.0, "prompt ")
+        assert make_cache_key("judge", "gpt-4o", 0.0, "prompt") != make_cache_key("judge", "gpt-4o-mini", 0.0, "prompt")
+
+    def test_hit_and_miss_counters(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "c.sqlite"), max_bytes=1024 * 1024)
+        assert cache.get("k") is None
+        cache.set("k", {"score": 0.9, "reasoning": "ok"})
+        assert cache.get("k") == {"score": 0.9, "reasoning": "ok"}
+        assert cache.stats() == {"hits": 1, "misses": 1}
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "c.sqlite")
+        first = SQLiteCache(path, max_bytes=1024 * 1024)
+        first.set("k", {"score": 1.0})
+        first.close()
+
+        assert SQLiteCache(path, max_bytes=1024 * 1024).get("k") == {"score": 1.0}
+
+    def test_evicts_least_recently_used_when_over_size(self, tmp_path):
+        value = {"reasoning": "x" * 100}
+        cache = SQLiteCache(str(tmp_path / "c.sqlite"), max_bytes=300)
+
+        cache.set("a", value)
+        cache.set("b", value)
+        cache.get("a")  # "a" passa a ser o mais recente
+        cache.set("c", value)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == value
+        assert cache.get("c") == value
+
+    def test_disabled_cache_never_stores(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "c.sqlite"), max_bytes=1024, enabled=False)
+        cache.set("k", {"score": 1.0})
+        assert cache.get("k") is None
+        assert cache.stats() == {"hits": 0, "misses": 0}
+
+    def test_refresh_ignores_reads_but_writes(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "c.sqlite"), max_bytes=1024 * 1024)
+        cache.set("k", {"answer": "antiga"})
+
+        cache.refresh = True
+        assert cache.get("k") is None
+        cache.set("k", {"answer": "nova"})
+
+        cache.refresh = False
+        assert cache.get("k") == {"answer": "nova"}
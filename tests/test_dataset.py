@@ -0,0 +1,80 @@
+"""
+Testes da leitura de datasets em streaming (src/dataset.py).
+"""
+import sys
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from dataset import count_in_background, parse_filters, read_dataset
+
+ROWS = [
+    {"inputs": {"bug_report": "a"}, "metadata": {"domain": "saas", "complexity": "simple"}},
+    {"inputs": {"bug_report": "b"}, "metadata": {"domain": "crm", "complexity": "medium"}},
+    {"inputs": {"bug_report": "c"}, "metadata": {"domain": "SaaS", "complexity": "medium"}},
+]
+
+
+def write_jsonl(path, rows, opener=open):
+    with opener(path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n\n")
+    return str(path)
+
+
+class TestReadDataset:
+    def test_reads_plain_and_gzip(self, tmp_path):
+        plain = write_jsonl(tmp_path / "d.jsonl", ROWS)
+        compressed = write_jsonl(tmp_path / "d.jsonl.gz", ROWS, opener=gzip.open)
+
+        assert list(read_dataset(plain)) == ROWS
+        assert list(read_dataset(compressed)) == ROWS
+
+    def test_reads_zstd(self, tmp_path):
+        zstandard = pytest.importorskip("zstandard")
+        payload = "".join(json.dumps(row) + "\n" for row in ROWS).encode("utf-8")
+        path = tmp_path / "d.jsonl.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(payload))
+
+        assert list(read_dataset(str(path))) == ROWS
+
+    def test_is_lazy_and_reports_bad_line(self, tmp_path):
+        path = tmp_path / "d.jsonl"
+        path.write_text(json.dumps(ROWS[0]) + "\n{quebrado\n", encoding="utf-8")
+
+        examples = read_dataset(str(path))
+        assert next(examples) == ROWS[0]
+        with pytest.raises(ValueError, match="linha 2"):
+            next(examples)
+
+    def test_metadata_filters(self, tmp_path):
+        path = write_jsonl(tmp_path / "d.jsonl", ROWS)
+
+        medium_saas = parse_filters(["complexity=medium", "domain=saas"])
+        assert [row["inputs"]["bug_report"] for row in read_dataset(path, medium_saas)] == ["c"]
+
+        any_domain = parse_filters(["domain=crm,saas"])
+        assert len(list(read_dataset(path, any_domain))) == 3
+
+        with pytest.raises(ValueError):
+            parse_filters(["complexity"])
+
+
+class TestCountInBackground:
+    def test_counts_non_empty_lines_with_limit(self, tmp_path):
+        path = write_jsonl(tmp_path / "d.jsonl.gz", ROWS, opener=gzip.open)
+        totals = []
+
+        count_in_background(path, totals.append).join()
+        count_in_background(path, totals.append, limit=2).join()
+        assert totals == [3, 2]
+
+    def test_missing_file_is_left_to_the_reader(self, tmp_path):
+        totals = []
+        count_in_background(str(tmp_path / "nao_existe.jsonl"), totals.append).join()
+        assert totals == []
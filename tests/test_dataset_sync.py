@@ -0,0 +1,111 @@
+"""
+Testes da sincronização incremental do dataset (src/dataset_sync.py).
+"""
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from dataset import read_dataset
+from dataset_sync import sync_dataset, content_hash
+
+
+def rows(n, suffix=""):
+    return [
+        {"inputs": {"bug_report": f"bug {i}"}, "outputs": {"reference": f"história {i}{suffix}"}, "metadata": {"domain": "saas"}}
+        for i in range(n)
+    ]
+
+
+class TestSyncDataset:
+    def test_cria_dataset_em_lotes(self, fake_client):
+        client = fake_client
+        counts = sync_dataset(client, "ds", rows(250), chunk_size=100)
+
+        assert counts == {"created": 250, "updated": 0, "deleted": 0, "unchanged": 0}
+        assert client.requests.count("create_examples") == 3
+        assert len(client.examples) == 250
+
+    def test_sem_alteracoes_so_lista(self, fake_client):
+        client = fake_client
+        sync_dataset(client, "ds", rows(10))
+        client.requests.clear()
+
+        counts = sync_dataset(client, "ds", rows(10))
+        assert counts == {"created": 0, "updated": 0, "deleted": 0, "unchanged": 10}
+        assert client.requests == ["has_dataset", "read_dataset", "list_examples"]
+
+    def test_novas_alteradas_e_removidas(self, fake_client):
+        client = fake_client
+        sync_dataset(client, "ds", rows(5))
+
+        edited = rows(5)[1:]  # remove o exemplo 0
+        edited[0]["outputs"] = {"reference": "história 1 revisada"}
+        edited.append({"inputs": {"bug_report": "bug novo"}, "outputs": {"reference": "nova"}})
+
+        counts = sync_dataset(client, "ds", edited)
+        assert counts == {"created": 1, "updated": 1, "deleted": 1, "unchanged": 3}
+
+        remote = {e["inputs"]["bug_report"]: e for e in client.examples.values()}
+        assert set(remote) == {"bug 1", "bug 2", "bug 3", "bug 4", "bug novo"}
+        assert remote["bug 1"]["outputs"] == {"reference": "história 1 revisada"}
+        assert remote["bug 1"]["metadata"]["content_hash"] == content_hash(edited[0])
+        assert remote["bug 1"]["metadata"]["domain"] == "saas"
+
+        # Segunda passada: nada a fazer
+        assert sync_dataset(client, "ds", edited)["unchanged"] == 5
+
+    def test_exemplos_antigos_sem_hash_sao_atualizados_uma_vez(self, fake_client):
+        client = fake_client
+        client.create_dataset("ds")
+        for row in rows(3):
+            client.examples[uuid.uuid4()] = dict(row)
+
+        assert sync_dataset(client, "ds", rows(3))["updated"] == 3
+        assert sync_dataset(client, "ds", rows(3))["unchanged"] == 3
+
+    def test_duplicados_remotos_sao_removidos(self, fake_client):
+        client = fake_client
+        sync_dataset(client, "ds", rows(2))
+        duplicate = next(iter(client.examples.values()))
+        client.examples[uuid.uuid4()] = dict(duplicate)
+
+        counts = sync_dataset(client, "ds", rows(2))
+        assert counts["deleted"] == 1
+        assert len(client.examples) == 2
+
+    def test_arquivo_vazio_nao_apaga_o_dataset(self, fake_client, tmp_path):
+        sync_dataset(fake_client, "ds", rows(5))
+        empty = tmp_path / "vazio.jsonl"
+        empty.write_text("")
+        fake_client.requests.clear()
+
+        with pytest.raises(ValueError, match="nenhuma linha local"):
+            sync_dataset(fake_client, "ds", read_dataset(str(empty)))
+        # Tudo filtrado equivale a um arquivo vazio
+        with pytest.raises(ValueError, match="nenhuma linha local"):
+            sync_dataset(fake_client, "ds", (row for row in rows(5) if row["metadata"]["domain"] == "crm"))
+
+        assert "delete_example" not in fake_client.requests
+        assert len(fake_client.examples) == 5
+
+    def test_arquivo_vazio_nao_cria_dataset(self, fake_client):
+        with pytest.raises(ValueError):
+            sync_dataset(fake_client, "ds", [])
+        assert fake_client.datasets == {}
+
+    def test_remocao_em_massa_exige_flag(self, fake_client):
+        sync_dataset(fake_client, "ds", rows(10))
+
+        with pytest.raises(ValueError, match="removeria 7 de 10"):
+            sync_dataset(fake_client, "ds", rows(3))
+        assert "delete_example" not in fake_client.requests
+        assert len(fake_client.examples) == 10
+
+        counts = sync_dataset(fake_client, "ds", rows(3), allow_mass_delete=True)
+        assert counts["deleted"] == 7
+        assert len(fake_client.examples) == 3
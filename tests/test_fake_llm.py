@@ -0,0 +1,111 @@
+"""
+Testes dos providers offline fake e replay (src/fake_llm.py).
+"""
+import sys
+import json
+import asyncio
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+import metrics
+from cache import SQLiteCache
+from fake_llm import Cassette, FakeChatModel, RecordingChatModel, ReplayChatModel, ReplayMissError
+from utils import clear_llm_clients, get_llm
+
+MESSAGES = [SystemMessage(content="Regras fixas. " * 400), HumanMessage(content="bug X")]
+
+
+class TestFakeChatModel:
+    def test_resposta_deterministica_com_tokens(self):
+        llm = FakeChatModel(model_name="gpt-4o-mini", output_tokens=40)
+        first = llm.invoke(MESSAGES)
+        second = FakeChatModel(model_name="gpt-4o-mini", output_tokens=40).invoke(MESSAGES)
+
+        assert first.content == second.content
+        assert first.usage_metadata["output_tokens"] > 20
+        assert first.usage_metadata["input_tokens"] > 1000
+        assert llm.invoke([HumanMessage(content="outro bug")]).content != first.content
+
+    def test_latencia_lognormal_configuravel(self):
+        llm = FakeChatModel(latency_ms=100, latency_sigma=0.5)
+        latencies = sorted(llm._respond([HumanMessage(content=f"bug {i}")])[1] for i in range(201))
+        assert 0.07 < latencies[100] < 0.14
+        assert latencies[0] < latencies[100] < latencies[-1]
+
+    def test_simula_cache_de_prefixo(self):
+        llm = FakeChatModel()
+        first = llm.invoke(MESSAGES, prompt_cache_key="k")
+        second = llm.invoke(MESSAGES, prompt_cache_key="k")
+
+        assert first.usage_metadata["input_token_details"]["cache_read"] == 0
+        cached = second.usage_metadata["input_token_details"]["cache_read"]
+        assert cached >= 1024 and cached % 128 == 0
+
+    def test_cache_de_prefixo_entre_threads(self):
+        llm = FakeChatModel()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            responses = list(executor.map(lambda _: llm.invoke(MESSAGES, prompt_cache_key="k"), range(16)))
+
+        misses = [r for r in responses if r.usage_metadata["input_token_details"]["cache_read"] == 0]
+        assert len(misses) == 1
+
+    def test_prompt_com_json_nao_vira_juiz(self):
+        llm = FakeChatModel()
+        response = llm.invoke([HumanMessage(content="A API devolve um JSON inválido")])
+        judge = llm.invoke([HumanMessage(content="bug X")], response_format={"type": "json_object"})
+
+        assert not response.content.startswith("{")
+        assert "score" in json.loads(judge.content)
+
+    def test_juiz_recebe_json_valido_pelo_schema(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(metrics, "get_judge_cache", lambda: SQLiteCache(str(tmp_path / "judge.sqlite"), 10**6))
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        clear_llm_clients()
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: get_llm("gpt-4o", provider="fake"))
+
+        result = metrics.evaluate_metric("f1_score", "q", "a", "r")
+        combined = metrics.evaluate_combined("q", "a", "r", ["f1_score", "clarity"])
+        clear_llm_clients()
+
+        assert "error" not in result and 0.7 <= result["precision"] <= 1.0
+        assert "error" not in combined["clarity"]
+
+    def test_juiz_sem_saida_estruturada(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(metrics, "get_judge_cache", lambda: SQLiteCache(str(tmp_path / "judge.sqlite"), 10**6))
+        monkeypatch.setenv("JUDGE_STRUCTURED_OUTPUT", "off")
+        clear_llm_clients()
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: get_llm("gpt-4o", provider="fake"))
+
+        result = metrics.evaluate_metric("clarity", "q", "a", "r")
+        clear_llm_clients()
+
+        assert "error" not in result and 0.7 <= result["score"] <= 1.0
+
+
+class TestCassette:
+    def test_grava_e_reproduz(self, tmp_path):
+        cassette = Cassette(str(tmp_path / "cassette.jsonl"))
+        recorder = RecordingChatModel(FakeChatModel(model_name="gpt-4o-mini"), cassette)
+        recorded = recorder.invoke(MESSAGES)
+        asyncio.run(recorder.ainvoke([HumanMessage(content="async")]))
+
+        replay = ReplayChatModel(model_name="gpt-4o-mini", cassette=Cassette(cassette.path), latency_scale=0)
+        assert len(replay.cassette) == 2
+        replayed = replay.invoke(MESSAGES)
+        assert replayed.content == recorded.content
+        assert replayed.usage_metadata["output_tokens"] == recorded.usage_metadata["output_tokens"]
+
+    def test_requisicao_fora_do_cassete(self, tmp_path):
+        cassette = Cassette(str(tmp_path / "vazio.jsonl"))
+        with pytest.raises(ReplayMissError):
+            ReplayChatModel(model_name="gpt-4o", cassette=cassette).invoke(MESSAGES)
+
+        fallback = ReplayChatModel(model_name="gpt-4o", cassette=cassette, missing="fake").invoke(MESSAGES)
+        assert fallback.content
@@ -0,0 +1,94 @@
+"""
+Testes da geração com cache de prefixo (src/generation.py).
+"""
+import sys
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from langchain_openai import ChatOpenAI
+
+import generation
+from cache import SQLiteCache
+from rate_limit import RateLimitedChatModel, RateLimiter, format_rate_limit_stats
+from utils import build_chat_prompt
+
+PROMPT_DATA = {"system_prompt": "Regras fixas {{com chaves}}.\n" * 50, "user_prompt": "{bug_report}"}
+
+
+@pytest.fixture
+def openai_llm(tmp_path, monkeypatch):
+    """ChatOpenAI real com transporte HTTP falso, que grava o corpo das requisições."""
+    monkeypatch.setattr(generation, "get_generation_cache", lambda: SQLiteCache(str(tmp_path / "gen.sqlite"), 10**6))
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={
+            "id": "x", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+            "usage": {"prompt_tokens": 1200, "completion_tokens": 10, "total_tokens": 1210,
+                      "prompt_tokens_details": {"cached_tokens": 1024}},
+        })
+
+    llm = ChatOpenAI(model="gpt-4o-mini", api_key="sk-test", max_retries=0,
+                     http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    limiter = RateLimiter("openai/teste")
+    return RateLimitedChatModel(llm, limiter), limiter, bodies
+
+
+class TestPromptPrefixCache:
+    def test_static_system_prompt_is_prerendered_and_dynamic_part_is_last(self):
+        messages = build_chat_prompt(PROMPT_DATA).format_messages(bug_report="bug X")
+
+        assert [m.type for m in messages] == ["system", "human"]
+        assert messages[0].content.startswith("Regras fixas {com chaves}.")
+        assert messages[-1].content == "bug X"
+
+    def test_same_prompt_cache_key_for_every_example(self, openai_llm, monkeypatch):
+        llm, limiter, bodies = openai_llm
+        template = build_chat_prompt(PROMPT_DATA)
+
+        generation.generate(template, {"bug_report": "a"}, llm)
+        generation.generate(template, {"bug_report": "b"}, llm)
+
+        keys = {body["prompt_cache_key"] for body in bodies}
+        assert len(bodies) == 2 and len(keys) == 1
+
+        monkeypatch.setenv("OPENAI_PROMPT_CACHE_KEY", "off")
+        generation.generate(template, {"bug_report": "c"}, llm)
+        assert "prompt_cache_key" not in bodies[-1]
+
+    def test_reports_cached_input_tokens(self, openai_llm, monkeypatch):
+        llm, limiter, _ = openai_llm
+        monkeypatch.setattr("rate_limit._LIMITERS", {("openai", "teste"): limiter})
+
+        generation.generate(build_chat_prompt(PROMPT_DATA), {"bug_report": "a"}, llm)
+
+        assert limiter.stats["input_tokens"] == 1200
+        assert limiter.stats["cached_input_tokens"] == 1024
+        assert any("1024 em cache / 176 sem cache" in line for line in format_rate_limit_stats())
+
+
+class TestGenerationCacheKey:
+    def test_fake_nao_le_respostas_do_provider_real(self, openai_llm):
+        from fake_llm import FakeChatModel
+
+        llm, _, bodies = openai_llm
+        template = build_chat_prompt(PROMPT_DATA)
+        assert generation.generate(template, {"bug_report": "a"}, llm) == "ok"
+
+        # Mesmo model_name e temperatura do ChatOpenAI, outro provider
+        fake = FakeChatModel(model_name="gpt-4o-mini", temperature=0.7)
+        assert fake.temperature == llm.temperature
+        answer = generation.generate(template, {"bug_report": "a"}, fake)
+
+        assert answer != "ok"
+        # E a resposta sintética também não volta para o provider real
+        assert generation.generate(template, {"bug_report": "a"}, llm) == "ok"
+        assert len(bodies) == 1
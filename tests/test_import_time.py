@@ -0,0 +1,112 @@
+"""
+Orçamento de import dos scripts (python -X importtime).
+
+LangChain, LangSmith e os SDKs dos providers só podem ser importados no
+caminho que os usa. Essa checagem roda sempre, junto com um orçamento
+relativo folgado: importar um script custa no máximo RELATIVE_BUDGET vezes
+o startup do interpretador puro, medido na mesma máquina. O orçamento em
+ms, mais apertado, depende da carga da máquina e só é verificado com
+IMPORT_TIME_BUDGET=on (IMPORT_TIME_BUDGET_SCALE multiplica os limites em
+máquinas lentas). O benchmark do harness mede o startup a cada execução.
+"""
+import os
+import sys
+import time
+import subprocess
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+SRC = ROOT / "src"
+
+HEAVY_MODULES = ("langchain", "langchain_core", "langchain_openai", "langchain_google_genai", "langsmith", "openai")
+
+# Import cumulativo de cada módulo (ms): ~150ms medidos, contra ~1100ms com os imports no topo
+BUDGETS_MS = {
+    "evaluate": 500,
+    "push_prompts": 400,
+    "pull_prompts": 400,
+    "run_recall_test": 400,
+    "metrics": 400,
+    "promptops": 200,
+}
+
+# Import dos scripts / startup do interpretador: ~3x medidos, ~20x com LangChain no topo
+RELATIVE_BUDGET = 8
+
+
+def _importtime(args, env=None):
+    """Executa python -X importtime e devolve ({módulo: µs cumulativos}, returncode)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, **(env or {})},
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules, completed.returncode
+
+
+def _heavy(modules):
+    return sorted(name for name in modules if name.split(".")[0] in HEAVY_MODULES)
+
+
+def _import_module(module):
+    return _importtime(["-c", f"import sys; sys.path.insert(0, {str(SRC)!r}); import {module}"])
+
+
+def _startup_seconds(code, runs=3):
+    """Menor tempo de parede de `python -c code` em algumas execuções (descarta picos de carga)."""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_import_sem_langchain(module):
+    modules, code = _import_module(module)
+    assert code == 0
+    assert _heavy(modules) == []
+
+
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_import_dentro_do_orcamento_relativo(module):
+    bare = _startup_seconds("pass")
+    imported = _startup_seconds(f"import sys; sys.path.insert(0, {str(SRC)!r}); import {module}")
+
+    assert imported < bare * RELATIVE_BUDGET, f"{module}: {imported * 1000:.0f}ms contra {bare * 1000:.0f}ms do interpretador puro"
+
+
+@pytest.mark.skipif(os.getenv("IMPORT_TIME_BUDGET", "off").lower() != "on", reason="orçamento em ms só com IMPORT_TIME_BUDGET=on")
+@pytest.mark.parametrize("module", sorted(BUDGETS_MS))
+def test_import_dentro_do_orcamento(module):
+    modules, code = _import_module(module)
+    scale = float(os.getenv("IMPORT_TIME_BUDGET_SCALE", "1"))
+
+    assert code == 0
+    assert modules[module] / 1000 < BUDGETS_MS[module] * scale
+
+
+def test_help_do_evaluate_nao_importa_langchain():
+    modules, code = _importtime([str(SRC / "evaluate.py"), "--help"])
+    assert code == 0
+    assert _heavy(modules) == []
+
+
+def test_push_com_prompt_invalido_sai_sem_importar_o_hub(tmp_path):
+    prompt = tmp_path / "invalido.yml"
+    prompt.write_text("invalido:\n  description: 'x'\n  system_prompt: 'TODO: escrever'\n", encoding="utf-8")
+
+    modules, code = _importtime(
+        [str(SRC / "push_prompts.py"), str(prompt)],
+        env={"LANGSMITH_API_KEY": "x", "USERNAME_LANGSMITH_HUB": "x"},
+    )
+    assert code == 1
+    assert _heavy(modules) == []
@@ -0,0 +1,65 @@
+"""
+Testes do journal de execuções (src/journal.py).
+"""
+import sys
+from pathlib import Path
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import pytest
+
+from journal import RunJournal, example_key, in_shard, merge_journals, parse_shard, shard_run_id
+
+
+class TestRunJournal:
+    def test_example_key_depends_only_on_inputs(self):
+        assert example_key({"bug_report": "a"}) == example_key({"bug_report": "a"})
+        assert example_key({"bug_report": "a"}) != example_key({"bug_report": "b"})
+
+    def test_completed_filters_by_prompt(self, tmp_path):
+        journal = RunJournal("run-1", runs_dir=str(tmp_path))
+        journal.record_example("v1", "k1", 1, {"scores": {"f1_score": 0.5}})
+        journal.record_example("v2", "k1", 1, {"scores": {"f1_score": 0.9}})
+
+        assert journal.completed("v2")["k1"]["scores"] == {"f1_score": 0.9}
+        assert set(journal.completed("v1")) == {"k1"}
+
+    def test_resume_reads_previous_run_and_ignores_truncated_line(self, tmp_path):
+        journal = RunJournal("run-1", runs_dir=str(tmp_path))
+        journal.record_example("v2", "k1", 1, {"scores": {"f1_score": 0.9}})
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write('{"type": "example", "prompt": "v2", "example_ke')  # escrita interrompida
+
+        resumed = RunJournal("run-1", runs_dir=str(tmp_path))
+        assert resumed.exists()
+        assert list(resumed.completed("v2")) == ["k1"]
+
+
+class TestShards:
+    def test_parse_shard(self):
+        assert parse_shard("2/4") == (2, 4)
+        for value in ("0/4", "5/4", "a/b", "3"):
+            with pytest.raises(ValueError):
+                parse_shard(value)
+
+    def test_shards_partition_examples(self):
+        keys = [example_key({"bug_report": str(i)}) for i in range(200)]
+        assigned = [[key for key in keys if in_shard(key, (i, 4))] for i in range(1, 5)]
+
+        assert sorted(sum(assigned, [])) == sorted(keys)
+        assert all(assigned)
+
+    def test_merge_combines_shard_journals(self, tmp_path):
+        for shard, keys in (((1, 2), ["a", "b"]), ((2, 2), ["c"])):
+            journal = RunJournal(shard_run_id("ci", shard), runs_dir=str(tmp_path))
+            journal.record_plan("v2", keys, shard)
+            for index, key in enumerate(keys[:1], 1):
+                journal.record_example("v2", key, index, {"scores": {"f1_score": 1.0}})
+
+        merged = merge_journals("ci", runs_dir=str(tmp_path))["v2"]
+
+        assert set(merged["examples"]) == {"a", "c"}
+        assert merged["expected"] == {"a", "b", "c"}
+        assert merged["shards"] == {"1/2", "2/2"}
+        assert merged["shard_count"] == 2
@@ -0,0 +1,142 @@
+"""
+Testes da saída estruturada e do parsing das respostas dos juízes (src/metrics.py).
+"""
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from langchain_openai import ChatOpenAI
+
+import metrics
+from utils import parse_json_object
+
+
+class TestParseJsonObject:
+    def test_json_puro(self):
+        assert parse_json_object('{"score": 0.9}') == {"score": 0.9}
+
+    def test_cerca_de_codigo_e_texto_depois(self):
+        text = 'Segue:\n```json\n{"score": 0.8, "reasoning": "ok {sic}"}\n```\nObrigado!'
+        assert parse_json_object(text) == {"score": 0.8, "reasoning": "ok {sic}"}
+
+    def test_chaves_no_texto_antes_do_json(self):
+        assert parse_json_object('Use {chave} assim: {"score": 1.0}') == {"score": 1.0}
+
+    def test_sem_json(self):
+        assert parse_json_object("sem json aqui") is None
+        assert parse_json_object('{"score": 0.9') is None
+        assert parse_json_object("") is None
+
+    def test_extract_json_from_response_continua_em_metrics(self):
+        assert metrics.extract_json_from_response('Resposta: {"score": 0.7}') == {"score": 0.7}
+        assert metrics.extract_json_from_response("sem json")["score"] == 0.0
+
+
+class TestJudgeStructuredOutput:
+    def test_schema_enviado_ao_provider(self, judge):
+        fake = judge('{"score": 0.9, "reasoning": "ok"}')
+        result = metrics.evaluate_metric("clarity", "q", "a", "r")
+
+        assert result == {"score": 0.9, "reasoning": "ok"}
+        response_format = fake.calls[0][1]["response_format"]
+        assert response_format["type"] == "json_schema"
+        schema = response_format["json_schema"]["schema"]
+        assert schema["required"] == ["score", "reasoning"]
+        assert response_format["json_schema"]["strict"] is True
+
+    def test_modo_json_e_off(self, judge, monkeypatch):
+        monkeypatch.setenv("JUDGE_STRUCTURED_OUTPUT", "json")
+        fake = judge('{"score": 0.9, "reasoning": "ok"}', '{"score": 0.9, "reasoning": "ok"}')
+        metrics.evaluate_metric("clarity", "q", "a", "r")
+        assert fake.calls[0][1] == {"response_format": {"type": "json_object"}}
+
+        monkeypatch.setenv("JUDGE_STRUCTURED_OUTPUT", "off")
+        metrics.evaluate_metric("clarity", "q2", "a", "r")
+        assert fake.calls[1][1] == {}
+
+    def test_schema_do_juiz_combinado(self, judge):
+        fake = judge(json.dumps({
+            "f1_score": {"precision": 1.0, "recall": 0.5, "reasoning": "ok"},
+            "clarity": {"score": 0.8, "reasoning": "ok"},
+        }))
+        judged = metrics.evaluate_combined("q", "a", "r", ["f1_score", "clarity"])
+
+        assert judged["clarity"]["score"] == 0.8
+        assert judged["f1_score"]["recall"] == 0.5
+        schema = fake.calls[0][1]["response_format"]["json_schema"]["schema"]
+        assert schema["required"] == ["f1_score", "clarity"]
+        assert schema["properties"]["f1_score"]["required"] == ["precision", "recall", "reasoning"]
+
+    def test_payload_real_do_chat_openai(self, judge, monkeypatch):
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200, json={
+                "id": "x", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": '{"score": 1.0, "reasoning": "ok"}'}}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            })
+
+        llm = ChatOpenAI(model="gpt-4o", api_key="sk-test", max_retries=0,
+                         http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(metrics, "get_evaluator_llm", lambda: llm)
+
+        assert metrics.evaluate_metric("precision", "q", "a", "r")["score"] == 1.0
+        assert bodies[0]["response_format"]["json_schema"]["name"] == "juiz_precision"
+
+
+class TestJudgeRepair:
+    def test_resposta_invalida_e_reparada(self, judge):
+        fake = judge("Nota: ótima resposta!", '{"precision": 0.8, "recall": 0.6, "reasoning": "ok"}')
+        result = metrics.evaluate_metric("f1_score", "q", "a", "r")
+
+        assert result["recall"] == 0.6 and "error" not in result
+        repair_messages = fake.calls[1][0]
+        assert [m.type for m in repair_messages] == ["human", "ai", "human"]
+        assert "precision" in repair_messages[-1].content
+
+    def test_campo_faltando_tambem_e_reparado(self, judge):
+        fake = judge('{"reasoning": "sem nota"}', '{"score": 0.7, "reasoning": "ok"}')
+        assert metrics.evaluate_metric("clarity", "q", "a", "r")["score"] == 0.7
+        assert len(fake.calls) == 2
+
+    def test_falha_apos_reparo_marca_erro_em_vez_de_zero_silencioso(self, judge, monkeypatch):
+        monkeypatch.setenv("JUDGE_REPAIR_RETRIES", "2")
+        fake = judge("x", "y", "z")
+        result = metrics.evaluate_metric("clarity", "q", "a", "r")
+
+        assert result["error"] is True
+        assert len(fake.calls) == 3
+        assert metrics.get_judge_cache().get(metrics._judge_cache_key(
+            metrics.JUDGES["clarity"]["build_prompt"]("q", "a", "r"))) is None
+
+    def test_reparo_assincrono(self, judge):
+        fake = judge("```\nsem json\n```", '{"score": 0.5, "reasoning": "ok"}')
+        result = asyncio.run(metrics.aevaluate_metric("precision", "q", "a", "r"))
+        assert result["score"] == 0.5 and len(fake.calls) == 2
+
+
+class TestScoresComErro:
+    def test_veredicto_com_erro_fica_fora_das_medias(self):
+        import evaluate
+
+        judged = {
+            "f1_score": {"score": 0.8},
+            "clarity": metrics._score_error_result(ValueError("x")),
+            "precision": {"score": 1.0},
+        }
+        record = evaluate._example_record({"question": "q", "answer": "a", "reference": "r"}, judged)
+        assert record["scores"]["clarity"] is None
+
+        scores = evaluate._aggregate_scores([record["scores"], {"f1_score": 0.6, "clarity": 0.9, "precision": 0.8}])
+        assert scores["clarity"] == 0.9
+        assert scores["f1_score"] == 0.7
@@ -0,0 +1,86 @@
+"""
+Testes do registro de juízes e do juiz combinado (src/metrics.py).
+"""
+import sys
+import json
+import asyncio
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import metrics
+
+
+def _response_for(metric, value=0.5):
+    return {**{field: value for field in metrics.JUDGES[metric]["fields"]}, "reasoning": "ok"}
+
+
+class TestJudgesRegistry:
+    def test_every_judge_has_the_full_contract(self):
+        keys = {"label", "build_prompt", "parse", "on_error", "fields", "criteria", "output_format"}
+        for metric, judge in metrics.JUDGES.items():
+            assert keys <= set(judge), metric
+            assert all(callable(judge[name]) for name in ("build_prompt", "parse", "on_error")), metric
+            for field in [*judge["fields"], "reasoning"]:
+                assert f'"{field}"' in judge["output_format"], (metric, field)
+            assert metrics._metric_schema(metric)["required"] == [*judge["fields"], "reasoning"]
+
+    @pytest.mark.parametrize("metric", sorted(metrics.JUDGES))
+    def test_sync_and_async_share_prompt_and_parser(self, metric, judge):
+        response = json.dumps(_response_for(metric))
+        fake = judge(response, response)
+
+        result = metrics.evaluate_metric(metric, "bug XYZ", "história ABC", "referência QWE")
+        assert result["score"] == 0.5
+        assert asyncio.run(metrics.aevaluate_metric(metric, "bug XYZ", "história ABC", "referência QWE")) == result
+
+        prompts = [messages[-1].content for messages, _ in fake.calls]
+        assert all(text in prompts[0] for text in ("bug XYZ", "história ABC", "referência QWE"))
+        assert all(prompt == prompts[0] for prompt in prompts)
+
+        error = metrics.JUDGES[metric]["on_error"](ValueError("x"))
+        assert error["score"] == 0.0 and error["error"]
+
+
+class TestCombinedJudge:
+    METRICS = ["f1_score", "clarity", "precision"]
+
+    def test_all_metrics_in_one_call(self, judge):
+        fake = judge(json.dumps({metric: _response_for(metric, 0.8) for metric in self.METRICS}))
+
+        results = metrics.evaluate_combined("q", "a", "r", self.METRICS)
+
+        assert len(fake.calls) == 1
+        assert {metric: results[metric]["score"] for metric in self.METRICS} == {
+            "f1_score": 0.8, "clarity": 0.8, "precision": 0.8
+        }
+
+    def test_missing_metric_only_errors_that_metric(self, judge):
+        # Resposta original e a do pedido de reparo, ambas sem "precision"
+        response = json.dumps({"f1_score": _response_for("f1_score", 0.8), "clarity": _response_for("clarity", 0.9)})
+        judge(response, response)
+
+        results = metrics.evaluate_combined("q", "a", "r", self.METRICS)
+
+        assert results["f1_score"]["score"] == 0.8
+        assert results["clarity"]["score"] == 0.9 and "error" not in results["clarity"]
+        assert results["precision"]["score"] == 0.0 and results["precision"]["error"]
+
+    def test_non_numeric_metric_only_errors_that_metric(self, judge):
+        response = {metric: _response_for(metric, 0.7) for metric in self.METRICS}
+        response["clarity"]["score"] = "alta"
+        fake = judge(*[json.dumps(response)] * 4)
+
+        for results in (
+            metrics.evaluate_combined("q", "a", "r", self.METRICS),
+            asyncio.run(metrics.aevaluate_combined("q", "a", "r", self.METRICS)),
+        ):
+            assert results["f1_score"]["score"] == 0.7
+            assert results["precision"]["score"] == 0.7
+            assert results["clarity"]["score"] == 0.0 and results["clarity"]["error"]
+
+        # Resultado parcial não vai para o cache: a segunda avaliação chamou o juiz de novo
+        assert len(fake.calls) == 4
@@ -0,0 +1,149 @@
+"""
+Testes da avaliação em matriz prompt × modelo (src/evaluate.py).
+"""
+import sys
+import json
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import evaluate
+import generation
+import dataset as dataset_module
+from cache import SQLiteCache
+from journal import RunJournal
+from utils import parse_model_spec
+
+
+class TestParseModelSpec:
+    def test_provider_e_modelo(self):
+        assert parse_model_spec("openai:gpt-4o-mini") == ("openai", "gpt-4o-mini")
+        assert parse_model_spec("gemini:gemini-1.5-flash") == ("google", "gemini-1.5-flash")
+
+    def test_sem_provider_usa_o_do_env(self):
+        assert parse_model_spec("gpt-4o") == (None, "gpt-4o")
+        assert parse_model_spec("ft:gpt-4o-mini:org::abc") == (None, "ft:gpt-4o-mini:org::abc")
+        assert parse_model_spec(None) == (None, None)
+
+
+def fake_judges(question, answer, reference, metrics, mode="per-metric"):
+    score = 1.0 if "google" in answer else 0.5
+    return {metric: {"score": score, "reasoning": "ok"} for metric in metrics}
+
+
+@pytest.fixture
+def matrix_env(tmp_path, monkeypatch, fake_llm, llm_tracker):
+    monkeypatch.setattr(generation, "get_generation_cache", lambda: SQLiteCache(str(tmp_path / "gen.sqlite"), 10**6))
+    monkeypatch.setattr(evaluate, "evaluate_metrics", fake_judges)
+    monkeypatch.setattr(evaluate, "get_llm", fake_llm)
+    tracker = llm_tracker
+
+    reads = []
+    list_examples = evaluate._list_examples
+    monkeypatch.setattr(evaluate, "_list_examples", lambda *args: reads.append(args) or list_examples(*args))
+    tracker["reads"] = reads
+
+    dataset = tmp_path / "d.jsonl"
+    with open(dataset, "w", encoding="utf-8") as f:
+        for i in range(3):
+            f.write(json.dumps({"inputs": {"bug_report": f"bug {i}"}, "outputs": {"reference": f"ref {i}"}}) + "\n")
+
+    prompts = []
+    for name in ("p1", "p2"):
+        path = tmp_path / f"{name}.yml"
+        path.write_text(f"{name}:\n  system_prompt: 'Sistema {name}'\n  user_prompt: '{{bug_report}}'\n", encoding="utf-8")
+        prompts.append(str(path))
+
+    return tracker, str(dataset), prompts
+
+
+MODELS = ["openai:gpt-4o-mini", "google:gemini-1.5-flash"]
+
+
+class TestEvaluateMatrix:
+    def test_todas_as_combinacoes_em_um_pool(self, matrix_env, tmp_path):
+        tracker, dataset, prompts = matrix_env
+        journal = RunJournal("m1", str(tmp_path))
+
+        results = evaluate.evaluate_matrix(prompts, MODELS, dataset, None, concurrency=4, journal=journal)
+
+        assert list(results) == [
+            "p1@openai:gpt-4o-mini", "p1@google:gemini-1.5-flash",
+            "p2@openai:gpt-4o-mini", "p2@google:gemini-1.5-flash",
+        ]
+        assert results["p1@google:gemini-1.5-flash"]["f1_score"] == 1.0
+        assert results["p2@openai:gpt-4o-mini"]["f1_score"] == 0.5
+        # Dataset lido uma vez, cada modelo criado uma vez, células em paralelo
+        assert len(tracker["reads"]) == 1
+        assert sorted(tracker["llms"]) == sorted(MODELS)
+        assert tracker["peak"] > 1
+        assert len(journal.completed("p2@google:gemini-1.5-flash")) == 3
+
+    def test_retomada_por_combinacao(self, matrix_env, tmp_path):
+        tracker, dataset, prompts = matrix_env
+        journal = RunJournal("m2", str(tmp_path))
+        evaluate.evaluate_matrix(prompts[:1], MODELS, dataset, None, journal=journal)
+
+        tracker["peak"] = 0
+        results = evaluate.evaluate_matrix(prompts[:1], MODELS, dataset, None, journal=journal)
+        assert tracker["peak"] == 0
+        assert results["p1@openai:gpt-4o-mini"]["clarity"] == 0.5
+
+    def test_um_modelo_mantem_o_nome_do_prompt(self, matrix_env):
+        _, dataset, prompts = matrix_env
+        results = asyncio.run(evaluate.aevaluate_matrix(prompts, [None], dataset, None, concurrency=2))
+        assert list(results) == ["p1", "p2"]
+
+    def test_prompt_inexistente_zera_a_matriz(self, matrix_env, tmp_path):
+        _, dataset, _ = matrix_env
+        results = evaluate.evaluate_matrix([str(tmp_path / "nao_existe.yml")], MODELS, dataset, None)
+        assert all(sum(scores.values()) == 0 for scores in results.values())
+
+    def test_progresso_mostra_o_total_quando_conhecido(self, matrix_env, capsys, monkeypatch):
+        _, dataset, prompts = matrix_env
+        count_in_background = evaluate.count_in_background
+        # Espera a contagem terminar antes do primeiro exemplo, para o teste ser determinístico
+        monkeypatch.setattr(evaluate, "count_in_background", lambda *args: count_in_background(*args).join())
+
+        evaluate.evaluate_matrix(prompts[:1], [None], dataset, None)
+        assert "[3/3]" in capsys.readouterr().out
+
+        evaluate.evaluate_matrix(prompts[:1], [None], dataset, None, limit=2)
+        assert "[2/2]" in capsys.readouterr().out
+
+        # Com --shard o total só sairia lendo o dataset: fica só a posição
+        evaluate.evaluate_matrix(prompts[:1], [None], dataset, None, shard=(1, 1))
+        out = capsys.readouterr().out
+        assert "[1]" in out and "/3]" not in out
+
+    def test_contagem_nao_segura_o_streaming(self, matrix_env, capsys, monkeypatch):
+        _, dataset, prompts = matrix_env
+        release = threading.Event()
+        monkeypatch.setattr(dataset_module, "count_examples", lambda path: release.wait(5) and 3)
+
+        try:
+            evaluate.evaluate_matrix(prompts[:1], [None], dataset, None)
+        finally:
+            release.set()
+
+        # A avaliação terminou com a contagem ainda bloqueada: o progresso ficou em [i]
+        out = capsys.readouterr().out
+        assert "[3]" in out and "/3]" not in out
+
+
+class TestDisplayMatrix:
+    def test_tabela_comparativa(self, capsys):
+        passed = evaluate.display_matrix({
+            "p1@a": {"helpfulness": 0.95, "correctness": 0.95, "f1_score": 0.95, "clarity": 0.95, "precision": 0.95},
+            "p1@b": {"helpfulness": 0.5, "correctness": 0.5, "f1_score": 0.5, "clarity": 0.5, "precision": 0.5},
+        })
+        output = capsys.readouterr().out
+
+        assert passed is False
+        row = next(line for line in output.splitlines() if line.startswith("p1@a"))
+        assert "0.9500" in row and "← melhor" in row
@@ -0,0 +1,99 @@
+"""
+Testes dos spans de instrumentação (src/profiling.py).
+"""
+import sys
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from profiling import Profiler, percentile, timed_iter, get_profiler
+
+
+class TestPercentile:
+    def test_interpola_entre_valores(self):
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        assert percentile(values, 50) == 3.0
+        assert percentile(values, 90) == 4.6
+        assert percentile(values, 100) == 5.0
+
+    def test_lista_vazia_e_unitaria(self):
+        assert percentile([], 99) == 0.0
+        assert percentile([7.0], 99) == 7.0
+
+
+class TestProfiler:
+    def test_stats_por_etapa(self):
+        profiler = Profiler()
+        for _ in range(3):
+            with profiler.span("generation"):
+                pass
+        with profiler.span("journal.write"):
+            pass
+
+        stats = profiler.stats()
+        assert stats["generation"]["count"] == 3
+        assert stats["journal.write"]["count"] == 1
+        assert stats["generation"]["p50"] <= stats["generation"]["p99"] <= stats["generation"]["max"]
+        assert profiler.format_table()[0].startswith("Etapa")
+
+    def test_span_registrado_mesmo_com_excecao(self):
+        profiler = Profiler()
+        try:
+            with profiler.span("judge.f1_score"):
+                raise ValueError("falhou")
+        except ValueError:
+            pass
+        assert profiler.stats()["judge.f1_score"]["count"] == 1
+
+    def test_trilhas_por_thread_e_por_task(self):
+        profiler = Profiler()
+
+        def work(_):
+            with profiler.span("example"):
+                time.sleep(0.01)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            list(executor.map(work, range(3)))
+
+        async def awork():
+            with profiler.span("example"):
+                await asyncio.sleep(0.01)
+
+        async def run():
+            await asyncio.gather(awork(), awork())
+
+        asyncio.run(run())
+
+        tracks = {record["track"] for record in profiler.spans}
+        assert len(tracks) >= 4  # 2 tasks distintas + ao menos 2 threads do pool
+
+    def test_export_chrome_trace(self, tmp_path):
+        profiler = Profiler()
+        with profiler.span("llm.call", model="openai/gpt-4o-mini"):
+            pass
+
+        path = tmp_path / "trace" / "run.json"
+        profiler.export_chrome_trace(str(path))
+        trace = json.loads(path.read_text(encoding="utf-8"))
+
+        complete = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+        assert len(complete) == 1
+        assert complete[0]["name"] == "llm.call"
+        assert complete[0]["cat"] == "llm"
+        assert complete[0]["args"] == {"model": "openai/gpt-4o-mini"}
+        assert any(event["ph"] == "M" for event in trace["traceEvents"])
+
+
+class TestTimedIter:
+    def test_mede_cada_item_sem_alterar_a_sequencia(self):
+        profiler = get_profiler()
+        profiler.reset()
+        assert list(timed_iter("dataset.read", iter([1, 2, 3]))) == [1, 2, 3]
+        # 3 itens + o next() final que encerra a iteração
+        assert profiler.stats()["dataset.read"]["count"] == 4
+        profiler.reset()
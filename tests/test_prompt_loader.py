@@ -0,0 +1,84 @@
+"""
+Testes do carregador memoizado de prompts (src/prompt_loader.py).
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from prompt_loader import clear_prompt_cache, load_prompt_file, load_prompt_template, prompt_cache_stats
+
+PROMPT_YAML = """meu_prompt:
+  description: teste
+  system_prompt: |
+    Você é um analista. {extra}
+  user_prompt: "{bug_report}"
+"""
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_prompt_cache()
+    yield
+    clear_prompt_cache()
+
+
+def write(path, text, mtime_ns=None):
+    path.write_text(text, encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestPromptLoader:
+    def test_template_reaproveitado_sem_reler_o_arquivo(self, tmp_path):
+        path = tmp_path / "p.yml"
+        write(path, PROMPT_YAML.replace(" {extra}", ""))
+
+        first = load_prompt_template(str(path), "meu_prompt")
+        second = load_prompt_template(str(path), "meu_prompt")
+
+        assert first is second
+        stats = prompt_cache_stats()
+        assert stats["file_loads"] == 1 and stats["file_hits"] == 1
+        assert stats["template_builds"] == 1 and stats["template_hits"] == 1
+        assert first.format_messages(bug_report="bug")[1].content == "bug"
+
+    def test_touch_sem_mudar_conteudo_nao_reparseia(self, tmp_path):
+        path = tmp_path / "p.yml"
+        write(path, PROMPT_YAML.replace(" {extra}", ""), mtime_ns=1_000_000_000)
+        first = load_prompt_template(str(path))
+
+        os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+        assert load_prompt_template(str(path)) is first
+        assert prompt_cache_stats()["file_loads"] == 1
+
+    def test_conteudo_alterado_gera_novo_template(self, tmp_path):
+        path = tmp_path / "p.yml"
+        write(path, PROMPT_YAML.replace(" {extra}", ""), mtime_ns=1_000_000_000)
+        first = load_prompt_template(str(path))
+
+        write(path, PROMPT_YAML.replace(" {extra}", " Seja breve."), mtime_ns=2_000_000_000)
+        second = load_prompt_template(str(path))
+
+        assert second is not first
+        assert "Seja breve." in second.format_messages(bug_report="x")[0].content
+        assert prompt_cache_stats()["file_loads"] == 2
+
+    def test_load_prompt_file_devolve_copia(self, tmp_path):
+        path = tmp_path / "p.yml"
+        write(path, PROMPT_YAML)
+
+        data = load_prompt_file(str(path))
+        data["meu_prompt"]["description"] = "alterado"
+        assert load_prompt_file(str(path))["meu_prompt"]["description"] == "teste"
+
+    def test_arquivo_ou_prompt_inexistente(self, tmp_path):
+        assert load_prompt_template(str(tmp_path / "nao-existe.yml")) is None
+
+        path = tmp_path / "p.yml"
+        write(path, PROMPT_YAML)
+        assert load_prompt_template(str(path), "outro") is None
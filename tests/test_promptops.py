@@ -0,0 +1,93 @@
+"""
+Testes da CLI única e do daemon (src/promptops.py).
+"""
+import os
+import sys
+import time
+import subprocess
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import promptops
+from cache import SQLiteCache, _CACHES, reset_cache_state
+
+ROOT = Path(__file__).parent.parent
+
+VALID = "ok:\n  description: 'Prompt'\n  system_prompt: 'Você é um PO.'\n  user_prompt: '{bug_report}'\n"
+INVALID = "ruim:\n  description: 'Prompt'\n  system_prompt: 'TODO: escrever'\n"
+
+
+@pytest.fixture
+def prompt_files(tmp_path):
+    (tmp_path / "ok.yml").write_text(VALID, encoding="utf-8")
+    (tmp_path / "ruim.yml").write_text(INVALID, encoding="utf-8")
+    return tmp_path
+
+
+class TestLocal:
+    def test_validate(self, prompt_files, capsys):
+        assert promptops.main(["--no-daemon", "validate", str(prompt_files / "ok.yml")]) == 0
+        assert promptops.main(["--no-daemon", "validate", str(prompt_files / "ok.yml"), str(prompt_files / "ruim.yml")]) == 1
+        assert "TODOs" in capsys.readouterr().out
+
+    def test_help_do_subcomando_nao_encerra_o_processo(self, capsys):
+        assert promptops.run_command("eval", ["--help"]) == 0
+        assert promptops.run_command("recall", ["--opcao-invalida"]) == 2
+        assert "--adaptive" in capsys.readouterr().out
+
+    def test_reset_entre_comandos(self, tmp_path, monkeypatch):
+        cache = SQLiteCache(str(tmp_path / "c.sqlite"), 10**6)
+        monkeypatch.setitem(_CACHES, "TESTE_CACHE", cache)
+        cache.get("x")
+        cache.enabled = False
+        cache.refresh = True
+
+        reset_cache_state()
+        assert (cache.enabled, cache.refresh, cache.misses) == (True, False, 0)
+
+
+class TestDaemon:
+    def test_comandos_executam_no_daemon(self, prompt_files, monkeypatch, capsys):
+        socket_path = prompt_files / "po.sock"
+        env = {**os.environ, "PROMPTOPS_SOCKET": str(socket_path)}
+        daemon = subprocess.Popen([sys.executable, str(ROOT / "src" / "promptops.py"), "serve"], cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.time() + 30
+            while not promptops.daemon_running(socket_path):
+                assert daemon.poll() is None and time.time() < deadline
+                time.sleep(0.1)
+
+            # Caminhos relativos ao diretório de quem chama, não ao do daemon
+            monkeypatch.chdir(prompt_files)
+            assert promptops.main(["--socket", str(socket_path), "validate", "ok.yml"]) == 0
+            assert promptops.main(["--socket", str(socket_path), "validate", "ruim.yml"]) == 1
+
+            # Provider e caches vêm só do .env do diretório de quem chama
+            for name in ("LLM_PROVIDER", "OPENAI_API_KEY", "GOOGLE_API_KEY"):
+                monkeypatch.delenv(name, raising=False)
+            (prompt_files / "d.jsonl").write_text(
+                '{"inputs": {"bug_report": "bug 1"}, "outputs": {"reference": "ref 1"}}\n', encoding="utf-8"
+            )
+            (prompt_files / ".env").write_text(
+                "LLM_PROVIDER=fake\nFAKE_LLM_LATENCY_MS=0\nEVAL_RUNS_DIR=runs\n"
+                "JUDGE_CACHE_PATH=judge.sqlite\nGENERATION_CACHE_PATH=gen.sqlite\n", encoding="utf-8"
+            )
+            recall = ["recall", "--limit", "1", "--prompt", "ok.yml", "--dataset", "d.jsonl"]
+            # Código 1 só indicaria média abaixo da meta; o que importa é a saída abaixo
+            promptops.main(["--socket", str(socket_path), *recall])
+            assert promptops.main(["--socket", str(socket_path), "stop"]) == 0
+            assert daemon.wait(timeout=10) == 0
+        finally:
+            if daemon.poll() is None:
+                daemon.kill()
+
+        output = capsys.readouterr().out
+        assert "✅ ok.yml: ok" in output and "❌ ruim.yml: ruim" in output
+        assert "✓ LLM: fake" in output and "Exemplos:        1/1" in output
+        assert (prompt_files / "gen.sqlite").exists()
+        assert not socket_path.exists()
@@ -0,0 +1,86 @@
+"""
+Testes da publicação de execuções locais no LangSmith (src/publish.py).
+"""
+import sys
+import json
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from journal import RunJournal, example_key
+from publish import publish_run
+
+
+def write_dataset(path, n):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"inputs": {"bug_report": f"bug {i}"}, "outputs": {"reference": f"ref {i}"}}) + "\n")
+
+
+def write_journal(tmp_path, n=2, metrics=None):
+    journal = RunJournal("run1", str(tmp_path))
+    metrics = metrics or {"f1_score": {"score": 0.8, "reasoning": "ok"}, "clarity": {"score": 0.9, "reasoning": "ok"}}
+    for i in range(n):
+        journal.record_example("p", example_key({"bug_report": f"bug {i}"}), i + 1, {
+            "question": f"bug {i}", "answer": "story", "reference": f"ref {i}",
+            "metrics": metrics,
+            "scores": {metric: result.get("score", 0.0) for metric, result in metrics.items()},
+        })
+    return journal
+
+
+class TestPublishRun:
+    def test_publica_experimento_com_runs_e_feedback(self, tmp_path, fake_client):
+        jsonl = tmp_path / "d.jsonl"
+        write_dataset(jsonl, 3)
+        write_journal(tmp_path)
+
+        client = fake_client
+        published = publish_run(client, "run1", "ds", str(jsonl), runs_dir=str(tmp_path))
+
+        assert published == {"p": 2}
+        assert len(client.examples) == 3
+        dataset_id = client.datasets["ds"].id
+        assert client.projects == [("p-run1", dataset_id)]
+        assert client.requests.count("batch_ingest_runs") == 1
+        assert {run["reference_example_id"] for run in client.runs} <= set(client.examples)
+        assert all(run["dotted_order"].endswith(str(run["id"])) for run in client.runs)
+        assert len(client.feedback) == 4
+
+    def test_nova_tentativa_envia_so_o_que_faltou(self, tmp_path, fake_client):
+        jsonl = tmp_path / "d.jsonl"
+        write_dataset(jsonl, 2)
+        write_journal(tmp_path)
+
+        client = fake_client
+        client.fail_feedback_after = 1
+        with pytest.raises(RuntimeError):
+            publish_run(client, "run1", "ds", str(jsonl), runs_dir=str(tmp_path))
+
+        client.fail_feedback_after = None
+        publish_run(client, "run1", "ds", str(jsonl), runs_dir=str(tmp_path))
+
+        # Mesmo projeto, runs com ids estáveis e nenhum feedback duplicado
+        assert len(client.runs) == 2
+        assert len({run["id"] for run in client.runs}) == 2
+        assert len(client.feedback) == 4
+
+    def test_veredicto_com_erro_nao_vira_zero(self, tmp_path, fake_client):
+        jsonl = tmp_path / "d.jsonl"
+        write_dataset(jsonl, 1)
+        write_journal(tmp_path, n=1, metrics={
+            "f1_score": {"score": 0.8, "reasoning": "ok"},
+            "clarity": {"score": 0.0, "reasoning": "falhou", "error": "resposta fora do formato"},
+        })
+
+        client = fake_client
+        publish_run(client, "run1", "ds", str(jsonl), runs_dir=str(tmp_path))
+
+        assert [key for _, key, _ in client.feedback.values()] == ["f1_score"]
+
+    def test_journal_inexistente(self, tmp_path, fake_client):
+        with pytest.raises(FileNotFoundError):
+            publish_run(fake_client, "nao-existe", "ds", "d.jsonl", runs_dir=str(tmp_path))
@@ -0,0 +1,46 @@
+"""
+Testes da ida e volta push → Hub → pull dos prompts (src/push_prompts.py, src/pull_prompts.py).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.load import dumpd, load
+
+from pull_prompts import _extract_chat_prompt_parts
+from push_prompts import _build_chat_prompt_template
+from utils import build_chat_prompt
+
+# langchain_core.load (usado para simular o Hub) ainda é beta
+pytestmark = pytest.mark.filterwarnings("ignore:The function `load` is in beta")
+
+PROMPT_DATA = {"system_prompt": 'Responda em JSON: {{"x": 1}}', "user_prompt": "Bug: {bug_report}"}
+
+
+def hub_round_trip(template):
+    """Serializa e desserializa como o Hub faz no push/pull."""
+    return load(dumpd(template))
+
+
+def rendered(prompt_data):
+    return [(m.type, m.content) for m in build_chat_prompt(prompt_data).format_messages(bug_report="b")]
+
+
+class TestIdaEVoltaPeloHub:
+    def test_chaves_escapadas_sobrevivem_ao_push_e_pull(self):
+        pulled = hub_round_trip(_build_chat_prompt_template(PROMPT_DATA))
+        system_prompt, user_prompt = _extract_chat_prompt_parts(pulled)
+
+        assert system_prompt == PROMPT_DATA["system_prompt"]
+        assert rendered({"system_prompt": system_prompt, "user_prompt": user_prompt}) == rendered(PROMPT_DATA)
+
+    def test_system_message_literal_volta_escapada(self):
+        # Prompts publicados com a SystemMessage já renderizada (chaves sem escape)
+        pulled = hub_round_trip(build_chat_prompt(PROMPT_DATA))
+        system_prompt, user_prompt = _extract_chat_prompt_parts(pulled)
+
+        assert rendered({"system_prompt": system_prompt, "user_prompt": user_prompt}) == rendered(PROMPT_DATA)
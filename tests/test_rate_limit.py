@@ -0,0 +1,103 @@
+"""
+Testes do rate limiter e dos retries (src/rate_limit.py).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import rate_limit
+from rate_limit import RateLimitedChatModel, RateLimiter, TokenBucket, retry_after
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeRateLimitError(Exception):
+    def __init__(self, headers=None):
+        super().__init__("429 Too Many Requests")
+        self.status_code = 429
+        self.response = FakeResponse(429, headers)
+
+
+class FlakyModel:
+    """Falha com 429 nas primeiras `failures` chamadas."""
+
+    model_name = "fake-model"
+
+    def __init__(self, failures, error=None):
+        self.failures = failures
+        self.calls = 0
+        self.error = error or FakeRateLimitError({"retry-after": "0"})
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return "ok"
+
+
+class TestTokenBucket:
+    def test_burst_within_capacity_does_not_wait(self):
+        bucket = TokenBucket(per_minute=60)
+        assert all(bucket.reserve(1) == 0.0 for _ in range(60))
+
+    def test_over_capacity_waits_for_refill(self):
+        bucket = TokenBucket(per_minute=60)
+        bucket.reserve(60)
+        assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+
+
+class TestRetries:
+    def test_retry_after_header_is_honored(self):
+        assert retry_after(FakeRateLimitError({"retry-after": "7"})) == 7.0
+        assert retry_after(FakeRateLimitError({"retry-after-ms": "1500"})) == 1.5
+
+    def test_retry_delay_parsed_from_google_message(self):
+        assert retry_after(Exception("429 quota exceeded retry_delay { seconds: 12 }")) == 12.0
+
+    def test_retry_after_is_capped_and_jittered(self, monkeypatch):
+        monkeypatch.setenv("LLM_BACKOFF_MAX", "30")
+        sleeps = []
+        monkeypatch.setattr(rate_limit.time, "sleep", sleeps.append)
+        flaky = FlakyModel(failures=1, error=FakeRateLimitError({"retry-after": "3600"}))
+        model = RateLimitedChatModel(flaky, RateLimiter("test"), max_retries=3)
+
+        assert model.invoke("oi") == "ok"
+        assert sleeps == [30.0]
+        assert all(10.0 <= rate_limit.retry_after_delay(10.0) <= 12.0 for _ in range(50))
+
+    def test_retries_rate_limit_and_records_stats(self, monkeypatch):
+        monkeypatch.setattr(rate_limit.time, "sleep", lambda seconds: None)
+        limiter = RateLimiter("test")
+        model = RateLimitedChatModel(FlakyModel(failures=2), limiter, max_retries=3)
+
+        assert model.invoke("oi") == "ok"
+        assert limiter.stats["retries"] == 2
+        assert limiter.stats["rate_limited"] == 2
+        assert limiter.stats["calls"] == 1
+
+    def test_gives_up_after_max_retries(self, monkeypatch):
+        monkeypatch.setattr(rate_limit.time, "sleep", lambda seconds: None)
+        model = RateLimitedChatModel(FlakyModel(failures=5), RateLimiter("test"), max_retries=2)
+
+        with pytest.raises(FakeRateLimitError):
+            model.invoke("oi")
+
+    def test_non_retryable_errors_are_raised_immediately(self):
+        flaky = FlakyModel(failures=1, error=ValueError("prompt inválido"))
+        model = RateLimitedChatModel(flaky, RateLimiter("test"), max_retries=3)
+
+        with pytest.raises(ValueError):
+            model.invoke("oi")
+        assert flaky.calls == 1
+
+    def test_attributes_are_forwarded_to_wrapped_model(self):
+        model = RateLimitedChatModel(FlakyModel(failures=0), RateLimiter("test"))
+        assert model.model_name == "fake-model"
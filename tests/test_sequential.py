@@ -0,0 +1,136 @@
+"""
+Testes da avaliação adaptativa com parada antecipada (src/sequential.py).
+"""
+import sys
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import evaluate
+import generation
+from cache import SQLiteCache
+from sequential import ConfidenceSequence, SequentialTest, PASS, FAIL, get_confidence
+
+
+class TestConfidenceSequence:
+    def test_intervalo_contem_a_media_e_encolhe(self):
+        rng = random.Random(7)
+        sequence = ConfidenceSequence(0.05)
+        widths = []
+        for _ in range(200):
+            sequence.update(rng.uniform(0.5, 0.9))
+            low, high = sequence.interval()
+            assert low <= 0.7 <= high
+            widths.append(high - low)
+        assert widths[-1] < widths[9] < 1.0
+
+    def test_cobertura_simultanea(self):
+        # Bernoulli(0.7): o intervalo deve conter 0.7 em todos os passos em >= 95% das sequências
+        misses = 0
+        for seed in range(100):
+            rng = random.Random(seed)
+            sequence = ConfidenceSequence(0.05)
+            for _ in range(100):
+                sequence.update(1.0 if rng.random() < 0.7 else 0.0)
+                low, high = sequence.interval()
+                if not low <= 0.7 <= high:
+                    misses += 1
+                    break
+        assert misses <= 5
+
+
+class TestSequentialTest:
+    def test_reprovado_claro_decide_com_poucos_exemplos(self):
+        test = SequentialTest(0.9, 0.95, min_examples=5)
+        for _ in range(5):
+            test.update(0.3, {"clarity": 0.3})
+        assert test.decision == FAIL
+        assert test.decided_at == 5
+        assert test.metrics["clarity"].interval()[1] < 0.9
+
+    def test_aprovado(self):
+        rng = random.Random(1)
+        test = SequentialTest(0.9, 0.95, min_examples=5)
+        while test.decision is None and test.n < 500:
+            test.update(rng.uniform(0.95, 1.0), {})
+        assert test.decision == PASS
+
+    def test_perto_do_limiar_nao_decide_cedo(self):
+        test = SequentialTest(0.9, 0.95, min_examples=5)
+        for x in [0.85, 0.95] * 10:
+            test.update(x, {})
+        assert test.decision is None
+
+    def test_minimo_de_exemplos(self):
+        test = SequentialTest(0.9, 0.95, min_examples=10)
+        for _ in range(9):
+            test.update(0.0, {})
+        assert test.decision is None
+        test.update(0.0, {})
+        assert test.decision == FAIL
+
+    def test_confianca_invalida(self):
+        with pytest.raises(ValueError):
+            get_confidence(1.5)
+
+
+def poor_judges(question, answer, reference, metrics, mode="per-metric"):
+    return {metric: {"score": 0.2, "reasoning": "ruim"} for metric in metrics}
+
+
+class TestAdaptiveEvaluation:
+    def test_para_cedo_e_informa_exemplos_usados(self, tmp_path, monkeypatch, capsys, fake_llm):
+        monkeypatch.setattr(generation, "get_generation_cache", lambda: SQLiteCache(str(tmp_path / "gen.sqlite"), 10**6))
+        monkeypatch.setattr(evaluate, "evaluate_metrics", poor_judges)
+        monkeypatch.setattr(evaluate, "get_llm", fake_llm)
+
+        dataset = tmp_path / "d.jsonl"
+        with open(dataset, "w", encoding="utf-8") as f:
+            for i in range(50):
+                f.write(json.dumps({"inputs": {"bug_report": f"bug {i}"}, "outputs": {"reference": "r"}}) + "\n")
+        prompt = tmp_path / "p.yml"
+        prompt.write_text("p:\n  system_prompt: 'S'\n  user_prompt: '{bug_report}'\n", encoding="utf-8")
+
+        adaptive = evaluate.adaptive_options(0.95, 5, seed=3)
+        results = evaluate.evaluate_matrix([str(prompt)], [None], str(dataset), None, concurrency=1, adaptive=adaptive)
+
+        output = capsys.readouterr().out
+        assert results["p"]["f1_score"] == 0.2
+        assert "Veredicto decidido após 5 exemplos: REPROVADO" in output
+        assert "reprovado após 5 de 50 exemplos" in output
+        # O exemplo que já estava em voo (bounded_map mantém 2 × concorrência submetidos)
+        # fica fora das médias, que cobrem só o que o teste consumiu
+        assert "Dataset: 5 exemplos" in output
+        assert "1 exemplo(s) em voo após o veredicto fora das médias" in output
+
+    def test_media_cobre_so_os_exemplos_do_teste(self, tmp_path, monkeypatch, capsys, fake_llm):
+        monkeypatch.setattr(generation, "get_generation_cache", lambda: SQLiteCache(str(tmp_path / "gen.sqlite"), 10**6))
+        monkeypatch.setattr(evaluate, "get_llm", fake_llm)
+        seen = []
+
+        def judges(question, answer, reference, metrics, mode="per-metric"):
+            # Os primeiros exemplos decidem o veredicto; os que chegam depois destoariam da média
+            value = 0.2 if len(seen) < 5 else 1.0
+            seen.append(value)
+            return {metric: {"score": value, "reasoning": "r"} for metric in metrics}
+
+        monkeypatch.setattr(evaluate, "evaluate_metrics", judges)
+
+        dataset = tmp_path / "d.jsonl"
+        with open(dataset, "w", encoding="utf-8") as f:
+            for i in range(50):
+                f.write(json.dumps({"inputs": {"bug_report": f"bug {i}"}, "outputs": {"reference": "r"}}) + "\n")
+        prompt = tmp_path / "p.yml"
+        prompt.write_text("p:\n  system_prompt: 'S'\n  user_prompt: '{bug_report}'\n", encoding="utf-8")
+
+        adaptive = evaluate.adaptive_options(0.95, 5, seed=3)
+        results = evaluate.evaluate_matrix([str(prompt)], [None], str(dataset), None, concurrency=1, adaptive=adaptive)
+
+        assert len(seen) > 5
+        assert results["p"]["f1_score"] == 0.2
+        assert "REPROVADO" in capsys.readouterr().out
@@ -0,0 +1,90 @@
+"""
+Testes da contabilidade de tokens e custo (src/usage.py).
+"""
+import sys
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from langchain_core.messages import AIMessage
+
+from rate_limit import RateLimitedChatModel, RateLimiter
+from usage import UsageRecorder, call_cost, usage_scope
+import usage
+
+
+class UsageModel:
+    model_name = "gpt-4o-mini"
+
+    def invoke(self, input, config=None, **kwargs):
+        return AIMessage(content="ok", usage_metadata={
+            "input_tokens": 1000, "output_tokens": 100, "total_tokens": 1100,
+            "input_token_details": {"cache_read": 800},
+        })
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        return self.invoke(input)
+
+
+class TestUsageRecorder:
+    def test_cost_uses_cached_price_and_versioned_model_names(self):
+        # 200 sem cache × 0.15 + 800 em cache × 0.075 + 100 de saída × 0.60 (US$/1M)
+        assert abs(call_cost("openai/gpt-4o-mini-2024-07-18", 1000, 800, 100) - 0.00015) < 1e-12
+        assert call_cost("openai/modelo-desconhecido", 10, 0, 10) is None
+
+    def test_rolls_up_by_site_and_example_across_threads_and_tasks(self, monkeypatch, tmp_path):
+        recorder = UsageRecorder()
+        monkeypatch.setattr(usage, "_RECORDER", recorder)
+        llm = RateLimitedChatModel(UsageModel(), RateLimiter("openai/gpt-4o-mini"), max_retries=0)
+
+        def run(example):
+            with usage_scope(example=example):
+                with usage_scope(site="geração"):
+                    llm.invoke("x")
+                with usage_scope(site="f1_score"):
+                    llm.invoke("x")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(run, ["a", "b"]))
+
+        async def arun():
+            with usage_scope(example="c", site="clarity"):
+                await asyncio.gather(llm.ainvoke("x"), llm.ainvoke("x"))
+
+        asyncio.run(arun())
+
+        summary = recorder.summary()
+        assert summary["total"]["calls"] == 6
+        assert summary["by_site"]["geração"]["calls"] == 2
+        assert summary["by_site"]["clarity"]["cached_input_tokens"] == 1600
+        assert {name: totals["calls"] for name, totals in summary["by_example"].items()} == {"a": 2, "b": 2, "c": 2}
+        assert any(line.startswith("TOTAL") for line in recorder.format_table())
+
+        path = tmp_path / "run.usage.json"
+        recorder.write_json(path)
+        assert json.loads(path.read_text(encoding="utf-8"))["total"]["input_tokens"] == 6000
+
+    def test_custo_por_exemplo_em_cada_combinacao(self, monkeypatch):
+        recorder = UsageRecorder()
+        monkeypatch.setattr(usage, "_RECORDER", recorder)
+        llm = RateLimitedChatModel(UsageModel(), RateLimiter("openai/gpt-4o-mini"), max_retries=0)
+
+        # O mesmo exemplo avaliado por duas combinações prompt × modelo
+        for cell, calls in (("v1@openai:gpt-4o-mini", 1), ("v2@openai:gpt-4o-mini", 3)):
+            with usage_scope(example="a", cell=cell):
+                for _ in range(calls):
+                    llm.invoke("x")
+
+        summary = recorder.summary()
+        assert summary["by_example"] == {}
+        assert summary["by_cell"]["v1@openai:gpt-4o-mini"]["by_example"]["a"]["calls"] == 1
+        assert summary["by_cell"]["v2@openai:gpt-4o-mini"]["by_example"]["a"]["calls"] == 3
+        v1, v2 = (summary["by_cell"][cell]["total"]["cost"] for cell in ("v1@openai:gpt-4o-mini", "v2@openai:gpt-4o-mini"))
+        assert abs(v2 - 3 * v1) < 1e-12
+        table = recorder.format_table()
+        assert any("(2 exemplos)" in line for line in table)
+        assert any(line.strip().startswith("v2@openai:gpt-4o-mini:") for line in table)
@@ -0,0 +1,184 @@
+"""
+Testes das funções auxiliares de src/utils.py.
+"""
+import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import utils
+
+
+@pytest.fixture
+def openai_env(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "openai")
+    monkeypatch.setenv("LLM_MODEL", "gpt-4o-mini")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    utils.clear_llm_clients()
+    yield
+    utils.clear_llm_clients()
+
+
+class TestLLMClientRegistry:
+    def test_same_key_returns_same_instance(self, openai_env):
+        """Mesmo provider/modelo/temperatura reutiliza o cliente."""
+        assert utils.get_llm(temperature=0) is utils.get_llm(temperature=0.0)
+
+    def test_different_keys_return_different_instances(self, openai_env):
+        """Modelo ou temperatura diferentes geram clientes distintos."""
+        base = utils.get_llm(temperature=0)
+        assert utils.get_llm(model="gpt-4o", temperature=0) is not base
+        assert utils.get_llm(temperature=0.5) is not base
+
+    def test_concurrent_access_builds_single_instance(self, openai_env):
+        """Várias threads pedindo o mesmo cliente recebem a mesma instância."""
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            clients = list(executor.map(lambda _: utils.get_llm(temperature=0), range(64)))
+        assert len({id(client) for client in clients}) == 1
+
+    def test_openai_clients_share_http_pool(self, openai_env):
+        """Modelos OpenAI compartilham o mesmo httpx.Client (keep-alive)."""
+        generator = utils.get_llm(temperature=0)
+        evaluator = utils.get_llm(model="gpt-4o", temperature=0)
+        assert generator.http_client is evaluator.http_client
+
+    @pytest.mark.filterwarnings("ignore::FutureWarning")
+    def test_clients_leave_retries_to_wrapper(self, openai_env, monkeypatch):
+        """OpenAI e Google deixam os retries para o RateLimitedChatModel."""
+        pytest.importorskip("langchain_google_genai")
+        monkeypatch.setenv("GOOGLE_API_KEY", "google-test")
+        assert utils.get_llm(temperature=0).llm.max_retries == 0
+        monkeypatch.setenv("LLM_PROVIDER", "google")
+        assert utils.get_llm(model="gemini-1.5-flash", temperature=0).llm.max_retries == 0
+
+
+class TestBoundedMap:
+    def test_results_keep_input_order(self):
+        def slow_first(n):
+            time.sleep(0.02 if n == 0 else 0)
+            return n * 2
+
+        assert list(utils.bounded_map(slow_first, range(6), workers=3)) == [0, 2, 4, 6, 8, 10]
+
+    def test_respects_worker_limit(self):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def work(n):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.005)
+            with lock:
+                state["active"] -= 1
+            return n
+
+        assert list(utils.bounded_map(work, range(30), workers=3)) == list(range(30))
+        assert state["peak"] == 3
+
+    def test_error_propagates_and_cancels_queued_items(self):
+        started = []
+
+        def work(n):
+            started.append(n)
+            if n == 1:
+                raise ValueError("falhou")
+            time.sleep(0.02)
+            return n
+
+        results = utils.bounded_map(work, range(10), workers=2)
+        assert next(results) == 0
+        with pytest.raises(ValueError, match="falhou"):
+            next(results)
+        # Só o que já estava em andamento rodou; o restante foi cancelado
+        assert len(started) < 10
+
+
+    def test_consumes_input_lazily(self):
+        consumed = []
+
+        def items():
+            for n in range(100):
+                consumed.append(n)
+                yield n
+
+        results = utils.bounded_map(lambda n: n, items(), workers=2, max_pending=4)
+        assert next(results) == 0
+        assert len(consumed) <= 4
+        results.close()
+
+
+class TestAboundedMap:
+    def test_results_keep_input_order(self):
+        async def work(n):
+            await asyncio.sleep(0.01 if n % 2 == 0 else 0)
+            return n * 2
+
+        async def collect():
+            return [result async for result in utils.abounded_map(work, range(20), max_pending=20)]
+
+        assert asyncio.run(collect()) == [n * 2 for n in range(20)]
+
+    def test_caller_semaphore_bounds_in_flight_calls(self):
+        state = {"active": 0, "peak": 0}
+
+        async def collect():
+            semaphore = asyncio.Semaphore(4)
+
+            async def work(n):
+                async with semaphore:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                    await asyncio.sleep(0.005)
+                    state["active"] -= 1
+                return n
+
+            return [result async for result in utils.abounded_map(work, range(20), max_pending=20)]
+
+        assert asyncio.run(collect()) == list(range(20))
+        assert state["peak"] == 4
+
+    def test_max_pending_bounds_tasks_in_flight(self):
+        state = {"active": 0, "peak": 0}
+
+        async def work(n):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.001)
+            state["active"] -= 1
+            return n
+
+        async def collect():
+            return [result async for result in utils.abounded_map(work, range(20), max_pending=4)]
+
+        assert asyncio.run(collect()) == list(range(20))
+        assert state["peak"] <= 4
+
+    def test_error_propagates_and_cancels_the_rest(self):
+        cancelled = []
+
+        async def work(n):
+            if n == 0:
+                raise ValueError("falhou")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(n)
+                raise
+            return n
+
+        async def collect():
+            with pytest.raises(ValueError, match="falhou"):
+                async for _ in utils.abounded_map(work, range(5), max_pending=5):
+                    pass
+            # Canceladas antes de a exceção chegar aqui, não só no fim do loop de eventos
+            return sorted(cancelled)
+
+        assert asyncio.run(collect()) == [1, 2, 3, 4]
@@ -0,0 +1,92 @@
+"""
+Testes do modo watch do teste de recall (src/watch.py).
+"""
+import sys
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Adicionar src ao path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import watch
+from watch import FileWatcher, RecallWatch
+
+PROMPT = "p:\n  description: '{description}'\n  system_prompt: '{system}'\n  user_prompt: '{{bug_report}}'\n"
+
+
+def write_prompt(path, system="Sistema", description="v1"):
+    path.write_text(PROMPT.format(system=system, description=description), encoding="utf-8")
+
+
+def write_dataset(path, references):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, reference in enumerate(references):
+            f.write(json.dumps({"inputs": {"bug_report": f"bug {i}"}, "outputs": {"reference": reference}}) + "\n")
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(watch, "generate", lambda template, inputs, llm: calls.append(inputs["bug_report"]) or "história")
+    monkeypatch.setattr(watch, "evaluate_f1_score", lambda q, a, r: {"score": 0.8, "recall": 0.9, "precision": 0.7, "reasoning": ""})
+
+    prompt, dataset = tmp_path / "p.yml", tmp_path / "d.jsonl"
+    write_prompt(prompt)
+    write_dataset(dataset, ["r0", "r1", "r2"])
+    output = []
+    return RecallWatch(prompt, None, dataset, llm=None, out=output.append), calls, output
+
+
+class TestRecallWatch:
+    def test_reavalia_so_o_que_mudou(self, session):
+        recall, calls, output = session
+        assert recall.run() == {"examples": 3, "reused": 0, "evaluated": 3, "failed": 0}
+
+        # Metadados do prompt não mudam a renderização
+        write_prompt(recall.prompt_path, description="v2")
+        assert recall.run()["evaluated"] == 0
+
+        # Uma linha alterada e uma nova
+        write_dataset(recall.dataset_path, ["r0", "r1 editada", "r2", "r3"])
+        assert recall.run() == {"examples": 4, "reused": 2, "evaluated": 2, "failed": 0}
+        assert calls[-2:] == ["bug 1", "bug 3"]
+        assert "🔄 Prompt: sem mudança na renderização | dataset: +1 ~1 -0 linhas" in output
+
+        # O system_prompt entra em todas as renderizações
+        write_prompt(recall.prompt_path, system="Sistema novo")
+        assert recall.run()["evaluated"] == 4
+        assert output[-1] == "📊 Recall 0.9000 | F1 0.8000 | Precision 0.7000 (4/4 exemplos)"
+
+    def test_yaml_invalido_mantem_os_resultados(self, session):
+        recall, calls, output = session
+        recall.run()
+        recall.prompt_path.write_text("p: [", encoding="utf-8")
+
+        assert recall.run() is None
+        assert len(recall.results) == 3
+
+
+class TestFileWatcher:
+    @pytest.mark.parametrize("polling", [False, True])
+    def test_detecta_escrita(self, tmp_path, polling):
+        target, other = tmp_path / "p.yml", tmp_path / "outro.txt"
+        target.write_text("a", encoding="utf-8")
+        watcher = FileWatcher([target], interval=0.05)
+        if polling:
+            watcher.close()
+        try:
+            assert watcher.wait(timeout=0.3) == []
+
+            def edit():
+                time.sleep(0.1)
+                other.write_text("ignorado", encoding="utf-8")
+                target.write_text("ab", encoding="utf-8")
+            threading.Thread(target=edit).start()
+
+            assert watcher.wait(timeout=5) == [target.resolve()]
+        finally:
+            watcher.close()